@@ -0,0 +1,179 @@
+"""Reduces many files with one set of master files.
+
+A CCDReducer loads the masters and reduces its file as soon as it is made,
+so reducing a folder means making a reducer for every file. A
+CCDBatchReducer loads the masters once, and reduce() yields the reduced Data
+object of every file in order, while the next files are loaded on
+background threads. Consecutive files with the same shapes and exposure
+times share a CalibrationPlan and are reduced together as a single stack of
+at most block_memory bytes. With workers the blocks are reduced by a pool
+of threads, numpy releases the GIL while calculating so this scales with
+the number of cores. At most workers + 1 blocks are held at once, besides
+the files loaded ahead. save() writes the reduced files as fits files on a
+background thread while the next blocks are reduced.
+"""
+from Data import Data
+from CCDFolderIndex import CCDFolderIndex
+from CCDReductionObject import CCDBias, CCDDark, CCDFlat
+from CalibrationPlan import get_plan
+from Prefetcher import Prefetcher, decoded_size
+from FitsWriter import FitsStreamWriter, provenance
+import OutputManager
+from errors import CCDBatchReducerError, CalibrationPlanError
+from precision import get_policy
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import numpy as np
+import os
+
+
+class CCDBatchReducer(object):
+    """Reduces a list of files, or the files of a folder, with the same
+    master bias, dark and flat.
+    """
+
+    prefetch_depth = 2  # files loaded ahead on background threads, 0 loads them one by one
+    prefetch_memory = 2**30  # maximum bytes of the files loaded ahead, None is no limit
+    block_memory = 2**27  # maximum bytes of the reduced frames of a block of files
+
+    def __init__(self, files, masterpath, window=None, workers=None):
+        """files is a list of file paths, the path of a folder or the index
+        of a folder. The masters are loaded from masterpath. If window, a
+        tuple of two slices, is given only that sub-window of the files is
+        loaded and reduced. workers is the number of threads reducing
+        blocks, None reduces them while iterating.
+        """
+        try:
+            assert isinstance(masterpath, str), "masterpath must be a string"
+            assert workers is None or (isinstance(workers, int) and workers > 0), \
+                "workers must be None or a positive integer"
+            self.index = None
+            if isinstance(files, str):
+                self.index = self._index(files)
+            elif isinstance(files, CCDFolderIndex):
+                self.index = files
+            else:
+                files = list(files)
+                assert all(isinstance(i, str) for i in files), "files must be a list of strings"
+        except AssertionError as excep:
+            raise self._error(excep) from excep
+
+        self.paths = files if self.index is None else self.index.paths()
+        self.masterpath = masterpath
+        self.window = window
+        self.workers = workers
+        self.bias = self._bias(masterpath)
+        self.dark = self._dark(masterpath)
+        self.flat = self._flat(masterpath)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        return self.reduce()
+
+    @staticmethod
+    def _loadfile(filename, window=None):
+        """This function must return a Data object holding the sub-window
+        window of the frames.
+        Overwrite this!
+        """
+        return Data([np.random.randint(5e3, 5e4, (1000, 1000))], [1], [None]).window(window)
+
+    @staticmethod
+    def _error(exception=None):
+        """Raises the CCDBatchReducerError."""
+        return CCDBatchReducerError(exception)
+
+    @staticmethod
+    def _index(folderpath):
+        """Returns the index of the files in the folder.
+        Overwrite this!"""
+        return CCDFolderIndex(folderpath)
+
+    @staticmethod
+    def _bias(filepath):
+        f = CCDBias(filepath)
+        return f.load()
+
+    @staticmethod
+    def _dark(filepath):
+        f = CCDDark(filepath)
+        return f.load()
+
+    @staticmethod
+    def _flat(filepath):
+        f = CCDFlat(filepath)
+        return f.load()
+
+    def reduce(self):
+        """Yields the reduced Data object of every file, in order."""
+        blocks = self._blocks()
+        if self.workers is None:
+            for block in blocks:
+                for data in self._reduce(block):
+                    yield data
+            return
+        with ThreadPoolExecutor(self.workers) as pool:
+            pending = deque()
+            for block in blocks:
+                pending.append(pool.submit(self._reduce, block))
+                if len(pending) > self.workers:
+                    for data in pending.popleft().result():
+                        yield data
+            while len(pending) > 0:
+                for data in pending.popleft().result():
+                    yield data
+
+    def save(self, savepath, suffix="_reduced", compression=None, dtype=None, depth=2):
+        """Reduces the files and saves them as fits files in savepath,
+        named after the files with suffix appended. The headers of the files
+        are copied and the fingerprints of the masters are added, see
+        FitsWriter.write for compression and dtype, np.float32 halves the
+        size of float64 results. depth files may wait to be written. Returns
+        the written filenames.
+        """
+        try:
+            assert isinstance(savepath, str), "savepath must be a string"
+            assert isinstance(suffix, str), "suffix must be a string"
+        except AssertionError as excep:
+            raise self._error(excep) from excep
+        with FitsStreamWriter(compression, dtype, depth=depth) as writer:
+            for path, data in zip(self.paths, self.reduce()):
+                name = os.path.splitext(os.path.basename(path))[0] + suffix
+                writer.put(data, OutputManager.reserve(savepath, name, ".fits", path),
+                           provenance(self.bias, self.dark, self.flat, path))
+        return writer.written
+
+    def _blocks(self):
+        """Yields lists of consecutive loaded files with the same shapes and
+        exposure times, of at most block_memory reduced bytes.
+        """
+        calibrated = np.dtype(get_policy().calibrated)
+        sizes = None
+        if self.index is not None:
+            entries = {i["path"]: i for i in self.index.entries()}
+            sizes = [decoded_size(entries[i], get_policy().raw, self.window) for i in self.paths]
+        block, key, size = [], None, 0
+        for data in Prefetcher(self.paths, lambda path: self._loadfile(path, self.window), self.prefetch_depth,
+                               self.prefetch_memory, sizes):
+            nbytes = sum(int(np.prod(i)) for i in data.shape) * calibrated.itemsize
+            new = (tuple(data.time()), tuple(tuple(i) for i in data.shape))
+            if len(block) > 0 and (new != key or size + nbytes > self.block_memory):
+                yield block
+                block, size = [], 0
+            block.append(data)
+            key = new
+            size += nbytes
+        if len(block) > 0:
+            yield block
+
+    def _reduce(self, block):
+        """Returns the reduced Data objects of a block of files."""
+        try:
+            plan = get_plan(self.bias, self.dark, self.flat, block[0].time(), block[0].shape,
+                            get_policy().calibrated, self.window)
+        except CalibrationPlanError as excep:
+            raise self._error(excep) from excep
+        return plan.apply_many(block)
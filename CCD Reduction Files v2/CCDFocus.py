@@ -2,6 +2,8 @@ import support_functions as sf
 from CCDLaserReducer import CCDLaserReducer
 from CCDFolderLaserReducer import CCDFolderLaserReducer
 from errors import CCDFocusError
+import Renderer
+import OutputManager
 
 from matplotlib import pyplot as plt, colors as colors
 import numpy as np
@@ -13,7 +15,7 @@ class CCDFocus(object):
     """Master class used to analyse a focus.
 
     __init__(self, folderpath [, masterpath, savepath, delta=150,
-        pixel_size=1e-6, magnifiction=100, realign=False]):
+        pixel_size=1e-6, magnifiction=100, realign=False, window=None]):
 
         folderpath:
                 The full path to the folder containing CCD images taken at
@@ -42,6 +44,12 @@ class CCDFocus(object):
                 the focus. If it is False it does not. Realigning is buggy,
                 but corrects for shifting laserlight (that is, the center of
                 the image does not remain static).
+        window:
+                A tuple of two slices, like (slice(350, 651), slice(350, 651)).
+                If it is given only this sub-window of the CCD images and the
+                master files is read and reduced, which is much faster for
+                large images. It must contain the focus and delta pixels
+                around it.
 
 
     Attributes:
@@ -65,13 +73,14 @@ class CCDFocus(object):
     """
 
     def __init__(self, folderpath, masterpath=None, savepath=None, delta=150, pixel_size=9e-6,
-                 magnification=100, realign=False):
+                 magnification=100, realign=False, window=None):
         try:
             assert isinstance(folderpath, str), "folderpath must be a string"
             assert isinstance(pixel_size, (float, int)), \
                         "pixel_size must be an integer or a float"
             assert isinstance(masterpath, str) or masterpath is None, "masterpath must be a string"
             assert isinstance(savepath, str) or savepath is None, "masterpath must be a string"
+            self.folderpath = folderpath
             self.delta = delta
             self.pixel_size = pixel_size/magnification
             if savepath is None:
@@ -80,14 +89,15 @@ class CCDFocus(object):
                 self.savepath = savepath
         except AssertionError as excep:
             raise self._error(excep) from excep
-        focus, names = self._cube(folderpath, masterpath, savepath, pixel_size/magnification, delta, realign)
-        self.z = self._zposition(names)
+        focus, names, z = self._cube(folderpath, masterpath, savepath, pixel_size/magnification, delta, realign,
+                                     window)
+        self.z = self._zposition(names, z)
         self.focus = np.flip(focus, 1)
 
     @staticmethod
-    def _cube(folderpath, masterpath, savepath, pixel_size, delta, realign):
+    def _cube(folderpath, masterpath, savepath, pixel_size, delta, realign, window=None):
         f =  CCDFolderLaserReducer(folderpath, masterpath, savepath, pixel_size)
-        return f.cube(delta, realign)
+        return f.cube(delta, realign, window) + (f.zvalues(), )
 
     @staticmethod
     def _error(exception=None):
@@ -96,8 +106,9 @@ class CCDFocus(object):
         return CCDFocusError(exception)
 
     @staticmethod
-    def _zposition(names):
-        """This function can change how the list of names is changed into a list of positions.
+    def _zposition(names, z):
+        """This function can change how the list of names and the z positions
+        the folder index read from them are changed into a list of positions.
         Overwrite this!"""
         return np.array(names)
 
@@ -125,8 +136,12 @@ class CCDFocus(object):
             fig.suptitle(title)
             fig.show()
 
-    def save(self, title="Image of Data", log=False, both=False, savename="FocusPic", extension=".png"):
-        """Saves the calibrated data."""
+    def save(self, title="Image of Data", log=False, both=False, savename="FocusPic", extension=".png",
+             renderer=None):
+        """Saves the calibrated data. Single slices are drawn by renderer, a
+        Renderer.RenderPool, or in this thread if it is None. Returns the
+        filenames.
+        """
         try:
             assert isinstance(title, str), "title must be a string"
             assert isinstance(savename, str), "filename must be a string"
@@ -134,9 +149,11 @@ class CCDFocus(object):
         except AssertionError as excep:
             raise self.error(excep) from excep
 
+        tasks = []
+        filenames = []
         for i in self.focus:
-            fig = plt.figure(figsize=[15, 10.5])
             if both is True:
+                fig = Renderer.blank()
                 ax1 = fig.add_subplot(211)
                 ax2 = fig.add_subplot(212)
                 ax1.set_title("Variation along x-axis")
@@ -145,35 +162,46 @@ class CCDFocus(object):
                 sliced2 = i[:, :, self.delta].transpose()
                 self._show(sliced1, fig, ax1, log)
                 self._show(sliced2, fig, ax2, log)
+                fig.suptitle(title)
+                filenames.append(OutputManager.reserve(self.savepath, savename, extension, self.folderpath))
+                fig.savefig(filenames[-1])
             else:
-                ax = fig.add_subplot(111)
-                sliced = i[:, self.delta, :].transpose()
-                self._show(sliced, fig, ax, log)
-            fig.suptitle(title)
-            fig.savefig(sf.find_free_filename(self.savepath, savename, extension))
-            plt.close(fig)
-
-
-    def _show(self, data, fig, ax, log):
+                options = self._showoptions(i[:, self.delta, :].transpose(), log)
+                options["suptitle"] = title
+                tasks.append(("image", options, Renderer.reserve(self.savepath, savename, extension,
+                                                                 self.folderpath)))
+        return filenames + (Renderer.render(tasks) if renderer is None else renderer.render(tasks))
+
+    def _showoptions(self, data, log):
+        """Returns the image options of a slice along the direction of
+        propagation.
+        """
         ps = self.pixel_size * 1e6
         loc = np.argwhere(data == np.max(data))[0]
         x = self.z - self.z[loc[1]]
         dx = (x[-1] - x[0]) / ((len(x) - 1) * 2)
         xmin, xmax = (x[0] - dx) * 1e6, (x[-1] + dx) * 1e6
         ymax, ymin = (self.delta + 0.5) * ps, -(self.delta + 0.5) * ps
-        extent = [xmin, xmax, ymax, ymin]
+        return {"data": np.abs(data) if log is not False else data, "extent": [xmin, xmax, ymax, ymin],
+                "cmap": "jet", "log": log is not False, "aspect": "auto", "interpolation": "none",
+                "marker": (x[loc[1]], (loc[0] - self.delta) * ps), "xlabel": r"z ($\mu$m)",
+                "ylabel": r"$\rho$ ($\mu$m)", "clabel": "Counts/s"}
+
+    def _show(self, data, fig, ax, log):
+        options = self._showoptions(data, log)
+        extent = options["extent"]
         if log is False:
             im = ax.imshow(data, cmap="jet", aspect="auto", extent=extent, interpolation="none")
         else:
             im = ax.imshow(np.abs(data), cmap="jet", aspect="auto", extent=extent, interpolation="none",
                            norm=colors.LogNorm())
-        ax.scatter(x[loc[1]], (loc[0] - self.delta) * ps, marker="x", color="black")
+        ax.scatter(*options["marker"], marker="x", color="black")
         ax.set_xlim(*extent[:2])
         ax.set_ylim(*extent[2:])
-        ax.set_xlabel(r"z ($\mu$m)")
-        ax.set_ylabel(r"$\rho$ ($\mu$m)")
+        ax.set_xlabel(options["xlabel"])
+        ax.set_ylabel(options["ylabel"])
         cb = fig.colorbar(im, ax=ax)
-        cb.set_label("Counts/s")
+        cb.set_label(options["clabel"])
 
     def imshow(self, zpos, title="CCD image", log=False):
         try:
@@ -197,7 +225,11 @@ class CCDFocus(object):
                 fig.suptitle(title + " " + i)
             fig.show()
 
-    def imsave(self, zpos, log=False, title="Image of Data", savename="CCDPic", extension=".png"):
+    def imsave(self, zpos, log=False, title="Image of Data", savename="CCDPic", extension=".png", renderer=None):
+        """Saves the images at zpos. The figures are drawn by renderer, a
+        Renderer.RenderPool, or in this thread if it is None. Returns the
+        filenames.
+        """
         try:
             assert isinstance(zpos, int), "zpos must be an integer"
             assert isinstance(title, str), "title must be a string"
@@ -208,32 +240,34 @@ class CCDFocus(object):
 
         data = self.focus[:, zpos]
         z = self.z[zpos]
+        tasks = []
         for i in range(len(data)):
             axial_distr = self.focus[i, :, self.delta, self.delta]
             loc = np.argwhere(axial_distr == np.max(axial_distr)).reshape(-1)[0]
-            fig = plt.figure(figsize=[15, 10.5])
-            ax = fig.add_subplot(111)
-            ax.set_title(r"z = {} $\mu$m".format(round((z - self.z[loc]) * 1e6, 2)))
-            self._imshow(fig, ax, data[i], "jet", log)
-            if i == 0:
-                fig.suptitle(title)
-            else:
-                fig.suptitle(title + " " + i)
-            fig.savefig(sf.find_free_filename(self.savepath, savename, extension))
-            plt.close(fig)
-
-    def _imshow(self, fig, ax, data, cmap, log):
+            options = self._imageoptions()
+            options.update(data=data[i], cmap="jet", log=log,
+                           title=r"z = {} $\mu$m".format(round((z - self.z[loc]) * 1e6, 2)),
+                           suptitle=title if i == 0 else title + " " + str(i))
+            tasks.append(("image", options, Renderer.reserve(self.savepath, savename, extension, self.folderpath)))
+        return Renderer.render(tasks) if renderer is None else renderer.render(tasks)
+
+    def _imageoptions(self):
+        """Returns the extent and labels of the images of the focus."""
         ps = self.pixel_size * 1e6
         dt = self.delta + 0.5
-        extent = [-dt * ps, dt * ps, dt * ps, -dt * ps]
+        return {"extent": [-dt * ps, dt * ps, dt * ps, -dt * ps], "xlabel": r"x position ($\mu$m)",
+                "ylabel": r"y position ($\mu$m)", "clabel": "Counts/s"}
+
+    def _imshow(self, fig, ax, data, cmap, log):
+        options = self._imageoptions()
         if log is False:
-            im = ax.imshow(data, cmap=cmap, aspect="equal", extent=extent)
+            im = ax.imshow(data, cmap=cmap, aspect="equal", extent=options["extent"])
         else:
-            im = ax.imshow(data, cmap=cmap, aspect="equal", extent=extent, norm=colors.LogNorm())
-        ax.set_xlabel(r"x position ($\mu$m)")
-        ax.set_ylabel(r"y position ($\mu$m)")
+            im = ax.imshow(data, cmap=cmap, aspect="equal", extent=options["extent"], norm=colors.LogNorm())
+        ax.set_xlabel(options["xlabel"])
+        ax.set_ylabel(options["ylabel"])
         cb = fig.colorbar(im, ax=ax)
-        cb.set_label("Counts/s")
+        cb.set_label(options["clabel"])
 
     def sliceshow(self, zpos, title="Slice of Data", log=False, both=False, fit=False, overlap=False):
         try:
@@ -302,7 +336,7 @@ class CCDFocus(object):
             _data = data[i]
             axial_distr = self.focus[i, :, self.delta, self.delta]
             loc = np.argwhere(axial_distr == np.max(axial_distr)).reshape(-1)[0]
-            fig = plt.figure(figsize=[15, 10.5])
+            fig = Renderer.blank()
             ax3 = fig.add_subplot(212)
             self._imshow(fig, ax3, _data, "jet", log)
             ax3.set_title(r"z = {} $\mu$m".format(round((z - self.z[loc]) * 1e6, 2)))
@@ -340,9 +374,8 @@ class CCDFocus(object):
             else:
                 fig.suptitle(title + " " + str(i))
 
-            full_filename = sf.find_free_filename(self.savepath, savename, extension)
+            full_filename = OutputManager.reserve(self.savepath, savename, extension, self.folderpath)
             fig.savefig(full_filename)
-            plt.close(fig)
 
     def _slice1D(self, ax, sliced, fit, ps, color):
         x = np.arange(-self.delta, self.delta + 1) * ps
@@ -466,7 +499,7 @@ class CCDFocus(object):
 
     def characterise_save(self, plot=False, filename="Characteristics_focus"):
         text = self.characterise(plot)
-        fullfilename = sf.find_free_filename(self.savepath, filename, ".txt")
+        fullfilename = OutputManager.reserve(self.savepath, filename, ".txt", self.folderpath)
         with open(fullfilename, "w") as f:
             f.write(text)
 
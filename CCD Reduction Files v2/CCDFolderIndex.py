@@ -0,0 +1,146 @@
+from errors import CCDFolderIndexError
+import OutputManager
+
+import json
+import os
+
+
+class CCDFolderIndex(object):
+    """Index of the files in a folder, made without reading pixel data.
+
+    For every file the index stores its name, path, size, mtime, exposure
+    time, the shapes of the frames, the number of HDUs and the z position
+    parsed from the name. The index is saved as indexname in the folder and
+    only files whose size or mtime changed are scanned again, so folders can
+    be planned without opening every file. Files listed in the manifest of
+    the folder were written by the pipeline, like reduced frames saved next
+    to the raw files, and are left out.
+
+    This is a master class: _scan and _zvalue must be overwritten for a
+    specific file type.
+    """
+
+    indexname = "ccd_index.json"
+    version = 1
+
+    def __init__(self, folderpath, save=True):
+        """Loads the saved index of folderpath and updates it. If save is
+        True the updated index is written back to the folder.
+        """
+        try:
+            assert isinstance(folderpath, str), "folderpath must be a string"
+            assert os.path.isdir(folderpath), "folderpath must be an existing folder"
+        except AssertionError as excep:
+            raise self._error(excep) from excep
+        self.folderpath = folderpath
+        self.save = save
+        self._entries = self._read()
+        self.refresh()
+
+    @staticmethod
+    def _error(exception=None):
+        """Raises the CCDFolderIndexError."""
+        return CCDFolderIndexError(exception)
+
+    @staticmethod
+    def _accept(name):
+        """Returns True if the file name belongs in the index."""
+        return "fit" in name
+
+    def _scan(self, path):
+        """Returns a dictionary with the "exptime", "shapes" and "hdus" of a
+        file, read from its headers only.
+        Overwrite this!
+        """
+        return {"exptime": None, "shapes": [], "hdus": 0}
+
+    @staticmethod
+    def _zvalue(name):
+        """Returns the z position in the name of a file (without extension),
+        or None.
+        Overwrite this!
+        """
+        return None
+
+    def refresh(self):
+        """Updates the index: new and changed files are scanned, removed
+        files are dropped.
+        """
+        entries = {}
+        changed = False
+        outputs = self._outputs()
+        for name in sorted(os.listdir(self.folderpath)):
+            path = os.path.join(self.folderpath, name)
+            if name == self.indexname or name in outputs or not self._accept(name) or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entry = self._entries.get(name)
+            if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+                entry = {"name": name, "size": stat.st_size, "mtime": stat.st_mtime}
+                try:
+                    entry.update(self._scan(path))
+                except Exception as excep:
+                    raise self._error("Cannot scan " + path + ": " + str(excep)) from excep
+                entry["z"] = self._zvalue(os.path.splitext(name)[0])
+                changed = True
+            entries[name] = entry
+        changed = changed or set(entries) != set(self._entries)
+        self._entries = entries
+        if changed and self.save:
+            self._write()
+
+    def _outputs(self):
+        """Returns the names of the files in the manifest of the folder."""
+        manager = OutputManager.OutputManager(os.path.join(self.folderpath, ""), OutputManager.manifest_name)
+        try:
+            return {i["output"] for i in manager.entries()}
+        except (OSError, ValueError, KeyError, TypeError) as excep:
+            raise self._error("Cannot read the manifest of " + self.folderpath + ": " + str(excep)) from excep
+
+    def names(self):
+        """Returns a sorted list of the file names."""
+        return sorted(self._entries)
+
+    def paths(self):
+        """Returns a sorted list of the full file paths."""
+        return [os.path.join(self.folderpath, i) for i in self.names()]
+
+    def entries(self):
+        """Returns a list with the entry of every file, sorted by name."""
+        entries = []
+        for name in self.names():
+            entry = dict(self._entries[name])
+            entry["path"] = os.path.join(self.folderpath, name)
+            entry["shapes"] = [tuple(i) for i in entry["shapes"]]
+            entries.append(entry)
+        return entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _read(self):
+        """Returns the saved entries, or no entries if there is no usable
+        saved index.
+        """
+        try:
+            with open(os.path.join(self.folderpath, self.indexname), "r") as f:
+                saved = json.load(f)
+            if saved.get("version") != self.version or saved.get("type") != type(self).__name__:
+                return {}
+            return saved["entries"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _write(self):
+        """Saves the index next to the data. A folder which cannot be written
+        to simply keeps no saved index.
+        """
+        filename = os.path.join(self.folderpath, self.indexname)
+        temp = filename + ".tmp" + str(os.getpid())
+        try:
+            with open(temp, "w") as f:
+                json.dump({"version": self.version, "type": type(self).__name__, "entries": self._entries}, f)
+            os.replace(temp, filename)
+        except OSError:
+            if os.path.exists(temp):
+                os.remove(temp)
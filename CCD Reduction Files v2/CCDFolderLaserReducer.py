@@ -1,4 +1,8 @@
 from CCDLaserReducer import CCDLaserReducer
+from CCDFolderIndex import CCDFolderIndex
+from Prefetcher import Prefetcher, decoded_size
+from Renderer import RenderPool
+from precision import get_policy
 from errors import CCDFolderLaserReducerError
 
 import numpy as np
@@ -7,6 +11,10 @@ import os
 
 class CCDFolderLaserReducer(object):
 
+    prefetch_depth = 2  # files reduced ahead on background threads, 0 reduces them one by one
+    prefetch_memory = 2**30  # maximum bytes of the reduced files held at once, None is no limit
+    render_processes = None  # worker processes drawing the images and power plots, None draws them on this thread
+
     def __init__(self, folderpath, masterpath=None, savepath=None, pixel_size=9e-6):
         try:
             assert isinstance(folderpath, str), "folderpath must be a string"
@@ -27,7 +35,8 @@ class CCDFolderLaserReducer(object):
         except AssertionError as excep:
             raise self._error(excep) from excep
 
-        self.files = sorted(os.listdir(self.folderpath))
+        self.index = self._index(self.folderpath)
+        self.files = self.index.names()
 
     @staticmethod
     def _error(exception=None):
@@ -35,49 +44,76 @@ class CCDFolderLaserReducer(object):
         return CCDFolderLaserReducerError(exception)
 
     @staticmethod
-    def _laserreducer(folderpath, masterpath, savepath, pixel_size):
-        f = CCDLaserReducer(folderpath, masterpath, savepath, pixel_size)
+    def _index(folderpath):
+        """Returns the index of the files in the folder.
+        Overwrite this!"""
+        return CCDFolderIndex(folderpath)
+
+    @staticmethod
+    def _laserreducer(folderpath, masterpath, savepath, pixel_size, window=None):
+        f = CCDLaserReducer(folderpath, masterpath, savepath, pixel_size, window=window)
         return f
 
+    def _reducers(self, window=None):
+        """Iterates over the file names and their laser reducers in sorted
+        order. The next prefetch_depth files are loaded and reduced on
+        background threads while the current one is plotted. If window is
+        given only that sub-window of the files is loaded and reduced.
+        """
+        entries = {i["name"]: i for i in self.index.entries()}
+        sizes = [decoded_size(entries[i], get_policy().calibrated, window) if i in entries else 0
+                 for i in self.files]
+        reducers = Prefetcher([self.folderpath + i for i in self.files],
+                              lambda path: self._laserreducer(path, self.masterpath, self.savepath, self.pixel_size,
+                                                              window),
+                              self.prefetch_depth, self.prefetch_memory, sizes)
+        return zip(self.files, reducers)
+
+    def zvalues(self):
+        """Returns the z position of every file stored in the index, None
+        if it could not be read from the name.
+        """
+        entries = {i["name"]: i for i in self.index.entries()}
+        return [entries[i].get("z") for i in self.files]
+
     def all_fit_saved(self, log=False):
-        for i in self.files:
-            if "fit" in i:
+        with RenderPool(self.render_processes) as renderer:
+            for i, f in self._reducers():
                 name = i[:-4]
                 if log is True:
                     name += "_log"
-                f = self._laserreducer(self.folderpath + i, self.masterpath, self.savepath, self.pixel_size)
-                f.imsave(savename=name, title=i[:-4], log=log)
+                f.imsave(savename=name, title=i[:-4], log=log, renderer=renderer)
 
     def all_fit_reduced(self, fit=True, log=False):
-        for i in self.files:
-            if "fit" in i:
-                name = i[:-4] + "_Reduced"
-                if log is True:
-                    name += "_log"
-                f =  self._laserreducer(self.folderpath + i, self.masterpath, self.savepath, self.pixel_size)
-                f.slicesave(savename=name, title=i[:-4], fit=fit, log=log)
+        for i, f in self._reducers():
+            name = i[:-4] + "_Reduced"
+            if log is True:
+                name += "_log"
+            f.slicesave(savename=name, title=i[:-4], fit=fit, log=log)
 
     def all_fit_power(self):
-        for i in self.files:
-            if "fit" in i:
-                f = self._laserreducer(self.folderpath + i, self.masterpath, self.savepath, self.pixel_size)
-                f.powersave(savename=i[:-4] + "_Power", title=i[:-4])
+        with RenderPool(self.render_processes) as renderer:
+            for i, f in self._reducers():
+                f.powersave(savename=i[:-4] + "_Power", title=i[:-4], renderer=renderer)
 
-    def cube(self, delta, realign=False):
+    def cube(self, delta, realign=False, window=None):
+        """Returns the cube of all files around the maximum, delta pixels in
+        every direction, and the names of the files. If window, a tuple of
+        two slices, is given only that sub-window of the files is loaded and
+        reduced, which must contain the laser and delta pixels around it.
+        """
         cubes = []
         names = []
-        for i in self.files:
-            if "fit" in i:
-                datacube = []
-                names.append(i[:-4])
-                f = self._laserreducer(self.folderpath + i, self.masterpath, self.savepath, pixel_size=self.pixel_size)
-                if realign is False:
-                    normed = (f.data / f.data.time()).data()
-                    for i in range(len(normed)):
-                        datacube.append(normed[i])
-                else:
-                    self._realign_every_file_and_append(datacube, f.data, delta)
-                cubes.append(datacube)
+        for i, f in self._reducers(window):
+            datacube = []
+            names.append(i[:-4])
+            if realign is False:
+                normed = (f.data / f.data.time()).data()
+                for i in range(len(normed)):
+                    datacube.append(normed[i])
+            else:
+                self._realign_every_file_and_append(datacube, f.data, delta)
+            cubes.append(datacube)
         if realign is False:
             return self._align_total_cube(cubes, delta), names
         return np.array(cubes).transpose([1, 0, 2, 3]), names
@@ -1,17 +1,19 @@
 import support_functions as sf
 from CCDReducer import CCDReducer
+import Renderer
+import OutputManager
 from errors import CCDLaserReducerError
 
 from scipy import optimize
-from matplotlib import pyplot as plt, colors
+from matplotlib import pyplot as plt
 import numpy as np
 
 
 class CCDLaserReducer(CCDReducer):
     """Loads a single file and reduces it. Has special functions specific for lasers."""
 
-    def __init__(self, filepath, masterpath=None, savepath=None, pixel_size=1e-6, magnification=1):
-        super(CCDLaserReducer, self).__init__(filepath, masterpath, savepath)
+    def __init__(self, filepath, masterpath=None, savepath=None, pixel_size=1e-6, magnification=1, window=None):
+        super(CCDLaserReducer, self).__init__(filepath, masterpath, savepath, window)
         try:
             assert isinstance(pixel_size, (float, int)), "pixel_size must be a float or string."
             self.pixel_size = pixel_size/magnification
@@ -23,17 +25,10 @@ class CCDLaserReducer(CCDReducer):
         """Raises the CCDLaserReducerError."""
         return CCDLaserReducerError(exception)
 
-    def _imshow(self, fig, ax, data, cmap, log):
+    def _imageoptions(self, data):
         ps = self.pixel_size * 1e6
-        extent = [-0.5 * ps, (data.shape[1] - 0.5) * ps, (data.shape[0] - 0.5) * ps, -0.5 * ps]
-        if log is False:
-            im = ax.imshow(data, cmap=cmap, aspect="equal", extent=extent)
-        else:
-            im = ax.imshow(data, cmap=cmap, aspect="equal", extent=extent, norm=colors.LogNorm())
-        ax.set_xlabel(r"x position ($\mu$m)")
-        ax.set_ylabel(r"y position ($\mu$m)")
-        cb = fig.colorbar(im, ax=ax)
-        cb.set_label("Counts")
+        return {"extent": [-0.5 * ps, (data.shape[1] - 0.5) * ps, (data.shape[0] - 0.5) * ps, -0.5 * ps],
+                "xlabel": r"x position ($\mu$m)", "ylabel": r"y position ($\mu$m)", "clabel": "Counts"}
 
     def sliceshow(self, positions=[None, None], title="Slice of Data", fit=False, log=False):
         try:
@@ -121,16 +116,15 @@ class CCDLaserReducer(CCDReducer):
 
         best_pos = self._find_slice_pos(position)
         for i in range(len(self.data)):
-            fig = plt.figure(figsize=[15, 10.5])
+            fig = Renderer.blank()
             self._slicing(fig, self.data.data()[i], self.data.time()[i], best_pos[i], fit, log)
             if i == 0:
                 fig.suptitle(title)
             else:
                 fig.suptitle(title + " " + str(i))
 
-            full_filename = sf.find_free_filename(self.savepath, savename, extension)
+            full_filename = OutputManager.reserve(self.savepath, savename, extension, self.filepath)
             fig.savefig(full_filename)
-            plt.close(fig)
 
     def _slice1D(self, ax, sliced, fit, ps, color):
         x = np.arange(len(sliced)) * ps
@@ -186,7 +180,11 @@ class CCDLaserReducer(CCDReducer):
                 fig.suptitle(title + " " + i)
             fig.show()
 
-    def powersave(self, title="Image of Data", savename="FitsPicture", extension=".png"):
+    def powersave(self, title="Image of Data", savename="FitsPicture", extension=".png", renderer=None):
+        """Saves the power plots. The figures are drawn by renderer, a
+        Renderer.RenderPool, or in this thread if it is None. Returns the
+        filenames.
+        """
         try:
             assert isinstance(title, str), "title must be a string"
             assert isinstance(savename, str), "savename must be a string"
@@ -195,24 +193,26 @@ class CCDLaserReducer(CCDReducer):
             raise self._error(excep) from excep
 
         p = self.cum_power_fraction_within_area()
+        tasks = []
         for i in range(len(p)):
-            full_filename = sf.find_free_filename(self.savepath, savename, extension)
-            fig = self._power(p[i])
-            if i == 0:
-                fig.suptitle(title)
-            else:
-                fig.suptitle(title + " " + i)
-            fig.savefig(full_filename)
-            plt.close(fig)
+            options = self._poweroptions(p[i])
+            options["suptitle"] = title if i == 0 else title + " " + str(i)
+            tasks.append(("lines", options, Renderer.reserve(self.savepath, savename, extension, self.filepath)))
+        return Renderer.render(tasks) if renderer is None else renderer.render(tasks)
 
-    def _power(self, powerlist):
+    def _poweroptions(self, powerlist):
+        """Returns the line and labels of the power plot."""
         powerlist = np.array(powerlist)
-        x = np.arange(len(powerlist)) * self.pixel_size * 1e3
+        return {"x": np.arange(len(powerlist)) * self.pixel_size * 1e3, "y": powerlist * 100,
+                "xlabel": "Distance from center (mm)", "ylabel": "Percentage of total power on detector"}
+
+    def _power(self, powerlist):
+        options = self._poweroptions(powerlist)
         fig = plt.figure(figsize=[15, 10.5])
         ax = fig.add_subplot(111)
-        ax.plot(x, powerlist * 100)
-        ax.set_xlabel("Distance from center (mm)")
-        ax.set_ylabel("Percentage of total power on detector")
+        ax.plot(options["x"], options["y"])
+        ax.set_xlabel(options["xlabel"])
+        ax.set_ylabel(options["ylabel"])
         return fig
 
     def cum_power_fraction_within_area(self):
@@ -1,7 +1,11 @@
 from Data import Data
-import support_functions as sf
 from CCDReductionObject import CCDBias, CCDDark, CCDFlat
-from errors import CCDReducerError
+from CalibrationPlan import get_plan
+import FitsWriter
+import OutputManager
+import Renderer
+from errors import CCDReducerError, CalibrationPlanError
+from precision import get_policy
 
 
 from matplotlib import pyplot as plt, colors as colors
@@ -12,9 +16,15 @@ import os
 class CCDReducer(object):
     """Loads a single file and reduces it using a Bias, Dark and Flat."""
 
-    def __init__(self, filepath, masterpath=None, savepath=None):
-        """Initiates the class, loads the file and creates a science."""
-        self.data = self._loadfile(filepath)
+    def __init__(self, filepath, masterpath=None, savepath=None, window=None):
+        """Initiates the class, loads the file and creates a science. If
+        window, a tuple of two slices like (slice(350, 651), slice(350, 651)),
+        is given, only that sub-window of the frames is loaded and reduced
+        with the same sub-window of the master files.
+        """
+        self.filepath = filepath
+        self.window = window
+        self.data = self._loadfile(filepath, window)
         try:
             assert isinstance(masterpath, str) or masterpath is None, "masterpath must be a string"
             assert isinstance(savepath, str) or savepath is None, "savepath must be a string"
@@ -32,11 +42,12 @@ class CCDReducer(object):
         self._science()
 
     @staticmethod
-    def _loadfile(filename):
-        """This function must return a Data object.
+    def _loadfile(filename, window=None):
+        """This function must return a Data object holding the sub-window
+        window of the frames.
         Overwrite this!
         """
-        return Data([np.random.randint(5e3, 5e4, (1000, 1000))], [1], [None])
+        return Data([np.random.randint(5e3, 5e4, (1000, 1000))], [1], [None]).window(window)
 
     @staticmethod
     def _error(exception=None):
@@ -47,52 +58,59 @@ class CCDReducer(object):
 
     @staticmethod
     def _bias(filepath):
-        """Loads the bias object. This should not need to be changed.
+        """Loads the bias object, through the MasterCache of CCDBias.load.
+        This should not need to be changed.
         But if you save the bias object differently: Overwrite this!"""
         f =  CCDBias(filepath)
         return f.load()
 
     @staticmethod
     def _dark(filepath):
-        """Loads the dark object. This should not need to be changed.
+        """Loads the dark object, through the MasterCache of CCDDark.load.
+        This should not need to be changed.
         But if you save the dark object differently: Overwrite this!"""
         f =  CCDDark(filepath)
         return f.load()
 
     @staticmethod
     def _flat(filepath):
-        """Loads the flat object. This should not need to be changed.
+        """Loads the flat object, through the MasterCache of CCDFlat.load.
+        This should not need to be changed.
         But if you save the flat object differently: Overwrite this!"""
         f = CCDFlat(filepath)
         return f.load()
 
     def _science(self):
         """Creates a science using a datafile
-        as well as the master bias, dark, flat.
+        as well as the master bias, dark, flat. The offset and gain of the
+        masters are taken from a CalibrationPlan, which is only made once
+        for every set of masters, window and exposure times.
         """
-
-        data = self.data
-        bias = self._bias(self.masterpath)
-        dark = self._dark(self.masterpath)
-        flat = self._flat(self.masterpath)
-        if bias is None:
-            bias = Data([np.zeros(i) for i in data.shape], [0] * len(data), [None] * len(data))
-        if dark is None:
-            dark = Data([np.zeros(i) for i in data.shape], [1] * len(data), [None] * len(data))
-        else:
-            dark_ = []
-            for i in range(len(dark)):
-                d2 = dark.data()[i]
-                mask = d2 < 0
-                d2[mask] = 0
-                dark_.append(d2)
-            dark = Data(dark_, dark.time(), dark.id())
-        if flat is None:
-            flat = Data([np.ones(i) for i in data.shape], [1] * len(data), [None] * len(data))
-
-        a = (data - bias)
-        b = a - dark
-        self.data = b / flat
+        try:
+            plan = get_plan(self._bias(self.masterpath), self._dark(self.masterpath), self._flat(self.masterpath),
+                            self.data.time(), self.data.shape, get_policy().calibrated, self.window)
+        except CalibrationPlanError as excep:
+            raise self._error(excep) from excep
+        self.data = plan.apply(self.data)
+
+    def save(self, savename=None, compression=None, dtype=None):
+        """Saves the calibrated data as a fits file in savepath, by default
+        named after the file with _reduced appended. The headers of the file
+        are copied and the fingerprints of the masters are added, see
+        FitsWriter.write for compression and dtype, np.float32 halves the
+        size of float64 results. Returns the filename.
+        """
+        try:
+            assert isinstance(savename, str) or savename is None, "savename must be a string"
+        except AssertionError as excep:
+            raise self._error(excep) from excep
+        if savename is None:
+            savename = os.path.splitext(os.path.basename(self.filepath))[0] + "_reduced"
+        filename = OutputManager.reserve(self.savepath, savename, ".fits", self.filepath)
+        cards = FitsWriter.provenance(self._bias(self.masterpath), self._dark(self.masterpath),
+                                      self._flat(self.masterpath), self.filepath)
+        FitsWriter.write(self.data, filename, compression, dtype=dtype, cards=cards)
+        return filename
 
     def imshow(self, cmap="jet", log=False, title="Image of Data"):
         """Shows the calibrated data."""
@@ -112,8 +130,12 @@ class CCDReducer(object):
                 fig.suptitle(title + " " + i)
             fig.show()
 
-    def imsave(self, cmap="jet", log=False, title="Image of Data", savename="CCDPic", extension=".png"):
-        """Saves the calibrated data."""
+    def imsave(self, cmap="jet", log=False, title="Image of Data", savename="CCDPic", extension=".png",
+               renderer=None):
+        """Saves the calibrated data. The figures are drawn by renderer, a
+        Renderer.RenderPool, or in this thread if it is None. Returns the
+        filenames.
+        """
         try:
             assert isinstance(title, str), "title must be a string"
             assert isinstance(savename, str), "filename must be a string"
@@ -121,26 +143,27 @@ class CCDReducer(object):
         except AssertionError as excep:
             raise self._error(excep) from excep
 
+        tasks = []
         for i in range(len(self.data)):
-            fig = plt.figure(figsize=[15, 10.5])
-            ax = fig.add_subplot(111)
-            ax.set_title("Exposure Time =" + str(round(self.data.time()[i], 6)))
-            self._imshow(fig, ax, self.data.data()[i], cmap, log)
-            if i == 0:
-                fig.suptitle(title)
-            else:
-                fig.suptitle(title + " " + i)
-            fig.savefig(sf.find_free_filename(self.savepath, savename, extension))
-            plt.close(fig)
-
-    @staticmethod
-    def _imshow(fig, ax, data, cmap, log):
-        extent = [-0.5, (data.shape[1] - 0.5), (data.shape[0] - 0.5), -0.5]
+            options = self._imageoptions(self.data.data()[i])
+            options.update(data=np.asarray(self.data.data()[i]), cmap=cmap, log=log,
+                           title="Exposure Time =" + str(round(self.data.time()[i], 6)),
+                           suptitle=title if i == 0 else title + " " + str(i))
+            tasks.append(("image", options, Renderer.reserve(self.savepath, savename, extension, self.filepath)))
+        return Renderer.render(tasks) if renderer is None else renderer.render(tasks)
+
+    def _imageoptions(self, data):
+        """Returns the extent and labels of the image of data."""
+        return {"extent": [-0.5, (data.shape[1] - 0.5), (data.shape[0] - 0.5), -0.5], "xlabel": r"x position",
+                "ylabel": r"y position", "clabel": "Counts"}
+
+    def _imshow(self, fig, ax, data, cmap, log):
+        options = self._imageoptions(data)
         if log is False:
-            im = ax.imshow(data, extent=extent, cmap=cmap, aspect="equal")
+            im = ax.imshow(data, extent=options["extent"], cmap=cmap, aspect="equal")
         else:
-            im = ax.imshow(data, extent=extent, cmap=cmap, aspect="equal", norm=colors.LogNorm())
-        ax.set_xlabel(r"x position")
-        ax.set_ylabel(r"y position")
+            im = ax.imshow(data, extent=options["extent"], cmap=cmap, aspect="equal", norm=colors.LogNorm())
+        ax.set_xlabel(options["xlabel"])
+        ax.set_ylabel(options["ylabel"])
         cb = fig.colorbar(im, ax=ax)
-        cb.set_label("Counts")
+        cb.set_label(options["clabel"])
@@ -1,13 +1,31 @@
 from Data import Data
-from errors import CCDReductionObjectError
-
+import DataFile
+from Prefetcher import Prefetcher, decoded_size
+from Combiner import COMBINERS
+from MasterCache import get_cache
+from errors import CCDReductionObjectError, CombinerError
+from precision import get_policy, using_policy
+
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+import contextlib
 import numpy as np
 import pickle
+import os
 
 
 class CCDReductionObject(object):
     """Abstract class for the Bias, Dark and Flat classes."""
 
+    prefetch_depth = 2  # files read ahead on background threads, 0 reads them one by one
+    prefetch_memory = 2**30  # maximum bytes of the files read ahead, None is no limit
+    combine_memory = 2**29  # maximum bytes of frames held to create a master, None is no limit
+    combine_folder = None  # folder of the temporary files of larger sets, None is the system temp folder
+    combine_mode = "median"  # "median", "sigmaclip", "minmax" or "mean", see Combiner.py
+    # update() only reads the new and removed files with "mean", the other modes combine all files again
+    combine_options = {}  # options of the combiner, like {"sigma": 3.0, "iterations": 5} or {"nlow": 1, "nhigh": 1}
+    processes = None  # worker processes that load and prepare the files and combine the masters, None uses none
+
     def __init__(self, masterpath, filespath=None):
         """Initiates the class. Loads masterpath (where the master file will
         be saved and loaded from) and an optional filespath (where the
@@ -38,6 +56,162 @@ class CCDReductionObject(object):
         """Raises the CCDReducetionObjectError."""
         return CCDReductionObjectError(exception)
 
+    @staticmethod
+    def _index(folderpath):
+        """Returns the folder index of the files in folderpath, or None if
+        there is only a single file.
+        Overwrite this!
+        """
+        return None
+
+    def _preparation(self):
+        """Returns the function that appends the frames of a loaded file to
+        a combiner, function(data, combiner), and the calibration masters it
+        uses.
+        Overwrite this!
+        """
+        return lambda data, combiner: combiner.append(data.data()), []
+
+    def _pool(self):
+        """Returns a process pool with processes workers, or a context
+        giving None if processes is None.
+        """
+        if self.processes is None:
+            return contextlib.nullcontext()
+        try:
+            assert isinstance(self.processes, int) and self.processes > 0, \
+                "processes must be None or a positive integer"
+        except AssertionError as excep:
+            raise self._error(excep) from excep
+        return ProcessPoolExecutor(self.processes)
+
+    def _feed(self, function, combiner, pool, include=None, exclude=()):
+        """Adds the frames function makes of the files to combiner, like
+        _openallfiles. With a pool the files are loaded and prepared by its
+        workers, at most twice as many files as there are processes at once,
+        and added in the same order as without one. The workers only get the
+        class, the masterpath, the path of a file and the precision policy.
+        """
+        if pool is None:
+            return self._openallfiles(lambda data: function(data, combiner), include, exclude)
+        entries = self._entries(include, exclude)
+        if entries is None:
+            combiner.append(pool.submit(_prepare, type(self), self.masterpath, self.filespath, get_policy()).result())
+            return {self.filespath: [None, None]}
+        pending = deque()
+        for i in entries:
+            pending.append(pool.submit(_prepare, type(self), self.masterpath, i["path"], get_policy()))
+            if len(pending) >= 2 * self.processes:
+                combiner.append(pending.popleft().result())
+        while len(pending) > 0:
+            combiner.append(pending.popleft().result())
+        return {i["name"]: [i["size"], i["mtime"]] for i in entries}
+
+    def _combiner(self):
+        """Returns the combiner the frames of the files are added to."""
+        if self.combine_mode not in COMBINERS:
+            raise self._error("combine_mode must be one of " + ", ".join(sorted(COMBINERS)))
+        try:
+            return COMBINERS[self.combine_mode](self.combine_memory, self.combine_folder, **self.combine_options)
+        except CombinerError as excep:
+            raise self._error(excep) from excep
+
+    def _combine(self, filename, bad=()):
+        """Opens all files except the bad ones, adds the frames the function
+        of _preparation makes of every file to the combiner and returns the
+        combined master arrays and the information to store with the master:
+        the mode, the source files, the bad files and the fingerprints of the
+        calibration masters used by the function. If the combiner rejects values, the number
+        of rejected values of every pixel is saved as filename + "_rejected".
+        If it is incremental its running sums are saved as filename +
+        "_state". Old files which do not belong to the new master are
+        removed.
+        """
+        function, calibration = self._preparation()
+        with self._combiner() as combiner, self._pool() as pool:
+            sources = self._feed(function, combiner, pool, exclude=bad)
+            if len(combiner) == 0:
+                raise self._error("there are no files to create a master from")
+            try:
+                masters = combiner.combine(pool)
+            except CombinerError as excep:
+                raise self._error(excep) from excep
+            info = self._info(sources, bad, calibration)
+            self._save_extra(combiner.rejected, filename + "_rejected")
+            self._save_extra(combiner.state() if combiner.incremental else None, filename + "_state", info)
+            return masters, info
+
+    def _update(self, filename, bad=()):
+        """Updates the master filename: files which are new in the folder are
+        added and files which are gone, changed or bad are removed. With an
+        incremental combine_mode only these files are opened. Otherwise, or
+        if the master was made differently or with other calibration
+        masters, the master is created again from all files. Returns the
+        same as _combine. Only copies of the old master and state are kept,
+        so their files are not mapped when they are replaced.
+        """
+        master = CCDReductionObject.load(self, filename)
+        old = master.rest() if master is not None and isinstance(master.rest(), dict) else {}
+        master = None
+        bad = sorted(set(old.get("bad", [])) | set(bad))
+        function, calibration = self._preparation()
+        state = CCDReductionObject.load(self, filename + "_state")
+        rest = state.rest() if state is not None and isinstance(state.rest(), dict) else {}
+        arrays = [] if state is None else [np.array(i) for i in state.data()]
+        state = None
+        self._release(filename)
+        self._release(filename + "_state")
+        index = self._index(self.filespath)
+        if index is None or len(rest) == 0 or rest.get("mode") != self.combine_mode or \
+                rest.get("calibration") != self._fingerprints(calibration):
+            return self._combine(filename, bad)
+
+        current = {i["name"]: [i["size"], i["mtime"]] for i in index.entries()}
+        sources = rest["sources"]
+        removed = [i for i in sources if i in bad or i not in current]
+        added = [i for i in current if i not in sources and i not in bad]
+        if any(i not in current or current[i] != sources[i] for i in removed) or \
+                any(current[i] != sources[i] for i in sources if i in current):
+            return self._combine(filename, bad)
+
+        try:
+            combiner = COMBINERS[self.combine_mode].from_state(arrays, len(sources), self.combine_memory,
+                                                               self.combine_folder)
+            with combiner, self._pool() as pool:
+                if len(removed) > 0:
+                    self._feed(function, _Remover(combiner), pool, include=removed)
+                if len(added) > 0:
+                    self._feed(function, combiner, pool, include=added)
+                if len(combiner) == 0:
+                    raise self._error("there are no files left in the master")
+                kept = {i: sources[i] for i in sources if i not in removed}
+                kept.update({i: current[i] for i in added})
+                info = self._info(kept, bad, calibration)
+                self._save_extra(combiner.state(), filename + "_state", info)
+                return combiner.combine(), info
+        except CombinerError as excep:
+            raise self._error(excep) from excep
+
+    def _info(self, sources, bad, calibration):
+        """Returns the information stored with a master."""
+        return {"mode": self.combine_mode, "sources": sources, "bad": sorted(bad),
+                "calibration": self._fingerprints(calibration)}
+
+    @staticmethod
+    def _fingerprints(calibration):
+        """Returns the fingerprints of the calibration masters."""
+        return [None if i is None else i.fingerprint() for i in calibration]
+
+    def _save_extra(self, arrays, filename, rest=None):
+        """Saves arrays as filename next to the master, or removes filename
+        if arrays is None.
+        """
+        if arrays is not None:
+            self._save_object(Data(arrays, [0] * len(arrays), [None] * len(arrays), rest), filename)
+        elif os.path.exists(self.masterpath + filename + DataFile.EXTENSION):
+            self._release(filename)
+            os.remove(self.masterpath + filename + DataFile.EXTENSION)
+
     @staticmethod
     def _check_lengths(list_of_lists):
         lengths = []
@@ -49,26 +223,80 @@ class CCDReductionObject(object):
         """This function will be overwritten!"""
         pass
 
+    def update(self, bad=()):
+        """This function will be overwritten!"""
+        pass
+
     def load(self, filename):
-        """Loads the master file."""
+        """Loads the master file. The data is memory mapped from the binary
+        DataFile, master files pickled by older versions (.pcl) are read if
+        there is no DataFile. Masters are taken from the process-wide
+        MasterCache if they did not change since they were loaded, so the
+        returned Data object is shared and must not be changed in place.
+        """
         try:
-            with open(self.masterpath + filename + ".pcl", "rb") as f:
-                obj = pickle.load(f)
-            return obj
+            if os.path.exists(self.masterpath + filename + DataFile.EXTENSION):
+                return get_cache().get(self.masterpath + filename + DataFile.EXTENSION, DataFile.load)
+            return get_cache().get(self.masterpath + filename + ".pcl", self._unpickle)
         except FileNotFoundError:
             return None
 
+    @staticmethod
+    def _unpickle(filename):
+        with open(filename, "rb") as f:
+            obj = pickle.load(f)
+        return obj
+
     def _save_object(self, obj, filename):
-        """Saves the master file"""
-        with open(self.masterpath + filename + ".pcl", "wb") as f:
-            pickle.dump(obj, f)
+        """Saves the master file as a DataFile. The cached old file is
+        released first.
+        """
+        self._release(filename)
+        DataFile.save(obj, self.masterpath + filename + DataFile.EXTENSION)
 
-    def _openallfiles(self, function):
-        """Loops through all files and execute a function.
-        Overwrite this function!
+    def _release(self, filename):
+        """Drops the master file from the MasterCache, which closes its
+        memory map unless the loaded Data object is still used elsewhere.
+        Windows cannot replace or remove a file which is mapped.
         """
-        data = self._loadfile(self.filespath)
-        function(data)
+        get_cache().invalidate(self.masterpath + filename + DataFile.EXTENSION)
+
+    def _openallfiles(self, function, include=None, exclude=()):
+        """Loops through all files and execute a function. The files are
+        taken from the index of the folder, which is also used to check that
+        all files have the same build before any is loaded. The next
+        prefetch_depth files are read on background threads while function
+        runs. Without an index filespath is loaded as a single file.
+        If include is given only those file names are used, file names in
+        exclude are skipped. Returns a dictionary with the size and mtime of
+        every used file.
+        """
+        entries = self._entries(include, exclude)
+        if entries is None:
+            data = self._loadfile(self.filespath)
+            function(data)
+            return {self.filespath: [None, None]}
+        sizes = [decoded_size(i, get_policy().raw) for i in entries]
+        for data in Prefetcher([i["path"] for i in entries], self._loadfile, self.prefetch_depth,
+                               self.prefetch_memory, sizes):
+            function(data)
+        return {i["name"]: [i["size"], i["mtime"]] for i in entries}
+
+    def _entries(self, include=None, exclude=()):
+        """Returns the index entries of the files to use, after checking
+        that they all have the same build, or None if there is no index.
+        """
+        index = self._index(self.filespath)
+        if index is None:
+            return None
+        entries = [i for i in index.entries() if (include is None or i["name"] in include) and
+                   i["name"] not in exclude]
+        try:
+            if len(entries) > 0:
+                self._check_lengths([i["shapes"] for i in entries])
+        except AssertionError as excep:
+            raise self._error(excep) from excep
+        return entries
 
 
 class CCDBias(CCDReductionObject):
@@ -76,17 +304,24 @@ class CCDBias(CCDReductionObject):
 
     def create(self):
         """Creates the master_bias file from a bias dataset."""
+        self._master(*self._combine("master_bias"))
+
+    def update(self, bad=()):
+        """Updates the master_bias file with the new files of the bias
+        dataset and removes the files which are gone or named in bad.
+        """
+        self._master(*self._update("master_bias", bad))
+
+    def _preparation(self):
+        return self._createbias, []
+
+    def _master(self, combined, info):
+        """Saves the combined arrays as master_bias."""
         masterbias = []
-        bias = []
-        self._openallfiles(lambda data: self._createbias(data, bias))
-        self._check_lengths(bias)
-        for i in range(len(bias[0])):
-            _bias = []
-            for j in range(len(bias)):
-                _bias.append(bias[j][i])
-            masterbias.append(np.median(_bias, axis=0))
-
-        bias = Data(masterbias, [0] * len(masterbias), [None] * len(masterbias))
+        for i in combined:
+            masterbias.append(i.astype(get_policy().calibrated, copy=False))
+
+        bias = Data(masterbias, [0] * len(masterbias), [None] * len(masterbias), info)
         self._save_object(bias, "master_bias")
 
     @staticmethod
@@ -103,24 +338,37 @@ class CCDBias(CCDReductionObject):
         """Loads the master_bias file."""
         return super(CCDBias, self).load("master_bias")
 
+    def load_rejected(self):
+        """Loads the number of rejected values of every pixel of the
+        master_bias, None if nothing was rejected.
+        """
+        return super(CCDBias, self).load("master_bias_rejected")
+
 
 class CCDDark(CCDReductionObject):
     """The Dark class can create and load master_dark files."""
 
     def create(self):
         """Creates the master_dark file from a dark dataset."""
-        masterdark = []
-        dark = []
+        self._master(*self._combine("master_dark"))
+
+    def update(self, bad=()):
+        """Updates the master_dark file with the new files of the dark
+        dataset and removes the files which are gone or named in bad.
+        """
+        self._master(*self._update("master_dark", bad))
+
+    def _preparation(self):
         bias = CCDBias(self.masterpath).load()
-        self._openallfiles(lambda data: self._createdark(data, bias, dark))
-        self._check_lengths(dark)
-        for i in range(len(dark[0])):
-            _dark = []
-            for j in range(len(dark)):
-                _dark.append(dark[j][i])
-            masterdark.append(np.median(_dark, axis=0))
-
-        dark = Data(masterdark, [1] * len(masterdark), [None] * len(masterdark))
+        return lambda data, dark: self._createdark(data, bias, dark), [bias]
+
+    def _master(self, combined, info):
+        """Saves the combined arrays as master_dark."""
+        masterdark = []
+        for i in combined:
+            masterdark.append(i.astype(get_policy().calibrated, copy=False))
+
+        dark = Data(masterdark, [1] * len(masterdark), [None] * len(masterdark), info)
         self._save_object(dark, "master_dark")
 
     @staticmethod
@@ -132,37 +380,52 @@ class CCDDark(CCDReductionObject):
     def _createdark(data, bias, dark):
         """The function that is executed on each individual bias file data."""
 
+        calibrated = get_policy().calibrated
         if bias is None:
-            bias = Data([np.zeros(i) for i in data.shape], [0] * len(data), [None] * len(data))
+            bias = Data([np.zeros(i, calibrated) for i in data.shape], [0] * len(data), [None] * len(data))
+        bias = bias.astype(calibrated)
 
-        _dark = (data - bias) / data.time()
+        _dark = data - bias
+        _dark /= data.time()
         dark.append(_dark.data())
 
     def load(self):
         """Loads the master_dark file."""
         return super(CCDDark, self).load("master_dark")
 
+    def load_rejected(self):
+        """Loads the number of rejected values of every pixel of the
+        master_dark, None if nothing was rejected.
+        """
+        return super(CCDDark, self).load("master_dark_rejected")
+
 
 class CCDFlat(CCDReductionObject):
     """The Flat class can create and load master_flat files."""
 
     def create(self):
         """Creates the master_flat file from a flat dataset."""
+        self._master(*self._combine("master_flat"))
 
-        masterflat = []
-        flat = []
+    def update(self, bad=()):
+        """Updates the master_flat file with the new files of the flat
+        dataset and removes the files which are gone or named in bad.
+        """
+        self._master(*self._update("master_flat", bad))
+
+    def _preparation(self):
         bias = CCDBias(self.masterpath).load()
         dark = CCDDark(self.masterpath).load()
-        self._openallfiles(lambda data: self._createflat(data, bias, dark, flat))
-        self._check_lengths(flat)
-        for i in range(len(flat[0])):
-            _flat = []
-            for j in range(len(dark)):
-                _flat.append(flat[j][i])
-            _flat = np.median(_flat, axis=0)
-            masterflat.append(_flat / np.mean(_flat))
-
-        flat = Data(masterflat, [1] * len(masterflat), [None] * len(masterflat))
+        return lambda data, flat: self._createflat(data, bias, dark, flat), [bias, dark]
+
+    def _master(self, combined, info):
+        """Normalises the combined arrays and saves them as master_flat."""
+        masterflat = []
+        for _flat in combined:
+            _flat = _flat / np.mean(_flat, dtype=get_policy().accumulate)
+            masterflat.append(_flat.astype(get_policy().calibrated, copy=False))
+
+        flat = Data(masterflat, [1] * len(masterflat), [None] * len(masterflat), info)
         self._save_object(flat, "master_flat")
 
     @staticmethod
@@ -174,15 +437,44 @@ class CCDFlat(CCDReductionObject):
     def _createflat(data, bias, dark, flat):
         """The function that is executed on each individual bias file data."""
 
+        calibrated = get_policy().calibrated
         if bias is None:
-            bias = Data([np.zeros(i) for i in data.shape], [0] * len(data), [None] * len(data))
+            bias = Data([np.zeros(i, calibrated) for i in data.shape], [0] * len(data), [None] * len(data))
         if dark is None:
-            dark = Data([np.zeros(i) for i in data.shape], [1] * len(data), [None] * len(data))
+            dark = Data([np.zeros(i, calibrated) for i in data.shape], [1] * len(data), [None] * len(data))
 
-        raw = (data - bias) - dark
+        raw = (data.lazy() - bias.astype(calibrated) - dark.astype(calibrated)).evaluate()
         raw /= raw.moment(1)
         flat.append(raw.data())
 
     def load(self):
         """Loads the master_flat file."""
         return super(CCDFlat, self).load("master_flat")
+
+    def load_rejected(self):
+        """Loads the number of rejected values of every pixel of the
+        master_flat, None if nothing was rejected.
+        """
+        return super(CCDFlat, self).load("master_flat_rejected")
+
+
+def _prepare(cls, masterpath, path, policy):
+    """Loads path with the reduction object class cls and returns the frames
+    its preparation function appends, with the precision policy policy. Runs
+    on the workers of a process pool, the calibration masters in masterpath
+    come from the MasterCache of the worker.
+    """
+    with using_policy(policy):
+        obj = cls(masterpath)
+        prepared = []
+        obj._preparation()[0](obj._loadfile(path), prepared)
+    return prepared[0]
+
+
+class _Remover(object):
+    """Passed to the create functions instead of a combiner, to remove the
+    frames they append from the combiner.
+    """
+
+    def __init__(self, combiner):
+        self.append = combiner.remove
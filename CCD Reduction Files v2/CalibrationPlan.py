@@ -0,0 +1,151 @@
+"""Precomputed calibration of the frames of a file.
+
+Reducing a frame is (raw - bias - dark * t) / flat, with the dark clipped
+at 0 and t the exposure time of the frame divided by that of the dark. A
+CalibrationPlan does everything that does not depend on the raw frame
+once: it stores
+        offset = bias + clip(dark) * t
+        gain = 1 / flat
+so reducing a frame is a single pass of (raw - offset) * gain over blocks of
+rows that fit in the cpu cache. Missing masters are left out instead of
+being replaced by frames of zeros and ones.
+
+get_plan keeps the plans of the last maxplans combinations of masters,
+window and exposure times, so a folder of files with a few different
+exposure times only makes a few plans. The result differs from the
+unplanned calculation only by rounding, less than 1e-15 relative in float64.
+"""
+from Data import Data
+from errors import CalibrationPlanError
+from precision import get_policy
+
+from collections import OrderedDict
+import numpy as np
+import threading
+
+maxplans = 16
+blocksize = 2**18  # bytes per row block of a frame
+_plans = OrderedDict()
+_lock = threading.Lock()
+
+
+class CalibrationPlan(object):
+    """The offset and gain of every frame of a file."""
+
+    def __init__(self, bias, dark, flat, time, shapes, dtype):
+        """bias, dark and flat are the masters (Data objects with the same
+        shapes as the frames) or None, time the exposure times and shapes
+        the shapes of the frames. The plan reduces frames to dtype.
+        """
+        try:
+            for master in (bias, dark, flat):
+                assert master is None or len(master) == len(time), "The masters must have as many frames as the file."
+                assert master is None or tuple(master.shape) == tuple(shapes), \
+                    "The masters must have the same shapes as the frames."
+        except AssertionError as excep:
+            raise CalibrationPlanError(excep) from excep
+        accumulate = get_policy().accumulate
+        self.dtype = np.dtype(dtype)
+        self.offset = []
+        self.gain = []
+        self.time = []
+        for i in range(len(time)):
+            offset = None
+            if bias is not None:
+                offset = bias.data()[i] * self._scale(time[i], bias.time()[i], accumulate)
+            if dark is not None:
+                clipped = np.maximum(dark.data()[i], 0) * self._scale(time[i], dark.time()[i], accumulate)
+                offset = clipped if offset is None else np.add(offset, clipped, dtype=accumulate)
+            self.offset.append(None if offset is None else np.asarray(offset, self.dtype))
+            if flat is None:
+                self.gain.append(None)
+                self.time.append(time[i] / 1)  # like dividing by a flat of ones with time 1
+            else:
+                with np.errstate(divide="ignore"):
+                    self.gain.append(np.true_divide(1, flat.data()[i], dtype=accumulate).astype(self.dtype))
+                self.time.append(time[i] / flat.time()[i])
+
+    @staticmethod
+    def _scale(time, master_time, dtype):
+        """Returns the factor a master is rescaled with, like Data.__sub__."""
+        if master_time == 0:
+            return dtype.type(1)
+        return dtype.type(time) / dtype.type(master_time)
+
+    def apply(self, data):
+        """Returns the reduced Data object of the raw Data object data."""
+        stack = data.stack()
+        if stack is not None and len(data) > 0:
+            out = np.empty(stack.shape, self.dtype)
+            for i in range(len(data)):
+                self._reduce(stack[i], self.offset[i], self.gain[i], out[i])
+            return Data(out, self.time, data.id(), data.rest())
+        frames = []
+        for i, raw in enumerate(data.data()):
+            frames.append(self._reduce(raw, self.offset[i], self.gain[i], np.empty(raw.shape, self.dtype)))
+        return Data(frames, self.time, data.id(), data.rest())
+
+    def apply_many(self, datas):
+        """Returns the reduced Data objects of a list of raw Data objects,
+        which all have the frames this plan was made for. They are reduced
+        into a single (n_files, n_frames, ...) array, every Data object is a
+        view into it. The files and frames are still reduced one by one in a
+        Python loop, block by block like apply, not in one vectorised pass
+        over the whole array; only the output is allocated once.
+        """
+        stacks = [i.stack() for i in datas]
+        if len(datas) < 2 or any(i is None for i in stacks):
+            return [self.apply(i) for i in datas]
+        out = np.empty((len(datas), ) + stacks[0].shape, self.dtype)
+        for stack, reduced in zip(stacks, out):
+            for i in range(len(self.offset)):
+                self._reduce(stack[i], self.offset[i], self.gain[i], reduced[i])
+        return [Data(out[j], self.time, data.id(), data.rest()) for j, data in enumerate(datas)]
+
+    def _reduce(self, raw, offset, gain, out):
+        """Writes (raw - offset) * gain into out, block by block."""
+        if raw.ndim < 2:
+            rows = max(len(raw), 1)
+        else:
+            rows = max(1, blocksize // max(1, int(np.prod(raw.shape[1:])) * self.dtype.itemsize))
+        for start in range(0, max(len(raw), 1), rows):
+            block = slice(start, start + rows)
+            if offset is None:
+                out[block] = raw[block]
+            else:
+                np.subtract(raw[block], offset[block], out=out[block], casting="unsafe")
+            if gain is not None:
+                np.multiply(out[block], gain[block], out=out[block])
+        return out
+
+
+def get_plan(bias, dark, flat, time, shapes, dtype=None, window=None):
+    """Returns the plan of the masters, exposure times and shapes, reusing
+    a plan made before if there is one. The full masters are given, window
+    is the sub-window of them that is used. dtype is the dtype of the
+    reduced frames, by default the calibrated dtype of the precision policy.
+    """
+    if dtype is None:
+        dtype = get_policy().calibrated
+    dtype = np.dtype(dtype)
+    masters = (bias, dark, flat)
+    key = (tuple(None if i is None else i.fingerprint() for i in masters),
+           None if window is None else tuple((i.start, i.stop, i.step) for i in window),
+           tuple(time), tuple(tuple(i) for i in shapes), dtype.str, get_policy().accumulate.str)
+    with _lock:
+        if key in _plans:
+            _plans.move_to_end(key)
+            return _plans[key]
+    windowed = [None if i is None else i.window(window) for i in masters]
+    plan = CalibrationPlan(windowed[0], windowed[1], windowed[2], time, shapes, dtype)
+    with _lock:
+        _plans[key] = plan
+        while len(_plans) > maxplans:
+            _plans.popitem(last=False)
+    return plan
+
+
+def clear_plans():
+    """Drops all plans."""
+    with _lock:
+        _plans.clear()
@@ -0,0 +1,424 @@
+"""Combines the frames of many calibration files into master frames.
+
+A combiner is filled with append(frames), once for every file, frames
+being the data-arrays of that file. combine() returns one master array for
+every data-array of a file. As long as the appended frames fit in the
+memory budget they are kept in memory, after that all of them are spilled
+to temporary files and the masters are calculated in blocks of rows that
+fit in the budget, so the memory use does not grow with the number of
+files. The masters are exactly the same either way.
+combine(pool) combines the blocks of rows on the workers of pool, a
+concurrent.futures executor, instead. The frames are spilled to temporary
+files first, which the workers map, so only the blocks and results are sent
+between the processes. Every pixel is combined exactly as without a pool.
+
+MedianCombiner:
+        The per-pixel median.
+ClippedMeanCombiner:
+        The per-pixel mean after iteratively rejecting values more than
+        sigma standard deviations from the mean. Every iteration streams
+        the frames once and only keeps running sums, so besides the frames
+        it needs memory for a few frames.
+MinMaxCombiner:
+        The per-pixel mean after rejecting the nlow lowest and nhigh highest
+        values. The frames are not kept at all, append keeps running sums
+        and the nlow lowest and nhigh highest values.
+MeanCombiner:
+        The per-pixel mean. Only running sums are kept, which can be saved
+        with state() and restored with from_state(), so frames can be added
+        and removed later without the other frames.
+After combine() the rejecting combiners hold the number of rejected values
+of every pixel in rejected, a list with an array for every master.
+Combiners with incremental True can be updated with new frames.
+"""
+from errors import CombinerError
+from precision import get_policy, using_policy
+
+import numpy as np
+import tempfile
+import os
+
+poolblocks = 8  # minimum number of blocks of rows a pool combines a master in
+
+
+class MedianCombiner(object):
+    """Combines frames with the per-pixel median, like np.median(frames,
+    axis=0).
+    """
+
+    rejected = None
+    incremental = False
+
+    def __init__(self, memory=None, folder=None):
+        """memory is the budget in bytes, None is no limit. folder is where
+        the temporary files are made, by default the temp folder of the
+        system.
+        """
+        if not (memory is None or (isinstance(memory, (int, float)) and memory > 0)):
+            raise CombinerError("memory must be None or a positive number")
+        self.memory = memory
+        self.folder = folder
+        self.count = 0
+        self._frames = None
+        self._spills = None
+        self._held = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def __getstate__(self):
+        """Pickles the settings but not the frames, for the workers of a
+        pool.
+        """
+        state = dict(self.__dict__)
+        state.update(_frames=None, _spills=None, _held=0)
+        return state
+
+    def append(self, frames):
+        """Adds the data-arrays of a single file."""
+        frames = self._check(frames)
+
+        if self._spills is not None:
+            for spill, frame in zip(self._spills, frames):
+                spill.append(frame)
+            return
+        for held, frame in zip(self._frames, frames):
+            held.append(frame)
+        self._held += sum(i.nbytes for i in frames)
+        if self.memory is not None and self._held > self.memory:
+            self._spill()
+
+    def _check(self, frames):
+        """Checks that frames are built like the frames of the other files
+        and counts them.
+        """
+        frames = tuple(np.asarray(i) for i in frames)
+        if self._frames is None:
+            self._frames = [[] for i in frames]
+        if len(frames) != len(self._frames) or \
+                any(self.count > 0 and frame.shape != self._shape(i) for i, frame in enumerate(frames)):
+            raise CombinerError("not all files have the same build.")
+        self.count += 1
+        return frames
+
+    def _shape(self, i):
+        if self._spills is not None:
+            return self._spills[i].shape
+        return self._frames[i][0].shape
+
+    def _spill(self):
+        """Moves the frames held in memory to temporary files."""
+        self._spills = []
+        for held in self._frames:
+            spill = _Spill(np.result_type(*held), held[0].shape, self.folder)
+            for frame in held:
+                spill.append(frame)
+            self._spills.append(spill)
+        self._frames = [[] for i in self._frames]
+        self._held = 0
+
+    def combine(self, pool=None):
+        """Returns a list with the master array of every data-array. If pool
+        is given the blocks of rows are combined by its workers.
+        """
+        if self.count == 0:
+            raise CombinerError("there are no frames to combine.")
+        if pool is not None and self._spills is None:
+            self._spill()
+        results = []
+        for i in range(len(self._frames)):
+            if self._spills is None:
+                results.append(self._reduce(self._frames[i]))
+            else:
+                results.append(self._blocks(self._spills[i], pool))
+        if any(i[1] is not None for i in results):
+            self.rejected = [i[1] for i in results]
+        return [i[0] for i in results]
+
+    def _blocks(self, spill, pool):
+        """Combines the frames of spill in blocks of rows, returns the same
+        as _reduce. Every block fits in the memory budget.
+        """
+        stack = spill.map()
+        if stack.ndim < 2:
+            return self._reduce(stack)
+        row = stack[:, :1].nbytes
+        rows = stack.shape[1] if self.memory is None else max(1, int(self.memory // (3 * row)))
+        starts = range(0, stack.shape[1], rows)
+        if pool is None:
+            blocks = (self._reduce(stack[:, start:start + rows]) for start in starts)
+        else:
+            rows = max(1, min(rows, -(-stack.shape[1] // poolblocks)))
+            starts = range(0, stack.shape[1], rows)
+            blocks = [pool.submit(_reduce_rows, self, spill.name, spill.dtype.str, stack.shape, start, start + rows,
+                                  get_policy()) for start in starts]
+            blocks = (i.result() for i in blocks)
+        master = rejected = None
+        for start, (block, counts) in zip(starts, blocks):
+            if master is None:
+                master = np.empty(stack.shape[1:], block.dtype)
+                if counts is not None:
+                    rejected = np.empty(stack.shape[1:], counts.dtype)
+            master[start:start + rows] = block
+            if counts is not None:
+                rejected[start:start + rows] = counts
+        del stack
+        return master, rejected
+
+    def _reduce(self, frames):
+        """Combines the frames of all files, a list or an (n_files, ...)
+        stack. Returns the master and the number of rejected values of every
+        pixel, or None.
+        """
+        return np.median(np.asarray(frames), axis=0), None
+
+    def close(self):
+        """Removes the temporary files."""
+        if self._spills is not None:
+            for i in self._spills:
+                i.close()
+        self._spills = None
+        self._frames = None
+
+
+def _reduce_rows(combiner, name, dtype, shape, start, stop, policy):
+    """Combines the rows start to stop of the spill file name with
+    combiner and the precision policy policy. Runs on the workers of a pool.
+    """
+    stack = np.memmap(name, dtype, "r", 0, shape)
+    with using_policy(policy):
+        result = combiner._reduce(stack[:, start:stop])
+    del stack
+    return result
+
+
+class _Spill(object):
+    """A temporary file frames of the same shape are appended to. The file
+    has a name, so the workers of a pool can map it too.
+    """
+
+    def __init__(self, dtype, shape, folder):
+        self.dtype = np.dtype(dtype)
+        self.shape = shape
+        self.count = 0
+        handle, self.name = tempfile.mkstemp(".spill", dir=folder)
+        self.file = os.fdopen(handle, "w+b")
+
+    def append(self, frame):
+        np.ascontiguousarray(frame, self.dtype).tofile(self.file)
+        self.count += 1
+
+    def map(self):
+        """Returns the appended frames as a (n_frames, ...) memory map."""
+        self.file.flush()
+        return np.memmap(self.file, self.dtype, "r", 0, (self.count, ) + tuple(self.shape))
+
+    def close(self):
+        self.file.close()
+        try:
+            os.remove(self.name)
+        except OSError:
+            pass
+
+
+class ClippedMeanCombiner(MedianCombiner):
+    """Combines frames with the per-pixel sigma clipped mean."""
+
+    def __init__(self, memory=None, folder=None, sigma=3.0, iterations=5):
+        """sigma is the number of standard deviations a value may be away
+        from the mean, iterations the maximum number of times the values are
+        clipped. Clipping stops earlier when no more values are rejected.
+        """
+        super(ClippedMeanCombiner, self).__init__(memory, folder)
+        if not (isinstance(sigma, (int, float)) and sigma > 0):
+            raise CombinerError("sigma must be a positive number")
+        if not (isinstance(iterations, int) and iterations >= 0):
+            raise CombinerError("iterations must be a positive integer")
+        self.sigma = sigma
+        self.iterations = iterations
+
+    def _reduce(self, frames):
+        """Returns the clipped mean of the frames and the number of
+        rejected values. Every iteration loops over the frames once.
+        """
+        accumulate = get_policy().accumulate
+        reference = None
+        mean = std = count = None
+        for iteration in range(self.iterations + 1):
+            total = squares = used = None
+            for frame in frames:
+                if reference is None:
+                    reference = frame.astype(accumulate)
+                deviation = np.subtract(frame, reference, dtype=accumulate)
+                if mean is None:
+                    keep = None
+                else:
+                    keep = np.abs(deviation - mean) <= self.sigma * std
+                    deviation[~keep] = 0
+                if total is None:
+                    total = np.zeros_like(deviation)
+                    squares = np.zeros_like(deviation)
+                    used = np.zeros(deviation.shape, np.int64)
+                total += deviation
+                squares += deviation * deviation
+                used += 1 if keep is None else keep
+
+            if count is not None and np.array_equal(used, count):
+                break
+            with np.errstate(invalid="ignore", divide="ignore"):
+                new_mean = total / used
+                variance = squares / used - new_mean * new_mean
+            empty = used == 0
+            if mean is not None:
+                new_mean[empty] = mean[empty]
+            else:
+                new_mean[empty] = 0
+            mean = new_mean
+            std = np.sqrt(np.maximum(np.nan_to_num(variance), 0))
+            count = used
+        return reference + mean, (len(frames) - count).astype(np.min_scalar_type(len(frames)))
+
+
+class MinMaxCombiner(MedianCombiner):
+    """Combines frames with the per-pixel mean after rejecting the nlow
+    lowest and nhigh highest values.
+    """
+
+    def __init__(self, memory=None, folder=None, nlow=1, nhigh=1):
+        super(MinMaxCombiner, self).__init__(memory, folder)
+        if not (isinstance(nlow, int) and nlow >= 0):
+            raise CombinerError("nlow must be a positive integer or 0")
+        if not (isinstance(nhigh, int) and nhigh >= 0):
+            raise CombinerError("nhigh must be a positive integer or 0")
+        self.nlow = nlow
+        self.nhigh = nhigh
+        self._sums = None
+
+    def append(self, frames):
+        """Adds the data-arrays of a single file to the running sums and the
+        lowest and highest values. The frames are not kept.
+        """
+        frames = self._check(frames)
+        accumulate = get_policy().accumulate
+        if self._sums is None:
+            self._sums = [np.zeros(i.shape, accumulate) for i in frames]
+            self._lows = [np.full((self.nlow, ) + i.shape, np.inf, accumulate) for i in frames]
+            self._highs = [np.full((self.nhigh, ) + i.shape, -np.inf, accumulate) for i in frames]
+            self._shapes = [i.shape for i in frames]
+        for frame, total, lows, highs in zip(frames, self._sums, self._lows, self._highs):
+            frame = frame.astype(accumulate)
+            total += frame
+            self._insert(lows, frame, np.minimum, np.maximum)
+            self._insert(highs, frame, np.maximum, np.minimum)
+
+    @staticmethod
+    def _insert(extremes, frame, better, worse):
+        """Inserts frame in the sorted extremes, dropping the worst."""
+        carry = frame
+        for i in range(len(extremes)):
+            kept = better(extremes[i], carry)
+            carry = worse(extremes[i], carry)
+            extremes[i] = kept
+
+    def _shape(self, i):
+        return self._shapes[i]
+
+    def combine(self, pool=None):
+        if self.count <= self.nlow + self.nhigh:
+            raise CombinerError("there must be more frames than nlow + nhigh.")
+        masters = []
+        self.rejected = []
+        for total, lows, highs in zip(self._sums, self._lows, self._highs):
+            kept = total - lows.sum(axis=0) - highs.sum(axis=0)
+            masters.append(kept / (self.count - self.nlow - self.nhigh))
+            self.rejected.append(np.full(total.shape, self.nlow + self.nhigh, np.min_scalar_type(self.count)))
+        return masters
+
+
+class MeanCombiner(MedianCombiner):
+    """Combines frames with the per-pixel mean, kept as running sums."""
+
+    incremental = True
+
+    def __init__(self, memory=None, folder=None):
+        super(MeanCombiner, self).__init__(memory, folder)
+        self._sums = None
+
+    def append(self, frames):
+        """Adds the data-arrays of a single file to the running sums. The
+        frames are not kept.
+        """
+        frames = self._check(frames)
+        accumulate = get_policy().accumulate
+        if self._sums is None:
+            self._sums = [[i.astype(accumulate), np.zeros(i.shape, accumulate), np.zeros(i.shape, accumulate)]
+                          for i in frames]
+        for frame, (reference, total, squares) in zip(frames, self._sums):
+            deviation = np.subtract(frame, reference, dtype=accumulate)
+            total += deviation
+            squares += deviation * deviation
+
+    def remove(self, frames):
+        """Removes the data-arrays of a single file which was added before
+        from the running sums.
+        """
+        frames = tuple(np.asarray(i) for i in frames)
+        if self.count == 0:
+            raise CombinerError("there are no frames to remove.")
+        if len(frames) != len(self._sums) or any(i.shape != j[0].shape for i, j in zip(frames, self._sums)):
+            raise CombinerError("not all files have the same build.")
+        for frame, (reference, total, squares) in zip(frames, self._sums):
+            deviation = np.subtract(frame, reference, dtype=reference.dtype)
+            total -= deviation
+            squares -= deviation * deviation
+        self.count -= 1
+
+    def _shape(self, i):
+        return self._sums[i][0].shape
+
+    def combine(self, pool=None):
+        if self.count == 0:
+            raise CombinerError("there are no frames to combine.")
+        return [reference + total / self.count for reference, total, squares in self._sums]
+
+    def std(self):
+        """Returns the per-pixel standard deviation of the frames, for every
+        data-array.
+        """
+        if self.count == 0:
+            raise CombinerError("there are no frames to combine.")
+        stds = []
+        for reference, total, squares in self._sums:
+            mean = total / self.count
+            stds.append(np.sqrt(np.maximum(squares / self.count - mean * mean, 0)))
+        return stds
+
+    def state(self):
+        """Returns the running sums as a list of arrays, three for every
+        data-array.
+        """
+        return [i for sums in self._sums for i in sums]
+
+    @classmethod
+    def from_state(cls, state, count, memory=None, folder=None):
+        """Returns a MeanCombiner with the running sums state of count
+        files, as returned by state().
+        """
+        combiner = cls(memory, folder)
+        if count > 0:
+            accumulate = get_policy().accumulate
+            state = [np.array(i, accumulate) for i in state]
+            combiner._sums = [state[i:i + 3] for i in range(0, len(state), 3)]
+            combiner._frames = [[] for i in combiner._sums]
+            combiner.count = count
+        return combiner
+
+
+COMBINERS = {"median": MedianCombiner, "sigmaclip": ClippedMeanCombiner, "minmax": MinMaxCombiner,
+             "mean": MeanCombiner}
@@ -1,4 +1,11 @@
 import numpy as np
+import threading
+import hashlib
+import weakref
+import mmap
+
+_versions = {}  # id of an array owning memory -> [weak reference to it, number of writes through Data]
+_versions_lock = threading.Lock()
 
 
 class DataError(Exception):
@@ -6,6 +13,61 @@ class DataError(Exception):
     pass
 
 
+def _owner(array):
+    """Returns the array owning the memory of array, following views and
+    the views made by as_strided.
+    """
+    while True:
+        base = getattr(array, "base", None)
+        if isinstance(base, np.ndarray):
+            array = base
+        elif isinstance(getattr(base, "base", None), np.ndarray):
+            array = base.base
+        else:
+            return array
+
+
+def _stamp(array):
+    """Returns the id of the owner of the memory of array and the number
+    of writes to it, which together change whenever a Data object writes
+    to that memory, through whatever view.
+    """
+    owner = _owner(array)
+    entry = _versions.get(id(owner))
+    if entry is None or entry[0]() is not owner:
+        return id(owner), 0
+    return id(owner), entry[1]
+
+
+def _written(array):
+    """Counts a write to the memory of array."""
+    owner = _owner(array)
+    key = id(owner)
+    with _versions_lock:
+        entry = _versions.get(key)
+        if entry is None or entry[0]() is not owner:
+            entry = _versions[key] = [weakref.ref(owner, lambda ref: _forget(key, ref)), 0]
+        entry[1] += 1
+
+
+def _forget(key, ref):
+    """Drops the count of an array that no longer exists."""
+    if _versions.get(key, (None, ))[0] is ref:
+        _versions.pop(key, None)
+
+
+def _readonly(array):
+    """Returns True if neither array nor any array it is a view of can be
+    written to, like the arrays of memory mapped files opened read-only.
+    """
+    while isinstance(array, np.ndarray):
+        if array.flags.writeable:
+            return False
+        base = array.base
+        array = base.base if isinstance(getattr(base, "base", None), np.ndarray) else base
+    return True
+
+
 class Data(object):
     def __str__(self):
         string = ""
@@ -43,12 +105,140 @@ class Data(object):
         else:
             raise AssertionError("y is not a float, int, tuple, list, ndarray or Data object")
 
+    def _scaled_into(self, ufunc, y, out):
+        """Combines the stacked data with the stacked data of y rescaled to
+        the exposure times of self, using ufunc (np.add or np.subtract).
+        Frames of y with a time of 0 are not rescaled. The rescaling uses
+        a single frame sized buffer. Returns the stacked result.
+        """
+        y_stack, y_times = y.stack(), y.__times
+        mask = y_times == 0
+        if np.all(mask):
+            return ufunc(self.__stack, y_stack, out=out)
+
+        scale_dtype = np.result_type(y_stack.dtype, 1.0)
+        if out is None:
+            out = np.empty(self.__stack.shape, np.result_type(self.__stack.dtype, scale_dtype))
+        buffer = np.empty(y_stack.shape[1:], scale_dtype)
+        for i in range(len(self)):
+            if mask[i]:
+                ufunc(self.__stack[i], y_stack[i], out=out[i])
+            else:
+                np.multiply(y_stack[i], scale_dtype.type(self.__times[i]), out=buffer)
+                np.true_divide(buffer, scale_dtype.type(y_times[i]), out=buffer)
+                ufunc(self.__stack[i], buffer, out=out[i])
+        return out
+
+    def _frame_operand(self, y):
+        """Returns y as an array that broadcasts against the stacked data,
+        or None if the operation has to be done frame by frame.
+        """
+        if self.__stack is None:
+            return None
+        if isinstance(y, Data):
+            return y.stack()
+        if isinstance(y, (int, float)):
+            return y
+        factors = np.asarray(y)
+        if factors.ndim != 1 or factors.dtype == object:
+            return None
+        dtype = np.result_type(self.__stack.dtype, *y)
+        return np.asarray(y, dtype=dtype).reshape((-1, ) + (1, ) * (self.__stack.ndim - 1))
+
+    def _result_dtype(self, ufunc, y):
+        """Returns the dtype of the stacked result of ufunc(self, y), or
+        None if the operation has to be done frame by frame.
+        """
+        if ufunc in (np.add, np.subtract):
+            if self.__stack is None or not isinstance(y, Data) or y.stack() is None:
+                return None
+            y_dtype = y.stack().dtype
+            if not np.all(y.__times == 0):
+                y_dtype = np.result_type(y_dtype, 1.0)
+            return np.result_type(self.__stack.dtype, y_dtype)
+
+        operand = self._frame_operand(y)
+        if operand is None:
+            return None
+        dtype = np.result_type(self.__stack.dtype, operand)
+        if ufunc is np.true_divide:
+            dtype = np.result_type(dtype, 1.0)
+        return dtype
+
+    def _check_out(self, ufunc, y, out):
+        """Checks that out can hold the stacked result of ufunc(self, y)."""
+        if out is None:
+            return
+        dtype = self._result_dtype(ufunc, y)
+        assert dtype is not None, "out can only be used when all data-arrays have the same shape"
+        assert isinstance(out, np.ndarray), "out must be a numpy array"
+        assert out.shape == self.__stack.shape, "out must have the same shape as the stacked data"
+        assert np.can_cast(dtype, out.dtype, "same_kind"), "out cannot hold the result dtype"
+
     def __add__(self, y):
+        return self.add(y)
+
+    def __sub__(self, y):
+        return self.subtract(y)
+
+    def __mul__(self, y):
+        return self.multiply(y)
+
+    def __truediv__(self, y):
+        return self.divide(y)
+
+    def __iadd__(self, y):
+        return self._inplace(np.add, self.add, y)
+
+    def __isub__(self, y):
+        return self._inplace(np.subtract, self.subtract, y)
+
+    def __imul__(self, y):
+        return self._inplace(np.multiply, self.multiply, y)
+
+    def __itruediv__(self, y):
+        return self._inplace(np.true_divide, self.divide, y)
+
+    def _inplace(self, ufunc, operation, y):
+        """Executes operation with the stacked data as out, so no new
+        data-arrays are allocated. Like numpy, the result is cast to the
+        dtype of the data if that is a cast of the same kind. Only a stack
+        which this Data object allocated itself is written to. Arrays given
+        to Data(), views into other arrays, ragged, read-only, memory mapped
+        or too narrow data get a new array instead, so the arrays of the
+        caller and files are never written to.
+        """
+        out = None
+        try:
+            dtype = self._result_dtype(ufunc, y)
+        except (AssertionError, TypeError, ValueError):
+            dtype = None
+        if dtype is not None and self.__allocated and self._owns(self.__stack) and \
+                np.can_cast(dtype, self.__stack.dtype, "same_kind"):
+            out = self.__stack
+
+        result = operation(y, out=out)
+        self._check_and_set_data(result.stack() if result.stack() is not None else result.data())
+        self._check_and_set_time(result.time())
+        self.shape = self._shape()
+        if result.stack() is not None:
+            self.__allocated = True  # either the stack of self or a new array of operation
+        return self
+
+    def add(self, y, out=None):
+        """Returns self + y. The data of y is rescaled to the exposure times
+        of self, unless the time of y is 0. If out is given, an array with
+        the shape of stack(), the result is written into it.
+        """
         try:
             self._equivalent(y)
+            self._check_out(np.add, y, out)
         except AssertionError as e:
             raise DataError("Cannot add these two: " + str(e)) from e
 
+        if self.__stack is not None and y.stack() is not None:
+            return Data(self._changed(self._scaled_into(np.add, y, out), out), self.__time, self.__id)
+
         x_data, y_data = self.__data, y.data()
         x_time, y_time = self.__time, y.time()
         _data = []
@@ -60,13 +250,20 @@ class Data(object):
 
         return Data(_data, self.__time, self.__id)
 
-
-    def __sub__(self, y):
+    def subtract(self, y, out=None):
+        """Returns self - y. The data of y is rescaled to the exposure times
+        of self, unless the time of y is 0. If out is given, an array with
+        the shape of stack(), the result is written into it.
+        """
         try:
             self._equivalent(y)
+            self._check_out(np.subtract, y, out)
         except AssertionError as e:
             raise DataError("Cannot subtract these two: " + str(e)) from e
 
+        if self.__stack is not None and y.stack() is not None:
+            return Data(self._changed(self._scaled_into(np.subtract, y, out), out), self.__time, self.__id)
+
         x_data, y_data = self.__data, y.data()
         x_time, y_time = self.__time, y.time()
         _data = []
@@ -78,31 +275,49 @@ class Data(object):
 
         return Data(_data, self.__time, self.__id)
 
-    def __mul__(self, y):
+    def multiply(self, y, out=None):
+        """Returns self * y, multiplying both the data and the times. If out
+        is given, an array with the shape of stack(), the result is written
+        into it.
+        """
         try:
             y_data, y_time = self._combineability(y)
+            _time = [self.__time[i] * y_time[i] for i in range(len(self))]
+            self._check_out(np.multiply, y, out)
         except AssertionError as e:
             raise DataError("Cannot multiply these two: " + str(e)) from e
 
-        _data, _time = [], []
-        x_data, x_time = self.__data, self.__time
+        operand = self._frame_operand(y)
+        if operand is not None:
+            return Data(self._changed(np.multiply(self.__stack, operand, out=out), out), _time, self.__id)
+
+        _data = []
+        x_data = self.__data
         for i in range(len(self)):
             _data.append(x_data[i] * y_data[i])
-            _time.append(x_time[i] * y_time[i])
 
         return Data(_data, _time, self.__id)
 
-    def __truediv__(self, y):
+    def divide(self, y, out=None):
+        """Returns self / y, dividing both the data and the times. If out is
+        given, an array with the shape of stack(), the result is written
+        into it.
+        """
         try:
             y_data, y_time = self._combineability(y)
+            _time = [self.__time[i] / y_time[i] for i in range(len(self))]
+            self._check_out(np.true_divide, y, out)
         except AssertionError as e:
             raise DataError("Cannot devide these two: " + str(e)) from e
 
-        _data, _time = [], []
-        x_data, x_time = self.__data, self.__time
+        operand = self._frame_operand(y)
+        if operand is not None:
+            return Data(self._changed(np.true_divide(self.__stack, operand, out=out), out), _time, self.__id)
+
+        _data = []
+        x_data = self.__data
         for i in range(len(self)):
             _data.append(x_data[i] / y_data[i])
-            _time.append(x_time[i] / y_time[i])
 
         return Data(_data, _time, self.__id)
 
@@ -126,21 +341,33 @@ class Data(object):
         except AssertionError as e:
             raise DataError("Cannot combine these two: " + str(e)) from e
 
-        return Data(self.__data + y_data, self.__time + y_time, self.__id + y_id)
+        result = Data(self.__data + y_data, self.__time + y_time, self.__id + y_id)
+        if isinstance(y, Data):
+            result.__digests = self.__digests + y.__digests
+        else:
+            result.__digests = self.__digests * y
+        return result
 
     def __eq__(self, y):
+        """Two Data objects are equal if their data, times, ids and rest are
+        equal. The data is compared with the fingerprints, so after the first
+        comparison this does not depend on the size of the data. Like
+        np.nan == np.nan, data containing nan is never equal. Data objects
+        can be changed in place, so they are not hashable.
+        """
         if not isinstance(y, Data):
             return False
         if self.shape == y.shape and len(self) == len(y):
-            _bool = [self.rest() == y.rest()]
-            for i in range(len(self)):
-                _bool.append(np.all(self.__data[i] == y.data()[i]))
-                _bool.append(np.all(self.__time[i] == y.time()[i]))
-                _bool.append(self.__id[i] == y.id()[i])
-            return bool(np.all(_bool))
+            if not np.all(self.rest() == y.rest()):
+                return False
+            if self.fingerprint() != y.fingerprint():
+                return False
+            return not (self._has_nan() or y._has_nan())
         else:
             return False
 
+    __hash__ = None
+
     def __ne__(self, y):
         if self.__eq__(y):
             return False
@@ -151,13 +378,18 @@ class Data(object):
         return len(self.__data)
 
     def __getitem__(self, key):
-        _data = self.__data[key]
         _time = self.__time[key]
         _id = self.__id[key]
+        if self.__stack is not None:
+            if isinstance(key, slice):
+                return Data(self.__stack[key], _time, _id)._with_digests(self.__digests[key])
+            key = range(len(self))[key]
+            return Data(self.__stack[key:key + 1], [_time], [_id])._with_digests([self.__digests[key]])
+        _data = self.__data[key]
         if isinstance(_data, tuple):
-            return Data(_data, _time, _id)
+            return Data(_data, _time, _id)._with_digests(self.__digests[key])
         elif isinstance(_data, np.ndarray):
-            return Data([_data], [_time], [_id])
+            return Data([_data], [_time], [_id])._with_digests([self.__digests[key]])
         else:
             raise DataError("Something went wrong!")
 
@@ -172,17 +404,119 @@ class Data(object):
         except Exception as e:
             raise DataError(e) from e
 
+    def __getstate__(self):
+        """Pickles the data-arrays, times, ids and rest under the names
+        older versions of Data used, without the caches.
+        """
+        return {"_Data__data": self.__data if self.__stack is None else self.__stack, "_Data__time": self.__time,
+                "_Data__id": self.__id, "_Data__rest": self.__rest}
+
+    def __setstate__(self, state):
+        """Restores a pickled Data object, also one pickled by an older
+        version of Data which only kept the tuple of data-arrays, the times,
+        ids, rest and shape. The stack and the times are rebuilt and the
+        caches start empty.
+        """
+        try:
+            self._check_and_set_data(state["_Data__data"])
+            self._check_and_set_time(state["_Data__time"])
+            self._check_and_set_id(state["_Data__id"])
+            self.__rest = state.get("_Data__rest")
+            self.shape = self._shape()
+        except (AssertionError, KeyError) as e:
+            raise DataError(e) from e
+
     def _check_and_set_data(self, data):
+        """Stores the data-arrays. If all arrays have the same shape and
+        dtype they are kept in one contiguous (n_frames, ...) array and the
+        individual arrays are views into it. An ndarray with at least two
+        dimensions, or arrays which are already consecutive views of one
+        array, are used as such a stack without copying. Memory mapped and
+        read-only arrays are never copied, if they cannot be stacked without
+        copying they are stored as they are. Arrays which are not copied
+        still belong to the caller, the in-place operators copy them before
+        they write.
+        """
         self._checklistness(data, "data")
+        self.__stats = [None] * len(data)
+        self.__statstamps = [None] * len(data)
+        self.__digests = [None] * len(data)
+        self.__fingerprint = None
+        self.__allocated = False
+        if isinstance(data, np.ndarray) and data.ndim >= 2:
+            self.__stack = data
+            self.__data = tuple(data)
+            return
         for i in data:
             assert isinstance(i, np.ndarray), "The data list must contain numpy arrays"
-        self.__data = tuple(data)
+        self.__stack = None
+        if len(data) > 0 and self._stackable(data):
+            self.__stack = self._viewstack(data)
+            if self.__stack is None and all(self._owns(i) for i in data):
+                self.__stack = np.stack(data)
+                self.__allocated = True
+        if self.__stack is not None:
+            self.__data = tuple(self.__stack)
+        else:
+            self.__data = tuple(data)
+
+    @staticmethod
+    def _stackable(data):
+        """Returns True if all arrays have the same shape and dtype."""
+        first = data[0]
+        for i in data[1:]:
+            if i.shape != first.shape or i.dtype != first.dtype:
+                return False
+        return True
+
+    @staticmethod
+    def _viewstack(data):
+        """Returns a (n_frames, ...) view on the memory of the data-arrays if
+        they lie at equal distances in the same buffer, otherwise returns None.
+        """
+        first = data[0]
+        if len(data) == 1:
+            return first[np.newaxis]
+        if first.base is None:
+            return None
+        start = first.__array_interface__["data"][0]
+        step = data[1].__array_interface__["data"][0] - start
+        if step == 0:
+            return None
+        for i in range(len(data)):
+            if data[i].base is not first.base or data[i].strides != first.strides or \
+                    data[i].__array_interface__["data"][0] != start + i * step:
+                return None
+        writeable = all(i.flags.writeable for i in data)
+        return np.lib.stride_tricks.as_strided(first, (len(data),) + first.shape, (step,) + first.strides,
+                                               writeable=writeable)
+
+    @staticmethod
+    def _owns(array):
+        """Returns True if the array is a writeable in-memory array, False if
+        it is read-only or backed by a memory mapped file.
+        """
+        if not array.flags.writeable:
+            return False
+        while array is not None:
+            if isinstance(array, (np.memmap, mmap.mmap)):
+                return False
+            array = getattr(array, "base", None)
+        return True
+
+    def writeable(self):
+        """Returns True if the data-arrays can be changed in place. Memory
+        mapped and read-only data is copied on write instead, and so are
+        arrays given to Data() which it did not copy.
+        """
+        return all(self._owns(i) for i in self.__data)
 
     def _check_and_set_time(self, time):
         self._checklistness(time, "time")
         for i in time:
             assert isinstance(i, (int, float)), "The time list must contain integers or floats"
         self.__time = tuple(time)
+        self.__times = np.array(self.__time, dtype=np.float64)
 
     def _check_and_set_id(self, id):
         self._checklistness(id, "id")
@@ -203,6 +537,53 @@ class Data(object):
         """Returns a tuple containging the data-arrays."""
         return self.__data
 
+    def astype(self, dtype):
+        """Returns a Data object with the data-arrays converted to dtype. If
+        the data-arrays already have this dtype, returns self without copying.
+        """
+        dtype = np.dtype(dtype)
+        if all(i.dtype == dtype for i in self.__data):
+            return self
+        if self.__stack is not None:
+            return Data(self.__stack.astype(dtype), self.__time, self.__id, self.__rest)
+        return Data([i.astype(dtype) for i in self.__data], self.__time, self.__id, self.__rest)
+
+    def window(self, window):
+        """Returns a Data object with the sub-window window of every
+        data-array, window being a tuple of slices of the last two axes like
+        (slice(10, 20), slice(30, 40)). The data-arrays are views, nothing is
+        copied. If window is None, returns self.
+
+        The in-place operators of the window copy its data-arrays first, so
+        they never change self. A result written with out= into the stack
+        of the window does change self, and the cached statistics and
+        fingerprint of self are recalculated afterwards.
+        """
+        if window is None:
+            return self
+        try:
+            key = (Ellipsis, ) + tuple(window)
+            if self.__stack is not None:
+                return Data(self.__stack[key], self.__time, self.__id, self.__rest)
+            return Data([i[key] for i in self.__data], self.__time, self.__id, self.__rest)
+        except (TypeError, IndexError) as e:
+            raise DataError(e) from e
+
+    def lazy(self):
+        """Returns a DataExpression holding this Data object. Calculations
+        with it are deferred until the data is needed and are then done in a
+        single pass over the data-arrays.
+        """
+        from DataExpression import DataExpression
+        return DataExpression(self)
+
+    def stack(self):
+        """Returns the data-arrays as one (n_frames, ...) array if they all
+        have the same shape, otherwise returns None. The arrays returned by
+        data() are views into this array.
+        """
+        return self.__stack
+
     def time(self):
         """Returns a tuple containing the times."""
         return self.__time
@@ -215,48 +596,214 @@ class Data(object):
         """Returns rest"""
         return self.__rest
 
+    def invalidate(self):
+        """Forgets the cached statistics and fingerprint, of this and of
+        every other Data object using the same memory. Call this after
+        changing the data-arrays returned by data() or stack() in place; the
+        operators of Data and out= do this themselves.
+        """
+        for i in self.__data:
+            _written(i)
+        self.__stats = [None] * len(self.__data)
+        self.__statstamps = [None] * len(self.__data)
+        self.__digests = [None] * len(self.__data)
+        self.__fingerprint = None
+
+    @staticmethod
+    def changed(array):
+        """Tells every Data object using the memory of array that it was
+        changed in place, so their cached statistics and fingerprints are
+        recalculated.
+        """
+        _written(array)
+
+    @staticmethod
+    def _changed(result, out):
+        """Returns result, counting a write to out if it is given."""
+        if out is not None:
+            _written(out)
+        return result
+
+    def _stamps(self):
+        """Returns the write stamps of the memory of the data-arrays."""
+        return [_stamp(i) for i in self.__data]
+
+    fingerprintblock = 2**20  # number of bytes hashed at once by fingerprint
+
+    def fingerprint(self):
+        """Returns a hexadecimal digest of the data, times and ids, which can
+        be used as key for caches. The digest of every data-array is
+        calculated once and reused by __getitem__ and __pow__. The values are
+        hashed as float64, so equal data with different dtypes has the same
+        fingerprint. Like the statistics, the digests are recalculated after
+        any Data object sharing the memory of a data-array writes to it.
+        """
+        stamps = self._stamps()
+        if self.__fingerprint is None or self.__fingerprint[0] != stamps:
+            h = hashlib.blake2b(digest_size=16)
+            for i in range(len(self)):
+                if self.__digests[i] is None or self.__digests[i][2] != stamps[i]:
+                    self.__digests[i] = self._frame_digest(self.__data[i], self.fingerprintblock) + (stamps[i], )
+                h.update(self.__digests[i][0])
+                h.update(np.float64(self.__time[i]).tobytes())
+                h.update(repr(self.__id[i]).encode())
+            self.__fingerprint = (stamps, h.hexdigest())
+        return self.__fingerprint[1]
+
+    @staticmethod
+    def _frame_digest(frame, blocksize):
+        """Returns the digest of a data-array and whether it contains nan."""
+        h = hashlib.blake2b(repr(frame.shape).encode(), digest_size=16)
+        has_nan = False
+        rows = frame.reshape(len(frame), -1) if frame.ndim > 1 else frame.reshape(1, -1)
+        step = max(1, blocksize // max(1, rows.shape[1] * 8))
+        for start in range(0, len(rows), step):
+            block = np.asarray(rows[start:start + step], dtype=np.float64) + 0.0  # -0.0 == 0.0
+            has_nan = has_nan or bool(np.isnan(block).any())
+            h.update(block.tobytes())
+        return h.digest(), has_nan
+
+    def _has_nan(self):
+        """Returns True if any of the data-arrays contains nan."""
+        self.fingerprint()
+        return any(i[1] for i in self.__digests)
+
+    def _with_digests(self, digests):
+        """Reuses the digests of the data-arrays of another Data object."""
+        self.__digests = list(digests)
+        return self
+
+    def describe(self, median=False):
+        """Returns a tuple containing a dictionary for each data-array with
+        its "min", "max", "mean", "variance", "skewness" and "kurtosis", and
+        its "median" if median is True. Skewness and kurtosis are the
+        normalised central moments of order 3 and 4, np.nan if the variance
+        is 0.
+
+        Everything except the median is calculated in a single pass over the
+        data, in blocks for all stacked data-arrays at once. The results of
+        read-only data-arrays, like memory mapped files, are cached with the
+        write stamps of their memory, so they are recalculated after any Data
+        object sharing that memory, like a window or a slice, writes to it.
+        Writeable data-arrays can be changed directly through data() and
+        stack(), so their statistics are calculated on every call.
+        """
+        stamps = self._stamps()
+        for i in range(len(self)):
+            if self.__statstamps[i] != stamps[i] or not _readonly(self.__data[i]):
+                self.__stats[i] = None
+        needed = [i for i in range(len(self)) if self.__stats[i] is None or
+                  (median and "median" not in self.__stats[i])]
+        if len(needed) == len(self) and self.__stack is not None and len(self) > 0:
+            self._describe_into(range(len(self)), self.__stack, median, stamps)
+        else:
+            for i in needed:
+                self._describe_into([i], self.__data[i][np.newaxis], median, stamps)
+        return tuple(self.__stats)
+
+    def _describe_into(self, indices, stack, median, stamps):
+        """Calculates the statistics of the frames in stack and caches them
+        under indices.
+        """
+        frames = stack.reshape(len(stack), -1)
+        stats = self._single_pass(frames)
+        if median:
+            stats["median"] = np.median(frames, axis=1)
+        for j, i in enumerate(indices):
+            if self.__stats[i] is not None and not median:
+                continue
+            self.__stats[i] = {key: stats[key][j] for key in stats}
+            self.__statstamps[i] = stamps[i]
+
+    statsblock = 2**17  # number of elements of all frames in one block of _single_pass
+
+    @classmethod
+    def _single_pass(cls, frames):
+        """Returns a dictionary with arrays containing the statistics of the
+        rows of the 2D array frames. The rows are read once, in blocks of
+        columns. The central moments of the blocks are combined with the
+        pairwise update formulas of Chan et al. and Pebay, which keep the
+        accuracy of a two pass algorithm.
+        """
+        n_frames, size = frames.shape
+        step = max(1024, cls.statsblock // max(1, n_frames))
+        n = 0
+        for start in range(0, size, step):
+            raw = frames[:, start:start + step]
+            block = np.asarray(raw, dtype=np.float64)
+            nb = block.shape[1]
+            mean_b = block.mean(axis=1)
+            d = block - mean_b[:, np.newaxis]
+            d2 = d * d
+            m2_b = d2.sum(axis=1)
+            m3_b = (d2 * d).sum(axis=1)
+            m4_b = (d2 * d2).sum(axis=1)
+            low, high = raw.min(axis=1), raw.max(axis=1)
+            if n == 0:
+                mean, m2, m3, m4 = mean_b, m2_b, m3_b, m4_b
+                minimum, maximum = low, high
+                n = nb
+                continue
+
+            na, nt = n, n + nb
+            delta = mean_b - mean
+            mean = mean + delta * nb / nt
+            m4 = m4 + m4_b + delta**4 * na * nb * (na**2 - na * nb + nb**2) / nt**3 + \
+                6 * delta**2 * (na**2 * m2_b + nb**2 * m2) / nt**2 + 4 * delta * (na * m3_b - nb * m3) / nt
+            m3 = m3 + m3_b + delta**3 * na * nb * (na - nb) / nt**2 + 3 * delta * (na * m2_b - nb * m2) / nt
+            m2 = m2 + m2_b + delta**2 * na * nb / nt
+            minimum, maximum = np.minimum(minimum, low), np.maximum(maximum, high)
+            n = nt
+
+        variance = m2 / n
+        std = np.sqrt(variance)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            skewness = np.where(std != 0, m3 / n / std**3, np.nan)
+            kurtosis = np.where(std != 0, m4 / n / std**4, np.nan)
+        return {"min": minimum, "max": maximum, "mean": mean, "variance": variance,
+                "skewness": skewness, "kurtosis": kurtosis}
+
     def medians(self):
         """Returns a tuple containing the medians of the various
         data-arrays.
         """
-        _median = []
-        for i in self.__data:
-            _median.append(np.median(i))
-        return tuple(_median)
+        return tuple(i["median"] for i in self.describe(median=True))
 
     def maximums(self):
         """Returns a tuple containing the maximum values of the various
         data-arrays.
         """
-        _max = []
-        for i in self.__data:
-            _max.append(np.max(i))
-        return tuple(_max)
+        return tuple(i["max"] for i in self.describe())
 
     def minimums(self):
         """Returns a tuple containing the minimum values of the various
         data-arrays.
         """
-        _min = []
-        for i in self.__data:
-            _min.append(np.min(i))
-        return tuple(_min)
+        return tuple(i["min"] for i in self.describe())
 
     def moment(self, m):
         """Returns a tuple containing the normalised central moments of order m
         of the data-arrays. If m=1 returns the mean and if m=2 returns the
         variance. For any other m if the variance is 0, returns np.nan.
+        The moments are accumulated in float64 whatever the dtype of the data.
         """
         _moment = []
-        for i in self.__data:
-            mu = np.mean(i)
-            std = np.std(i)
+        stats = self.describe()
+        for i in range(len(self)):
+            mu = stats[i]["mean"]
+            var = stats[i]["variance"]
             if m == 1:
                 _moment.append(mu)
             elif m == 2:
-                _moment.append(std**2)
-            elif std != 0:
-                _moment.append(np.mean(((i - mu) / std)**m))
-            else:
+                _moment.append(var)
+            elif var == 0:
                 _moment.append(np.nan)
+            elif m == 0:
+                _moment.append(np.float64(1))
+            elif m == 3:
+                _moment.append(stats[i]["skewness"])
+            elif m == 4:
+                _moment.append(stats[i]["kurtosis"])
+            else:
+                _moment.append(np.mean(((self.__data[i] - mu) / np.sqrt(var))**m))
         return tuple(_moment)
@@ -0,0 +1,295 @@
+from Data import Data, DataError
+
+import numpy as np
+
+
+class DataExpression(object):
+    """A deferred calculation on Data objects.
+
+    Data.lazy() returns a DataExpression. Adding, subtracting, multiplying
+    and dividing it with Data objects, other expressions, numbers or lists of
+    numbers builds up an expression like (raw - bias - dark) / flat without
+    calculating anything. The expression is evaluated once, when data(),
+    stack() or evaluate() is called. The frames are then walked through in
+    blocks of rows which fit in the cpu cache, so every pixel is read and
+    written only once instead of once for every operation. The result is
+    exactly the same as doing the calculation with the Data objects directly.
+    """
+
+    blocksize = 2**18  # bytes per row block of a single intermediate array
+
+    def __init__(self, data):
+        """Creates an expression which just holds the Data object data."""
+        if not isinstance(data, Data):
+            raise DataError("A DataExpression can only be created from a Data object.")
+        self._ufunc = None
+        self._left = data
+        self._operand = None
+        self._time = data.time()
+        self._id = data.id()
+        self.shape = data.shape
+        self._result = None
+
+    def __len__(self):
+        return len(self._time)
+
+    def __repr__(self):
+        if self._ufunc is None:
+            return "DataExpression(" + repr(self._left) + ")"
+        return "DataExpression(" + self._ufunc.__name__ + ", " + repr(self._left) + ", " +\
+            repr(self._operand) + ")"
+
+    @classmethod
+    def _node(cls, ufunc, left, operand, time):
+        """Creates an expression applying ufunc to left and operand."""
+        node = cls.__new__(cls)
+        node._ufunc = ufunc
+        node._left = left
+        node._operand = operand
+        node._time = tuple(time)
+        node._id = left.id()
+        node.shape = left.shape
+        node._result = None
+        return node
+
+    def _equivalent(self, y):
+        assert isinstance(y, (Data, DataExpression)), "You can only add or subtract two Data objects."
+        assert len(self) == len(y), "The two Data objects must have the same sizes."
+        assert self.shape == y.shape, "The two Data objects must have the same shapes."
+        assert self._id == y.id(), "The id must be equal."
+
+    def _combined_times(self, y, combine):
+        """Returns the times of self combined with the times of y."""
+        if isinstance(y, (Data, DataExpression)):
+            self._equivalent(y)
+            y_time = y.time()
+        elif isinstance(y, (int, float)):
+            y_time = [y] * len(self)
+        elif isinstance(y, (tuple, list, np.ndarray)):
+            assert len(self) == len(y), "The lengths must match."
+            y_time = y
+        else:
+            raise AssertionError("y is not a float, int, tuple, list, ndarray or Data object")
+        time = [combine(self._time[i], y_time[i]) for i in range(len(self))]
+        for i in time:
+            assert isinstance(i, (int, float)), "The time list must contain integers or floats"
+        return time
+
+    def __add__(self, y):
+        try:
+            self._equivalent(y)
+        except AssertionError as e:
+            raise DataError("Cannot add these two: " + str(e)) from e
+        return self._node(np.add, self, y, self._time)
+
+    def __sub__(self, y):
+        try:
+            self._equivalent(y)
+        except AssertionError as e:
+            raise DataError("Cannot subtract these two: " + str(e)) from e
+        return self._node(np.subtract, self, y, self._time)
+
+    def __mul__(self, y):
+        try:
+            time = self._combined_times(y, lambda a, b: a * b)
+        except AssertionError as e:
+            raise DataError("Cannot multiply these two: " + str(e)) from e
+        return self._node(np.multiply, self, y, time)
+
+    def __truediv__(self, y):
+        try:
+            time = self._combined_times(y, lambda a, b: a / b)
+        except AssertionError as e:
+            raise DataError("Cannot devide these two: " + str(e)) from e
+        return self._node(np.true_divide, self, y, time)
+
+    def time(self):
+        """Returns a tuple containing the times."""
+        return self._time
+
+    def id(self):
+        """Returns a tuple containing the id."""
+        return self._id
+
+    def data(self):
+        """Evaluates the expression and returns a tuple containing the
+        data-arrays.
+        """
+        return self.evaluate().data()
+
+    def stack(self):
+        """Evaluates the expression and returns the stacked data-arrays."""
+        return self.evaluate().stack()
+
+    def evaluate(self, out=None):
+        """Evaluates the expression and returns a Data object. If out is
+        given, an array with the shape of the stacked result, the result is
+        written into it. The result is cached, so evaluating twice is free.
+        """
+        if self._result is not None and out is None:
+            return self._result
+        if not self._stacked() or self.shape[0] == ():
+            if out is not None:
+                raise DataError("out can only be used when all data-arrays have the same shape")
+            result = self._eager()
+        else:
+            result = Data(self._fused(out), self._time, self._id)
+            if out is not None:
+                Data.changed(out)
+        self._result = result
+        return result
+
+    def _stacked(self):
+        """Returns True if every Data object in the expression is stacked."""
+        if self._ufunc is None:
+            return self._left.stack() is not None
+        if isinstance(self._operand, DataExpression):
+            if not self._operand._stacked():
+                return False
+        elif isinstance(self._operand, Data):
+            if self._operand.stack() is None:
+                return False
+        elif isinstance(self._operand, (tuple, list, np.ndarray)):
+            factors = np.asarray(self._operand)
+            if factors.ndim != 1 or factors.dtype == object:
+                return False
+        return self._left._stacked()
+
+    def _eager(self):
+        """Evaluates the expression with the operators of Data."""
+        if self._ufunc is None:
+            return self._left
+        left = self._left._eager()
+        operand = self._operand
+        if isinstance(operand, DataExpression):
+            operand = operand._eager()
+        if self._ufunc is np.add:
+            return left + operand
+        elif self._ufunc is np.subtract:
+            return left - operand
+        elif self._ufunc is np.multiply:
+            return left * operand
+        return left / operand
+
+    def _fused(self, out):
+        """Evaluates the expression block by block into out."""
+        plan = self._plan()
+        shape = (len(self),) + self.shape[0]
+        if out is None:
+            out = np.empty(shape, plan.dtype)
+        elif not isinstance(out, np.ndarray) or out.shape != shape:
+            raise DataError("out must be an array with the same shape as the stacked data")
+        elif not np.can_cast(plan.dtype, out.dtype, "same_kind"):
+            raise DataError("out cannot hold the result dtype")
+
+        if len(shape) == 2:
+            rows = shape[1]
+        else:
+            row_bytes = int(np.prod(shape[2:])) * plan.itemsize
+            rows = max(1, self.blocksize // max(1, row_bytes))
+        for i in range(shape[0]):
+            for start in range(0, max(shape[1], 1), rows):
+                block = slice(start, start + rows)
+                plan.block(i, block, out[i, block])
+        return out
+
+    def _plan(self):
+        """Returns the tree of _Step objects that evaluates this expression."""
+        if self._ufunc is None:
+            return _Leaf(self._left.stack())
+        left = self._left._plan()
+        operand = self._operand
+        if isinstance(operand, (Data, DataExpression)):
+            right = operand._plan() if isinstance(operand, DataExpression) else _Leaf(operand.stack())
+            if self._ufunc in (np.add, np.subtract):
+                right = _Rescale(right, self._left.time(), operand.time())
+            return _Step(self._ufunc, left, right)
+        if isinstance(operand, (int, float)):
+            return _Step(self._ufunc, left, _Scalar(operand))
+        dtype = np.result_type(left.dtype, *operand)
+        return _Step(self._ufunc, left, _Factors(np.asarray(operand, dtype=dtype)))
+
+
+class _Leaf(object):
+    """Reads row blocks of a stacked array."""
+
+    def __init__(self, stack):
+        self.stack = stack
+        self.dtype = stack.dtype
+        self.itemsize = stack.dtype.itemsize
+
+    def block(self, i, rows, out=None):
+        if out is None:
+            return self.stack[i, rows]
+        out[...] = self.stack[i, rows]
+        return out
+
+
+class _Scalar(object):
+    """A number which is the same for every frame."""
+
+    def __init__(self, value):
+        self.value = value
+        self.dtype = np.result_type(value)
+        self.itemsize = 0
+
+    def block(self, i, rows, out=None):
+        return self.value
+
+
+class _Factors(object):
+    """One number per frame."""
+
+    def __init__(self, values):
+        self.values = values
+        self.dtype = values.dtype
+        self.itemsize = 0
+
+    def block(self, i, rows, out=None):
+        return self.values[i]
+
+
+class _Rescale(object):
+    """Rescales the frames of a step to the exposure times of another, as
+    Data.__add__ and Data.__sub__ do. Frames with a time of 0 are not
+    rescaled.
+    """
+
+    def __init__(self, step, x_time, y_time):
+        self.step = step
+        self.x_time = x_time
+        self.y_time = y_time
+        self.scaled = not all(i == 0 for i in y_time)
+        if self.scaled:
+            self.dtype = np.result_type(step.dtype, 1.0)
+        else:
+            self.dtype = step.dtype
+        self.itemsize = max(step.itemsize, self.dtype.itemsize)
+
+    def block(self, i, rows, out=None):
+        block = self.step.block(i, rows)
+        if self.y_time[i] == 0:
+            return block
+        buffer = np.multiply(block, self.dtype.type(self.x_time[i]), dtype=self.dtype)
+        np.true_divide(buffer, self.dtype.type(self.y_time[i]), out=buffer)
+        return buffer
+
+
+class _Step(object):
+    """Applies a ufunc to the row blocks of two steps."""
+
+    def __init__(self, ufunc, left, right):
+        self.ufunc = ufunc
+        self.left = left
+        self.right = right
+        sample = right.value if isinstance(right, _Scalar) else np.empty(0, right.dtype)
+        self.dtype = ufunc(np.empty(0, left.dtype), sample).dtype
+        self.itemsize = max(left.itemsize, right.itemsize, self.dtype.itemsize)
+
+    def block(self, i, rows, out=None):
+        left = self.left.block(i, rows)
+        right = self.right.block(i, rows)
+        if out is None:
+            out = np.empty(np.shape(left), self.dtype)
+        self.ufunc(left, right, out=out)
+        return out
@@ -0,0 +1,137 @@
+"""Saves and loads Data objects in a compact binary file.
+
+The file starts with a fixed 16 byte preamble:
+        8 bytes  magic b"CCDDATA\\0"
+        4 bytes  version (little endian unsigned int)
+        4 bytes  length of the header (little endian unsigned int)
+followed by a utf-8 JSON header and the raw bytes of the data-arrays, each
+aligned to 64 bytes. The header holds the version, the dtype, shape and
+offset of every data-array, the times, the ids, a summary of rest (fits
+headers are stored as their text) and the fingerprint of the Data object
+as checksum. The times and ids are stored exactly, so they must be numbers,
+strings, booleans, None or lists of them. If all data-arrays have the same shape and dtype they are
+stored as one block.
+
+load memory maps the data-arrays read-only instead of reading them, so
+opening a file costs nothing and only the parts that are used are read
+from disk. Arithmetic on the loaded Data object makes new arrays, the file
+is never changed.
+"""
+from Data import Data
+from errors import DataFileError
+
+import numpy as np
+import struct
+import json
+import os
+
+MAGIC = b"CCDDATA\0"
+VERSION = 1
+EXTENSION = ".ccd"
+_ALIGN = 64
+
+
+def save(data, filename):
+    """Saves the Data object data to filename. The file is written next to
+    filename first and then moved, so readers never see half a file.
+    """
+    if not isinstance(data, Data):
+        raise DataFileError("data must be a Data object")
+
+    stack = data.stack()
+    arrays = [stack] if stack is not None and len(data) > 0 else list(data.data())
+    header = {"version": VERSION, "stacked": stack is not None and len(data) > 0, "frames": [],
+              "time": list(data.time()), "id": list(data.id()), "rest": _summary(data.rest()),
+              "checksum": data.fingerprint()}
+
+    offset = 0
+    for i in arrays:
+        header["frames"].append({"dtype": i.dtype.str, "shape": list(i.shape), "offset": offset})
+        offset = _aligned(offset + i.nbytes)
+    try:
+        text = json.dumps(header)
+        stored = json.loads(text)
+    except (TypeError, ValueError) as excep:
+        raise DataFileError("the times and ids must be numbers, strings, booleans, None or lists of them: " +
+                            str(excep)) from excep
+    if stored["time"] != header["time"] or stored["id"] != header["id"]:
+        raise DataFileError("the times and ids must be numbers, strings, booleans, None or lists of them")
+    text = text.encode("utf-8")
+    start = _aligned(16 + len(text))
+
+    temp = filename + ".tmp" + str(os.getpid())
+    try:
+        with open(temp, "wb") as f:
+            f.write(MAGIC + struct.pack("<II", VERSION, len(text)) + text)
+            for i, frame in zip(arrays, header["frames"]):
+                f.seek(start + frame["offset"])
+                f.write(np.ascontiguousarray(i).tobytes())
+            f.truncate(start + offset)
+        os.replace(temp, filename)
+    except OSError as excep:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise DataFileError(excep) from excep
+
+
+def load(filename, verify=False):
+    """Loads a Data object from filename. The data-arrays are read-only
+    memory maps of the file. If verify is True, the checksum is compared to
+    the fingerprint of the loaded data, which reads the whole file.
+    """
+    try:
+        with open(filename, "rb") as f:
+            preamble = f.read(16)
+            if len(preamble) != 16 or preamble[:8] != MAGIC:
+                raise DataFileError(filename + " is not a Data file")
+            version, length = struct.unpack("<II", preamble[8:])
+            if version > VERSION:
+                raise DataFileError(filename + " has version " + str(version) +
+                                    ", only up to " + str(VERSION) + " is supported")
+            header = json.loads(f.read(length).decode("utf-8"))
+    except (OSError, ValueError) as excep:
+        raise DataFileError(excep) from excep
+
+    start = _aligned(16 + length)
+    arrays = [_map(filename, start, i) for i in header["frames"]]
+    frames = arrays[0] if header["stacked"] else arrays
+    data = Data(frames, header["time"], header["id"], header["rest"])
+    if verify and data.fingerprint() != header["checksum"]:
+        raise DataFileError(filename + " is corrupt, the checksum does not match")
+    return data
+
+
+def is_datafile(filename):
+    """Returns True if filename starts with the magic bytes."""
+    try:
+        with open(filename, "rb") as f:
+            return f.read(8) == MAGIC
+    except OSError:
+        return False
+
+
+def _map(filename, start, frame):
+    """Memory maps a single array described by frame."""
+    shape = tuple(frame["shape"])
+    dtype = np.dtype(frame["dtype"])
+    if int(np.prod(shape)) == 0:
+        return np.empty(shape, dtype)
+    return np.memmap(filename, dtype, "r", start + frame["offset"], shape)
+
+
+def _aligned(offset):
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def _summary(rest):
+    """Returns rest in a form that can be stored as JSON."""
+    try:
+        json.dumps(rest)
+        return rest
+    except (TypeError, ValueError):
+        pass
+    if isinstance(rest, (list, tuple)):
+        return [_summary(i) for i in rest]
+    if hasattr(rest, "tostring"):
+        return rest.tostring()
+    return repr(rest)
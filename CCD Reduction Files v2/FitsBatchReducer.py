@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from CCDBatchReducer import CCDBatchReducer
+from FitsLoader import FitsLoader
+from FitsFolderIndex import FitsFolderIndex
+from errors import FitsBatchReducerError
+
+
+class FitsBatchReducer(CCDBatchReducer):
+    """CCDBatchReducer specifically for Fits files."""
+
+    @staticmethod
+    def _loadfile(filepath, window=None):
+        f = FitsLoader(filepath, window=window)
+        return f.data
+
+    @staticmethod
+    def _error(exception=None):
+        """Raises the FitsBatchReducerError."""
+        return FitsBatchReducerError(exception)
+
+    @staticmethod
+    def _index(folderpath):
+        return FitsFolderIndex(folderpath)
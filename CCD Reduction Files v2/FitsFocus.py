@@ -9,9 +9,9 @@ import numpy as np
 class FitsFocus(CCDFocus):
 
     @staticmethod
-    def _cube(folderpath, masterpath, savepath, pixel_size, delta, realign):
+    def _cube(folderpath, masterpath, savepath, pixel_size, delta, realign, window=None):
         f =  FitsFolderLaserReducer(folderpath, masterpath, savepath, pixel_size)
-        return f.cube(delta, realign)
+        return f.cube(delta, realign, window) + (f.zvalues(), )
 
     @staticmethod
     def _error(exception=None):
@@ -19,16 +19,17 @@ class FitsFocus(CCDFocus):
         return FitsFocusError(exception)
 
     @staticmethod
-    def _zposition(names):
-        """This function changes names to position.
-        This is done by discarding the first 6 characters.
+    def _zposition(names, z):
+        """This function changes the z positions FitsFolderIndex read from
+        the names to positions relative to the furthest file.
+        The index discards the first 6 characters of a name.
         This function thus only works if the files are named: Focus 13.140.
         Something similar will of course also work.
-        If you use a different name, change this function accordingly!
+        If you use a different name, change FitsFolderIndex._zvalue accordingly!
         """
-
-        z = []
-        for i in names:
-            z.append(float(i[6:]) * 1e-3)  # assumed that the namee is Focus (z) with (z) f.e.: 13.530
+        unreadable = [names[i] for i in range(len(names)) if z[i] is None]
+        if len(unreadable) > 0:
+            raise FitsFocusError("Cannot read the z position from " + ", ".join(unreadable) +
+                                 ", the files must be named like Focus 13.140.fit")
         z = np.flip(np.min(z) - np.array(z))  # flips z because increasing z is moving to the laser!
         return z
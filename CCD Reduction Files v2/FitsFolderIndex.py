@@ -0,0 +1,44 @@
+from CCDFolderIndex import CCDFolderIndex
+from errors import FitsFolderIndexError
+
+from astropy.io import fits
+
+
+class FitsFolderIndex(CCDFolderIndex):
+    """CCDFolderIndex specifically for Fits files."""
+
+    @staticmethod
+    def _error(exception=None):
+        """Raises the FitsFolderIndexError."""
+        return FitsFolderIndexError(exception)
+
+    @staticmethod
+    def _accept(name):
+        return ".fit" in name
+
+    def _scan(self, path):
+        """Reads the headers of all HDUs, the pixel data is not read."""
+        exptime = None
+        shapes = []
+        hdus = 0
+        with fits.open(path, memmap=True) as _file:
+            for i in _file:
+                hdus += 1
+                header = i.header
+                naxis = header.get("NAXIS", 0)
+                if isinstance(i, (fits.PrimaryHDU, fits.ImageHDU, fits.CompImageHDU)) and naxis > 0:
+                    shapes.append([header["NAXIS" + str(j)] for j in range(naxis, 0, -1)])
+                if exptime is None and "exptime" in header:
+                    exptime = header["exptime"]
+        return {"exptime": exptime, "shapes": shapes, "hdus": hdus}
+
+    @staticmethod
+    def _zvalue(name):
+        """Discards the first 6 characters of the name without extension, so
+        this only works if the files are named like Focus 13.140.fit, with z
+        in mm. Returns the z position in m or None.
+        """
+        try:
+            return float(name[6:]) * 1e-3
+        except ValueError:
+            return None
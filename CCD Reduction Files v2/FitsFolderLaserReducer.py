@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from CCDFolderLaserReducer import CCDFolderLaserReducer
 from FitsLaserReducer import FitsLaserReducer
+from FitsFolderIndex import FitsFolderIndex
 from errors import FitsFolderLaserReducerError
 
 class FitsFolderLaserReducer(CCDFolderLaserReducer):
@@ -11,6 +12,10 @@ class FitsFolderLaserReducer(CCDFolderLaserReducer):
         return FitsFolderLaserReducerError(exception)
 
     @staticmethod
-    def _laserreducer(folderpath, masterpath, savepath, pixel_size):
-        f = FitsLaserReducer(folderpath, masterpath, savepath, pixel_size)
+    def _laserreducer(folderpath, masterpath, savepath, pixel_size, window=None):
+        f = FitsLaserReducer(folderpath, masterpath, savepath, pixel_size, window=window)
         return f
+
+    @staticmethod
+    def _index(folderpath):
+        return FitsFolderIndex(folderpath)
@@ -6,8 +6,8 @@ from errors import FitsLaserReducerError
 class FitsLaserReducer(CCDLaserReducer):
     """LaserReducer class specifically for Fits files."""
 
-    def __init__(self, filepath, masterpath=None, savepath=None, pixel_size=9e-6, magnification=100):
-        super(FitsLaserReducer, self).__init__(filepath, masterpath, savepath, pixel_size, magnification)
+    def __init__(self, filepath, masterpath=None, savepath=None, pixel_size=9e-6, magnification=100, window=None):
+        super(FitsLaserReducer, self).__init__(filepath, masterpath, savepath, pixel_size, magnification, window)
 
     @staticmethod
     def _error(exception=None):
@@ -15,6 +15,6 @@ class FitsLaserReducer(CCDLaserReducer):
         return FitsLaserReducerError(exception)
 
     @staticmethod
-    def _loadfile(filepath):
-        f = FitsLoader(filepath)
+    def _loadfile(filepath, window=None):
+        f = FitsLoader(filepath, window=window)
         return f.data
@@ -1,5 +1,6 @@
 from Data import Data
 from errors import FitsLoaderError
+from precision import get_policy
 
 from astropy.io import fits as fits
 import numpy as np
@@ -10,21 +11,66 @@ class FitsLoader(object):
     Data object storing the data and the exposure time.
     """
 
-    def __init__(self, filename):
-        """Loads a Fits file, creates and returns a Data object."""
+    def __init__(self, filename, precision=None, mmap=False, window=None):
+        """Loads a Fits file, creates and returns a Data object. The frames
+        are converted to the raw dtype of the precision policy, by default
+        the policy set with precision.set_policy.
+
+        If mmap is True the file is memory mapped. The frames are then
+        available as FitsFrame objects in self.frames, which only read and
+        scale the pixels that are indexed. self.data is created from them the
+        first time it is used.
+
+        If window, a tuple of two slices like (slice(350, 651), slice(350,
+        651)), is given, the file is memory mapped and self.frames and
+        self.data only hold that sub-window of the last two axes of every
+        frame, so only the rows of the window are read.
+
+        Tile compressed frames (Rice, GZIP, ...) are decoded when the file is
+        opened, with a window only the tiles overlapping the window.
+        """
         try:
             assert isinstance(filename, str), "filepath must be a string"
+            assert window is None or (len(window) == 2 and all(isinstance(i, slice) for i in window)), \
+                "window must be None or a tuple of two slices"
         except AssertionError as excep:
             raise FitsLoaderError(excep) from excep
 
-        self.data = Data([], [], [])
+        if precision is None:
+            precision = get_policy()
+        self.precision = precision
+        self.mmap = mmap or window is not None
+        self.window = None if window is None else tuple(window)
+        self.frames = ()
+        self._data = Data([], [], [])
         self._opener(filename)
 
+    @property
+    def data(self):
+        """The Data object of the file."""
+        if self._data is None:
+            try:
+                self._data = Data([np.asarray(i) for i in self.frames], self.time, [None] * len(self.frames),
+                                  self.header)
+            except Exception as excep:
+                raise FitsLoaderError(excep) from excep
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+
     def _opener(self, filename):
         """Opens the file and sends it to be unpacked."""
         try:
-            with fits.open(filename) as _file:
-                self._unpack(_file)
+            if self.mmap is True:
+                with fits.open(filename, memmap=True, do_not_scale_image_data=True) as _file:
+                    self._map(_file)
+            else:
+                with fits.open(filename) as _file:
+                    self._unpack(_file)
+        except FitsLoaderError:
+            raise
         except Exception as excep:
             raise FitsLoaderError(excep) from excep
 
@@ -37,10 +83,103 @@ class FitsLoader(object):
             try:
                 header.append(i.header)
                 if i.data is not None:
-                    data.append(i.data.astype(np.float64))
+                    data.append(self._convert(i.data))
                 if "exptime" in i.header:
                     time.append(i.header["exptime"])
 
             except Exception as excep:
                 raise FitsLoaderError(excep) from excep
-        self.data = Data(data, time, [None], header)
+        self.data = Data(data, time, [None] * len(data), header)
+
+    def _map(self, _file):
+        """Stores the memory mapped, unscaled frames of the fits file. Tile
+        compressed frames can not be memory mapped, their window is decoded.
+        """
+        frames = []
+        self.time = []
+        self.header = []
+        key = Ellipsis if self.window is None else (Ellipsis, ) + self.window
+        for i in _file:
+            self.header.append(i.header)
+            if isinstance(i, fits.CompImageHDU):
+                frames.append(FitsFrame(i.section[key], i.header, self.precision.raw))
+            elif i.data is not None:
+                frames.append(FitsFrame(i.data[key], i.header, self.precision.raw))
+            if "exptime" in i.header:
+                self.time.append(i.header["exptime"])
+        self.frames = tuple(frames)
+        self._data = None
+
+    def _convert(self, array):
+        """Converts a frame to the raw dtype of the precision policy. Does
+        not copy if the frame already has that dtype.
+        """
+        if self.precision.raw is None:
+            return array
+        return array.astype(self.precision.raw, copy=False)
+
+
+class FitsFrame(object):
+    """A memory mapped frame of a fits file. Indexing it, like
+    frame[10:20, 30:40], reads only those pixels from disk and scales them
+    with BSCALE and BZERO. np.asarray(frame) converts the whole frame;
+    unscaled frames are then returned as the memory map itself.
+    """
+
+    def __init__(self, raw, header, dtype=None):
+        """raw is the unscaled array of the fits file and header its header.
+        dtype is the dtype of the converted pixels, if None the physical
+        dtype the pixels have after scaling.
+        """
+        self.raw = raw
+        self.shape = raw.shape
+        self.bscale = header.get("BSCALE", 1)
+        self.bzero = header.get("BZERO", 0)
+        if dtype is None:
+            self.dtype = self._physical_dtype()
+        else:
+            self.dtype = np.dtype(dtype)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def _unsigned(self):
+        """Returns True if the frame stores unsigned integers the fits way,
+        as signed integers with BZERO 2**(bits - 1).
+        """
+        raw = self.raw.dtype
+        return raw.kind == "i" and raw.itemsize > 1 and self.bscale == 1 and \
+            self.bzero == 2**(8 * raw.itemsize - 1)
+
+    def _physical_dtype(self):
+        raw = self.raw.dtype
+        if self._unsigned():
+            return np.dtype("u" + str(raw.itemsize))
+        if self.bscale == 1 and self.bzero == 0:
+            return raw
+        if raw.kind in "iu" and raw.itemsize <= 2:
+            return np.dtype(np.float32)
+        return np.dtype(np.float64)
+
+    def __getitem__(self, key):
+        return self._scale(self.raw[key])
+
+    def __array__(self, dtype=None, copy=None):
+        array = self._scale(self.raw)
+        if dtype is not None:
+            array = array.astype(dtype, copy=False)
+        return array
+
+    def _scale(self, raw):
+        """Converts unscaled pixels to self.dtype."""
+        if self._unsigned():
+            native = raw.astype(raw.dtype.newbyteorder("="), copy=False)
+            unsigned = (native ^ np.array(-self.bzero, native.dtype)).view("u" + str(native.itemsize))
+            return unsigned.astype(self.dtype, copy=False)
+        if self.bscale == 1 and self.bzero == 0:
+            return raw.astype(self.dtype, copy=False)
+        work = self.dtype if self.dtype.kind == "f" else np.dtype(np.float64)
+        scaled = raw.astype(work)
+        scaled *= self.bscale
+        scaled += self.bzero
+        return scaled.astype(self.dtype, copy=False)
@@ -7,8 +7,8 @@ class FitsReducer(CCDReducer):
     """CCDReducer specifically for Fits files."""
 
     @staticmethod
-    def _loadfile(filepath):
-        f =  FitsLoader(filepath)
+    def _loadfile(filepath, window=None):
+        f =  FitsLoader(filepath, window=window)
         return f.data
 
     @staticmethod
@@ -1,8 +1,8 @@
 # -*- coding: utf-8 -*-
 from CCDReductionObject import CCDReductionObject, CCDBias, CCDDark, CCDFlat
 from FitsLoader import FitsLoader
+from FitsFolderIndex import FitsFolderIndex
 from errors import FitsReductionObjectError
-import os
 
 
 class FitsReductionObject(CCDReductionObject):
@@ -17,12 +17,10 @@ class FitsReductionObject(CCDReductionObject):
         """Raises the CCDReducetionObjectError."""
         return FitsReductionObjectError(exception)
 
-    def _openallfiles(self, function):
-        """Loops through all files and execute a function."""
-        for i in sorted(os.listdir(self.filespath)):
-            if ".fit" in i:
-                data = self._loadfile(self.filespath + i)
-                function(data)
+    @staticmethod
+    def _index(folderpath):
+        """Returns the header index of the fits files in folderpath."""
+        return FitsFolderIndex(folderpath)
 
 
 class FitsBias(FitsReductionObject, CCDBias):
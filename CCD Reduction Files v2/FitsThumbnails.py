@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from Thumbnails import CCDThumbnails
+from FitsLoader import FitsLoader
+from FitsFolderIndex import FitsFolderIndex
+
+
+class FitsThumbnails(CCDThumbnails):
+    """CCDThumbnails specifically for Fits files."""
+
+    @staticmethod
+    def _loadfile(filepath):
+        f = FitsLoader(filepath)
+        return f.data
+
+    @staticmethod
+    def _index(folderpath):
+        return FitsFolderIndex(folderpath)
@@ -0,0 +1,185 @@
+"""Writes Data objects, like reduced frames, to fits files.
+
+Every data-array is written to its own image HDU after an empty primary
+HDU, with its exposure time as EXPTIME, so FitsLoader reads the same Data
+object back. With compression the frames are stored as tile compressed
+images (CompImageHDU), which FitsLoader reads as well and of which a window
+only decodes the overlapping tiles:
+        "RICE_1":   fast and lossless, only for integer data
+        "GZIP_1":   lossless for integer and float data
+        "GZIP_2":   like GZIP_1, shuffles the bytes first, which usually
+                    compresses float data better
+Float data is never quantized, so all compressed files are lossless.
+
+The headers FitsLoader keeps in the rest of a Data object are copied to the
+written file, except for the keywords describing the layout of the data,
+and cards like the calibration provenance can be added to the primary
+header. FitsStreamWriter writes files on a background thread, so reducing
+the next file and writing the last one overlap.
+"""
+from Data import Data
+from errors import FitsWriterError
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from astropy.io import fits
+import numpy as np
+import datetime
+import os
+
+COMPRESSIONS = ("RICE_1", "GZIP_1", "GZIP_2")
+TILE = (64, 64)
+STRUCTURAL = ("SIMPLE", "XTENSION", "BITPIX", "NAXIS", "EXTEND", "PCOUNT", "GCOUNT", "BSCALE", "BZERO", "BLANK",
+              "CHECKSUM", "DATASUM", "EXPTIME")  # keywords which are not copied, besides NAXISn
+
+
+def write(data, filename, compression=None, tile=TILE, dtype=None, cards=None):
+    """Writes the Data object data to filename. compression is None or one
+    of COMPRESSIONS, tile the shape of the compressed tiles of the last two
+    axes. If dtype is given the frames are converted to it. cards is a
+    dictionary of keywords and values added to the primary header. The file
+    is written next to filename first and then moved.
+    """
+    try:
+        assert isinstance(data, Data), "data must be a Data object"
+        assert isinstance(filename, str), "filename must be a string"
+        assert compression is None or compression in COMPRESSIONS, \
+            "compression must be None or one of " + ", ".join(COMPRESSIONS)
+        kinds = [i.dtype.kind for i in data.data()] if dtype is None else [np.dtype(dtype).kind]
+        for i in kinds:
+            assert compression != "RICE_1" or i in "iu", "RICE_1 can only compress integer data"
+    except (AssertionError, TypeError) as excep:
+        raise FitsWriterError(excep) from excep
+
+    primary, headers = _headers(data.rest(), len(data))
+    hdus = [fits.PrimaryHDU()]
+    _copy(primary, hdus[0].header)
+    for key, value in (cards or {}).items():
+        hdus[0].header[key] = value
+    for frame, time, header in zip(data.data(), data.time(), headers):
+        if dtype is not None:
+            frame = np.asarray(frame).astype(dtype, copy=False)
+        hdus.append(_hdu(frame, time, compression, tile))
+        _copy(header, hdus[-1].header)
+
+    temp = filename + ".tmp" + str(os.getpid())
+    try:
+        fits.HDUList(hdus).writeto(temp, output_verify="exception")
+        os.replace(temp, filename)
+    except (OSError, fits.VerifyError) as excep:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise FitsWriterError(excep) from excep
+
+
+def _hdu(frame, time, compression, tile):
+    """Returns the image HDU of a single data-array."""
+    frame = np.asarray(frame)
+    if frame.dtype == np.bool_:
+        frame = frame.astype(np.uint8)
+    if compression is None:
+        hdu = fits.ImageHDU(frame)
+    else:
+        shape = [1] * (frame.ndim - 2) + [min(i, j) for i, j in zip(tile, frame.shape[-2:])]
+        hdu = fits.CompImageHDU(frame, compression_type=compression, tile_shape=tuple(shape),
+                                quantize_level=0.0)
+    hdu.header["EXPTIME"] = time
+    return hdu
+
+
+def _headers(rest, count):
+    """Returns the primary header and the header of every frame of the
+    rest of a Data object loaded by FitsLoader, None where there are none.
+    """
+    if not isinstance(rest, (list, tuple)) or not all(isinstance(i, fits.Header) for i in rest):
+        return None, [None] * count
+    images = [i for i in rest if i.get("NAXIS", 0) > 0]
+    primary = rest[0] if len(rest) > 0 and rest[0].get("NAXIS", 0) == 0 else None
+    if len(images) != count:
+        return primary, [None] * count
+    return primary, images
+
+
+def _copy(source, header):
+    """Copies the cards of the header source which do not describe the
+    layout of the data to header.
+    """
+    if source is None:
+        return
+    for card in source.cards:
+        if card.keyword in STRUCTURAL or card.keyword.startswith("NAXIS"):
+            continue
+        if card.keyword in header and card.keyword not in ("COMMENT", "HISTORY", ""):
+            continue
+        header.append(card)
+
+
+def provenance(bias, dark, flat, source=None):
+    """Returns the cards recording the calibration of a reduced file: the
+    fingerprints of the master bias, dark and flat (Data objects or None),
+    the name of the raw file source and the time of the reduction.
+    """
+    cards = {}
+    for key, master in (("CALBIAS", bias), ("CALDARK", dark), ("CALFLAT", flat)):
+        cards[key] = ("NONE" if master is None else master.fingerprint(), "fingerprint of the master " + key[3:].lower())
+    if source is not None:
+        cards["RAWFILE"] = (os.path.basename(source), "raw file of the reduced frames")
+    cards["CALDATE"] = (datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"),
+                        "UTC time of the reduction")
+    return cards
+
+
+class FitsStreamWriter(object):
+    """Writes Data objects to fits files on a background thread. put()
+    returns as soon as the Data object is queued; it waits while depth
+    files are queued, so the memory use stays bounded. Errors of the
+    background thread are raised by the next put() or by close().
+    """
+
+    def __init__(self, compression=None, dtype=None, tile=TILE, depth=2):
+        """compression, dtype and tile are passed to write for every file,
+        the default dtype None keeps the dtype of the frames.
+        depth is the number of files that may wait to be written.
+        """
+        try:
+            assert isinstance(depth, int) and depth > 0, "depth must be a positive integer"
+        except AssertionError as excep:
+            raise FitsWriterError(excep) from excep
+        self.compression = compression
+        self.dtype = dtype
+        self.tile = tile
+        self.depth = depth
+        self.written = []
+        self._pending = deque()
+        self._pool = ThreadPoolExecutor(1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def put(self, data, filename, cards=None):
+        """Queues the Data object data to be written to filename, with the
+        extra primary header cards. data must not be changed afterwards.
+        """
+        while len(self._pending) >= self.depth:
+            self._wait()
+        self._pending.append((filename, self._pool.submit(write, data, filename, self.compression, self.tile,
+                                                          self.dtype, cards)))
+
+    def _wait(self):
+        filename, future = self._pending.popleft()
+        future.result()
+        self.written.append(filename)
+
+    def close(self):
+        """Waits until all queued files are written."""
+        try:
+            while len(self._pending) > 0:
+                self._wait()
+        finally:
+            for filename, future in self._pending:
+                future.cancel()
+            self._pending.clear()
+            self._pool.shutdown()
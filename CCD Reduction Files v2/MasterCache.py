@@ -0,0 +1,105 @@
+"""A process-wide cache of loaded master files.
+
+Reducing a folder creates a reducer for every file, which loads the same
+master bias, dark and flat every time. CCDReductionObject.load gets the
+masters from the cache returned by get_cache() instead. The masters are
+keyed by their path, mtime and size, so a master that is created again is
+loaded again. The least recently used masters are dropped when the cache
+holds more than memory bytes.
+
+The cached Data objects are shared by everything that loads them, they
+must not be changed in place.
+"""
+from errors import MasterCacheError
+
+from collections import OrderedDict
+import threading
+import os
+
+
+class MasterCache(object):
+    """Least recently used cache of loaded files."""
+
+    def __init__(self, memory=2**30):
+        """memory is the maximum number of bytes of the cached Data objects,
+        None is no limit.
+        """
+        self.memory = memory
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, filename):
+        return any(i[0] == os.path.abspath(filename) for i in self._entries)
+
+    @property
+    def memory(self):
+        return self._memory
+
+    @memory.setter
+    def memory(self, memory):
+        if memory is not None and not (isinstance(memory, (int, float)) and memory >= 0):
+            raise MasterCacheError("memory must be None or a positive number")
+        self._memory = memory
+        if hasattr(self, "_entries"):
+            with self._lock:
+                self._evict()
+
+    def nbytes(self):
+        """Returns the number of bytes of the cached Data objects."""
+        return sum(i[1] for i in self._entries.values())
+
+    def get(self, filename, load):
+        """Returns the object in filename, loaded with load(filename) if it
+        is not cached or the file changed. Raises FileNotFoundError if the
+        file does not exist.
+        """
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            obj = load(filename)
+            self.invalidate(path)
+            self._entries[key] = (obj, self._nbytes(obj))
+            self._evict()
+            return obj
+
+    def invalidate(self, filename=None):
+        """Drops filename from the cache, or everything if filename is None."""
+        with self._lock:
+            if filename is None:
+                self._entries.clear()
+                return
+            path = os.path.abspath(filename)
+            for key in [i for i in self._entries if i[0] == path]:
+                del self._entries[key]
+
+    def _evict(self):
+        """Drops the least recently used objects until the cache fits."""
+        while self._memory is not None and len(self._entries) > 0 and self.nbytes() > self._memory:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _nbytes(obj):
+        """Returns the bytes of the data-arrays of a Data object."""
+        try:
+            return sum(i.nbytes for i in obj.data())
+        except AttributeError:
+            return 0
+
+
+_cache = MasterCache()
+
+
+def get_cache():
+    """Returns the process-wide master cache."""
+    return _cache
@@ -0,0 +1,125 @@
+"""Allocates the names of the files written by the save functions.
+
+support_functions.find_free_filename lists and sorts the whole folder for
+every name(i) it tries, so saving n files with the same name into one folder
+takes O(n^2) time. An OutputManager lists its folder once and remembers the
+names in it and the next number of every name, so finding a free name takes
+constant time. A name is reserved by creating its file with exclusive
+creation, which fails if another process or program created it since the
+listing, the next number is tried then. Files removed after the listing
+are not reused until refresh() is called.
+
+Every reserved file is appended to the manifest of the folder, a file with
+one json object per line holding the output, the input it was made from and
+the time. Every line is appended with a single write, so processes saving
+into the same folder can share the manifest.
+
+get_manager(path) returns the manager of a folder of this process.
+"""
+from errors import OutputManagerError
+
+import threading
+import json
+import time
+import os
+
+manifest_name = "manifest.jsonl"  # name of the manifest in every folder, None writes no manifests
+_managers = {}
+_lock = threading.Lock()
+
+
+class OutputManager(object):
+    """Reserves free filenames in a folder."""
+
+    def __init__(self, path, manifest=manifest_name):
+        """path is the folder, which is prepended to the names like
+        find_free_filename does, so it should end with a separator.
+        manifest is the name of the manifest in the folder, or None.
+        """
+        try:
+            assert isinstance(path, str), "path must be a string"
+            assert isinstance(manifest, str) or manifest is None, "manifest must be a string"
+        except AssertionError as excep:
+            raise OutputManagerError(excep) from excep
+        self.path = path
+        self.manifest = None if manifest is None else path + manifest
+        self._names = None
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Forgets the listing, the folder is listed again by the next
+        reserve().
+        """
+        with self._lock:
+            self._names = None
+            self._next.clear()
+
+    def reserve(self, filename, extension, source=None):
+        """Returns path + filename + extension, or path + filename(i) +
+        extension with the lowest free i, like find_free_filename, and
+        creates the empty file. source, the file the output is made from,
+        is written to the manifest.
+        """
+        with self._lock:
+            if self._names is None:
+                try:
+                    self._names = set(os.listdir(self.path or "."))
+                except OSError as excep:
+                    raise OutputManagerError(excep) from excep
+            i = self._next.get((filename, extension), 0)
+            while True:
+                name = filename + extension if i == 0 else filename + "(" + str(i) + ")" + extension
+                if name not in self._names and self._create(self.path + name):
+                    break
+                self._names.add(name)
+                i += 1
+            self._names.add(name)
+            self._next[(filename, extension)] = i + 1
+        self.record(self.path + name, source)
+        return self.path + name
+
+    @staticmethod
+    def _create(filename):
+        """Creates filename, returns False if it exists."""
+        try:
+            open(filename, "x").close()
+            return True
+        except FileExistsError:
+            return False
+        except OSError as excep:
+            raise OutputManagerError(excep) from excep
+
+    def record(self, output, source=None):
+        """Appends output and the file it was made from to the manifest."""
+        if self.manifest is None:
+            return
+        line = json.dumps({"output": os.path.basename(output), "input": source, "time": time.time()}) + "\n"
+        try:
+            with open(self.manifest, "a") as f:
+                f.write(line)
+        except OSError as excep:
+            raise OutputManagerError(excep) from excep
+
+    def entries(self):
+        """Returns the entries of the manifest, oldest first."""
+        if self.manifest is None or not os.path.exists(self.manifest):
+            return []
+        with open(self.manifest, "r") as f:
+            return [json.loads(i) for i in f if i.strip()]
+
+
+def get_manager(path):
+    """Returns the manager of the folder path of this process."""
+    key = (os.path.abspath(path or "."), path)
+    with _lock:
+        if key not in _managers:
+            _managers[key] = OutputManager(path, manifest_name)
+        return _managers[key]
+
+
+def reserve(path, filename, extension, source=None):
+    """Reserves a free filename in path with the manager of path, see
+    OutputManager.reserve.
+    """
+    return get_manager(path).reserve(filename, extension, source)
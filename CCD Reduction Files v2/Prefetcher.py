@@ -0,0 +1,102 @@
+"""Loads the next files on background threads while the current one is used.
+
+Looping over a folder normally reads a file, processes it and only then
+reads the next, so the time spent waiting for the disk or the network share
+and the time spent calculating add up. Prefetcher(items, load) yields
+load(item) for every item in the given order, while the next depth items are
+already being loaded by a pool of threads. Reading fits files and numpy
+arithmetic release the GIL, so the loading really runs next to the
+processing.
+
+The memory limit bounds the estimated bytes of all loaded and loading items,
+including the one being processed. If the next item does not fit, it is only
+loaded when the current one is finished, which is the same as a plain loop.
+"""
+from errors import PrefetcherError
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import numpy as np
+import os
+
+
+class Prefetcher(object):
+    """Iterates over load(item) for the items, loading ahead on threads."""
+
+    def __init__(self, items, load, depth=2, memory=None, sizes=None):
+        """items are the things to load, in the order they are yielded,
+        load a function loading a single item. depth is the number of items
+        loaded ahead, 0 loads them one by one without threads. memory is the
+        maximum number of bytes held at once, None is no limit. sizes are the
+        estimated bytes of every item, by default the file size of the items
+        if they are file paths.
+        """
+        try:
+            self.items = list(items)
+            assert callable(load), "load must be a function"
+            assert isinstance(depth, int) and depth >= 0, "depth must be a positive integer or 0"
+            assert memory is None or (isinstance(memory, (int, float)) and memory > 0), \
+                "memory must be None or a positive number"
+            if sizes is None:
+                sizes = [os.path.getsize(i) if isinstance(i, str) and os.path.isfile(i) else 0
+                         for i in self.items]
+            assert len(sizes) == len(self.items), "there must be a size for every item"
+        except AssertionError as excep:
+            raise PrefetcherError(excep) from excep
+        self.load = load
+        self.depth = depth
+        self.memory = memory
+        self.sizes = list(sizes)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        if self.depth == 0:
+            for i in self.items:
+                yield self.load(i)
+            return
+
+        pending = deque()
+        state = {"next": 0, "held": 0}
+
+        def fill():
+            while state["next"] < len(self.items) and len(pending) < self.depth:
+                size = self.sizes[state["next"]]
+                if state["held"] > 0 and self.memory is not None and state["held"] + size > self.memory:
+                    break
+                pending.append(pool.submit(self.load, self.items[state["next"]]))
+                state["held"] += size
+                state["next"] += 1
+
+        pool = ThreadPoolExecutor(self.depth)
+        try:
+            for i in range(len(self.items)):
+                fill()
+                result = pending.popleft().result()
+                fill()
+                yield result
+                result = None
+                state["held"] -= self.sizes[i]
+        finally:
+            for i in pending:
+                i.cancel()
+            pool.shutdown(wait=True)
+
+
+def decoded_size(entry, dtype=None, window=None):
+    """Returns the estimated bytes of a file of a folder index once it is
+    loaded as dtype. If dtype is None the file keeps its own dtype and the
+    size on disk is used. window, a tuple of two slices, is the sub-window
+    of the frames that is loaded.
+    """
+    pixels = 0
+    for i in entry["shapes"]:
+        shape = list(i)
+        if window is not None and len(shape) >= 2:
+            shape[-2:] = [len(range(*s.indices(n))) for s, n in zip(window, shape[-2:])]
+        pixels += int(np.prod(shape))
+    if dtype is None:
+        full = sum(int(np.prod(i)) for i in entry["shapes"])
+        return entry["size"] * pixels // full if full > 0 else entry["size"]
+    return pixels * np.dtype(dtype).itemsize
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from CCDBatchReducer import CCDBatchReducer
+from RawLoader import RawLoader, NpyLoader
+from RawFolderIndex import RawFolderIndex, NpyFolderIndex
+from errors import RawBatchReducerError
+
+
+class RawBatchReducer(CCDBatchReducer):
+    """CCDBatchReducer specifically for raw files."""
+
+    @staticmethod
+    def _loadfile(filepath, window=None):
+        f = RawLoader(filepath, window)
+        return f.data
+
+    @staticmethod
+    def _error(exception=None):
+        """Raises the RawBatchReducerError."""
+        return RawBatchReducerError(exception)
+
+    @staticmethod
+    def _index(folderpath):
+        return RawFolderIndex(folderpath)
+
+
+class NpyBatchReducer(RawBatchReducer):
+    """CCDBatchReducer specifically for .npy files."""
+
+    @staticmethod
+    def _loadfile(filepath, window=None):
+        f = NpyLoader(filepath, window)
+        return f.data
+
+    @staticmethod
+    def _index(folderpath):
+        return NpyFolderIndex(folderpath)
@@ -0,0 +1,64 @@
+from CCDFolderIndex import CCDFolderIndex
+from RawLoader import sidecar
+from errors import RawFolderIndexError
+
+import numpy as np
+import os
+
+
+class RawFolderIndex(CCDFolderIndex):
+    """CCDFolderIndex specifically for raw files. Everything is read from
+    the sidecar files, the data files are not opened.
+    """
+
+    dtype = "<u2"
+
+    @staticmethod
+    def _error(exception=None):
+        """Raises the RawFolderIndexError."""
+        return RawFolderIndexError(exception)
+
+    @staticmethod
+    def _accept(name):
+        return name.endswith(".raw")
+
+    def _scan(self, path):
+        header = sidecar(path)
+        shape = list(header["shape"])
+        framesize = int(np.prod(shape)) * np.dtype(header.get("dtype", self.dtype)).itemsize
+        count = (os.path.getsize(path) - header.get("offset", 0)) // framesize
+        return {"exptime": self._exptime(header), "shapes": [shape] * count, "hdus": 1}
+
+    @staticmethod
+    def _exptime(header):
+        """Returns the exposure time of the first frame."""
+        time = header.get("exptime")
+        if isinstance(time, list):
+            return time[0] if len(time) > 0 else None
+        return time
+
+    @staticmethod
+    def _zvalue(name):
+        """Discards the first 6 characters of the name without extension, so
+        this only works if the files are named like Focus 13.140.raw, with z
+        in mm. Returns the z position in m or None.
+        """
+        try:
+            return float(name[6:]) * 1e-3
+        except ValueError:
+            return None
+
+
+class NpyFolderIndex(RawFolderIndex):
+    """RawFolderIndex for .npy files. The shapes are read from the headers
+    of the .npy files.
+    """
+
+    @staticmethod
+    def _accept(name):
+        return name.endswith(".npy")
+
+    def _scan(self, path):
+        shape = list(np.load(path, mmap_mode="r", allow_pickle=False).shape)
+        shapes = [shape] if len(shape) == 2 else [shape[1:]] * shape[0]
+        return {"exptime": self._exptime(sidecar(path)), "shapes": shapes, "hdus": 1}
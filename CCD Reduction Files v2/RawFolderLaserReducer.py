@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from CCDFolderLaserReducer import CCDFolderLaserReducer
+from RawLaserReducer import RawLaserReducer, NpyLaserReducer
+from RawFolderIndex import RawFolderIndex, NpyFolderIndex
+from errors import RawFolderLaserReducerError
+
+
+class RawFolderLaserReducer(CCDFolderLaserReducer):
+    @staticmethod
+    def _error(exception=None):
+        """Raises the RawFolderLaserReducerError."""
+        return RawFolderLaserReducerError(exception)
+
+    @staticmethod
+    def _laserreducer(folderpath, masterpath, savepath, pixel_size, window=None):
+        f = RawLaserReducer(folderpath, masterpath, savepath, pixel_size, window=window)
+        return f
+
+    @staticmethod
+    def _index(folderpath):
+        return RawFolderIndex(folderpath)
+
+
+class NpyFolderLaserReducer(RawFolderLaserReducer):
+    @staticmethod
+    def _laserreducer(folderpath, masterpath, savepath, pixel_size, window=None):
+        f = NpyLaserReducer(folderpath, masterpath, savepath, pixel_size, window=window)
+        return f
+
+    @staticmethod
+    def _index(folderpath):
+        return NpyFolderIndex(folderpath)
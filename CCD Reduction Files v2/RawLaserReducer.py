@@ -0,0 +1,29 @@
+from CCDLaserReducer import CCDLaserReducer
+from RawLoader import RawLoader, NpyLoader
+from errors import RawLaserReducerError
+
+
+class RawLaserReducer(CCDLaserReducer):
+    """LaserReducer class specifically for raw files."""
+
+    def __init__(self, filepath, masterpath=None, savepath=None, pixel_size=9e-6, magnification=100, window=None):
+        super(RawLaserReducer, self).__init__(filepath, masterpath, savepath, pixel_size, magnification, window)
+
+    @staticmethod
+    def _error(exception=None):
+        """Raises the RawLaserReducerError."""
+        return RawLaserReducerError(exception)
+
+    @staticmethod
+    def _loadfile(filepath, window=None):
+        f = RawLoader(filepath, window)
+        return f.data
+
+
+class NpyLaserReducer(RawLaserReducer):
+    """LaserReducer class specifically for .npy files."""
+
+    @staticmethod
+    def _loadfile(filepath, window=None):
+        f = NpyLoader(filepath, window)
+        return f.data
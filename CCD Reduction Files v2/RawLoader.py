@@ -0,0 +1,91 @@
+"""Loaders for frames stored as raw binary or .npy files.
+
+The frames are memory mapped straight into a Data object, they are neither
+copied nor converted, so the precision policy does not change their dtype.
+The information a fits header would hold is read from a JSON sidecar file
+next to the data file, with the same name and the extension .json, like
+"Focus 13.140.raw" and "Focus 13.140.json":
+        {"exptime": 0.5, "shape": [1000, 1000], "dtype": "<u2", "offset": 0}
+exptime:
+        The exposure time of all frames, or a list with one per frame.
+shape:
+        The shape of a single frame. Only needed for raw files.
+dtype:
+        The dtype of raw files, by default little endian uint16.
+offset:
+        The number of bytes before the first frame of raw files, default 0.
+A raw file holds as many frames as fit in it.
+"""
+from Data import Data
+from errors import RawLoaderError
+
+import numpy as np
+import json
+import os
+
+
+def sidecar(filename):
+    """Returns the dictionary in the sidecar file of filename."""
+    with open(os.path.splitext(filename)[0] + ".json", "r") as f:
+        return json.load(f)
+
+
+class RawLoader(object):
+    """RawLoader memory maps a file of raw frames and returns a Data object
+    storing the data and the exposure time.
+    """
+
+    dtype = "<u2"
+
+    def __init__(self, filename, window=None):
+        """Maps the file filename into a Data object, self.data. If window, a
+        tuple of two slices, is given only that sub-window of the frames is
+        used.
+        """
+        try:
+            assert isinstance(filename, str), "filepath must be a string"
+            assert window is None or (len(window) == 2 and all(isinstance(i, slice) for i in window)), \
+                "window must be None or a tuple of two slices"
+        except AssertionError as excep:
+            raise RawLoaderError(excep) from excep
+
+        try:
+            self.header = sidecar(filename)
+            frames = self._map(filename)
+            time = self.header["exptime"]
+            if isinstance(time, (int, float)):
+                time = [time] * len(frames)
+            assert len(time) == len(frames), "the sidecar must have an exptime for every frame"
+            if window is not None:
+                frames = frames[(Ellipsis, ) + tuple(window)]
+            self.data = Data(frames, time, [None] * len(frames), self.header)
+        except RawLoaderError:
+            raise
+        except Exception as excep:
+            raise RawLoaderError(excep) from excep
+
+    def _map(self, filename):
+        """Returns the frames of the file as a read-only memory map with the
+        shape (n_frames, ...).
+        """
+        shape = tuple(self.header["shape"])
+        dtype = np.dtype(self.header.get("dtype", self.dtype))
+        offset = self.header.get("offset", 0)
+        framesize = int(np.prod(shape)) * dtype.itemsize
+        count = (os.path.getsize(filename) - offset) // framesize
+        assert count > 0, filename + " does not hold a single frame"
+        return np.memmap(filename, dtype, "r", offset, (count, ) + shape)
+
+
+class NpyLoader(RawLoader):
+    """RawLoader for .npy files. The shape and dtype are read from the file,
+    a 2D array is a single frame, higher dimensional arrays hold a frame for
+    every index of the first axis.
+    """
+
+    def _map(self, filename):
+        frames = np.load(filename, mmap_mode="r", allow_pickle=False)
+        assert frames.ndim >= 2, filename + " must hold at least a 2D array"
+        if frames.ndim == 2:
+            frames = frames[np.newaxis]
+        return frames
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from CCDReducer import CCDReducer
+from RawLoader import RawLoader, NpyLoader
+from errors import RawReducerError
+
+
+class RawReducer(CCDReducer):
+    """CCDReducer specifically for raw files."""
+
+    @staticmethod
+    def _loadfile(filepath, window=None):
+        f = RawLoader(filepath, window)
+        return f.data
+
+    @staticmethod
+    def _error(exception=None):
+        """Raises the RawReducerError."""
+        return RawReducerError(exception)
+
+
+class NpyReducer(RawReducer):
+    """CCDReducer specifically for .npy files."""
+
+    @staticmethod
+    def _loadfile(filepath, window=None):
+        f = NpyLoader(filepath, window)
+        return f.data
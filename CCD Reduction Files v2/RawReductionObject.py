@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from CCDReductionObject import CCDReductionObject, CCDBias, CCDDark, CCDFlat
+from RawLoader import RawLoader, NpyLoader
+from RawFolderIndex import RawFolderIndex, NpyFolderIndex
+from errors import RawReductionObjectError
+
+
+class RawReductionObject(CCDReductionObject):
+    @staticmethod
+    def _loadfile(file):
+        """Returns a Data object."""
+        f = RawLoader(file)
+        return f.data
+
+    @staticmethod
+    def _error(exception=None):
+        """Raises the RawReductionObjectError."""
+        return RawReductionObjectError(exception)
+
+    @staticmethod
+    def _index(folderpath):
+        """Returns the sidecar index of the raw files in folderpath."""
+        return RawFolderIndex(folderpath)
+
+
+class RawBias(RawReductionObject, CCDBias):
+    """The Bias class can create and load master_bias files."""
+    pass
+
+
+class RawDark(RawReductionObject, CCDDark):
+    """The Dark class can create and load master_dark files."""
+    pass
+
+
+class RawFlat(RawReductionObject, CCDFlat):
+    """The Flat class can create and load master_flat files."""
+    pass
+
+
+class NpyReductionObject(RawReductionObject):
+    @staticmethod
+    def _loadfile(file):
+        """Returns a Data object."""
+        f = NpyLoader(file)
+        return f.data
+
+    @staticmethod
+    def _index(folderpath):
+        """Returns the index of the .npy files in folderpath."""
+        return NpyFolderIndex(folderpath)
+
+
+class NpyBias(NpyReductionObject, CCDBias):
+    """The Bias class can create and load master_bias files."""
+    pass
+
+
+class NpyDark(NpyReductionObject, CCDDark):
+    """The Dark class can create and load master_dark files."""
+    pass
+
+
+class NpyFlat(NpyReductionObject, CCDFlat):
+    """The Flat class can create and load master_flat files."""
+    pass
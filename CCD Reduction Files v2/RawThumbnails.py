@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from Thumbnails import CCDThumbnails
+from RawLoader import RawLoader, NpyLoader
+from RawFolderIndex import RawFolderIndex, NpyFolderIndex
+
+
+class RawThumbnails(CCDThumbnails):
+    """CCDThumbnails specifically for raw files."""
+
+    @staticmethod
+    def _loadfile(filepath):
+        f = RawLoader(filepath)
+        return f.data
+
+    @staticmethod
+    def _index(folderpath):
+        return RawFolderIndex(folderpath)
+
+
+class NpyThumbnails(RawThumbnails):
+    """CCDThumbnails specifically for .npy files."""
+
+    @staticmethod
+    def _loadfile(filepath):
+        f = NpyLoader(filepath)
+        return f.data
+
+    @staticmethod
+    def _index(folderpath):
+        return NpyFolderIndex(folderpath)
@@ -0,0 +1,227 @@
+"""Renders the figures written by the save functions.
+
+The save functions used to make a new pyplot figure and colorbar for every
+frame, which takes most of the time of saving it. The renderer keeps one
+figure of every layout and only changes the data of its artists with
+set_data for the next frame. The figures are plain Agg figures, not pyplot
+figures, so no gui backend is involved and nothing has to be closed. Images
+with at least twice as many pixels as the axes have on the figure are
+block averaged down to about that resolution before they are drawn,
+smaller images are drawn as they are and look exactly the same as before.
+
+What is drawn is described by tasks, (kind, options, filename) tuples with
+the kind of figure ("image" or "lines"), the options of its draw function
+and the file it is saved to. render() draws and saves tasks one by one, a
+RenderPool on worker processes. Every thread and process has its own
+figures. reserve() creates the files of the tasks right away with the
+OutputManager of their folder, so tasks which are rendered later still get
+different names. Png files are
+compressed with compress_level, which is faster than the default of
+matplotlib and only makes the files a few percent larger.
+"""
+import OutputManager
+from errors import RendererError
+
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib import colors
+import numpy as np
+import threading
+
+FIGSIZE = (15, 10.5)
+compress_level = 1  # zlib level of the png files, 1 is the fastest, matplotlib uses 6
+_local = threading.local()
+
+
+class ImageFigure(object):
+    """A figure with a single image, its colorbar and an optional marker."""
+
+    def __init__(self, figsize=FIGSIZE):
+        self.figure = Figure(figsize=figsize)
+        FigureCanvasAgg(self.figure)
+        self._style = None
+
+    def draw(self, data, extent, cmap="jet", log=False, aspect="equal", interpolation=None, xlabel="", ylabel="",
+             clabel="", title="", suptitle="", marker=None):
+        """Draws data, a 2D array, over extent like ax.imshow. marker is
+        the position of a black x, or None.
+        """
+        style = (cmap, aspect, interpolation, clabel, marker is not None)
+        if style != self._style:
+            self._build(style)
+        full = np.asarray(data)
+        data, imagextent = downsample(full, extent, self.pixels)
+        self.image.set_data(data)
+        self.image.set_norm(colors.LogNorm() if log else colors.Normalize())
+        if data is not full:
+            values = full[full > 0] if log else full
+            self.image.set_clim(np.nanmin(values), np.nanmax(values))
+        self.image.autoscale_None()
+        self.image.set_extent(imagextent)
+        self.colorbar.update_normal(self.image)
+        if marker is not None:
+            self.marker.set_offsets([marker])
+        self.ax.set_xlim(*extent[:2])
+        self.ax.set_ylim(*extent[2:])
+        self.ax.set_xlabel(xlabel)
+        self.ax.set_ylabel(ylabel)
+        self.ax.set_title(title)
+        self.figure.suptitle(suptitle)
+
+    def _build(self, style):
+        """Makes the axes, image, colorbar and marker of style."""
+        cmap, aspect, interpolation, clabel, marker = style
+        self.figure.clear()
+        self.ax = self.figure.add_subplot(111)
+        self.image = self.ax.imshow(np.zeros((2, 2)), cmap=cmap, aspect=aspect, interpolation=interpolation)
+        if marker:
+            self.marker = self.ax.scatter([0], [0], marker="x", color="black")
+        self.colorbar = self.figure.colorbar(self.image, ax=self.ax)
+        self.colorbar.set_label(clabel)
+        position = self.ax.get_position()
+        width, height = self.figure.get_size_inches() * self.figure.dpi
+        self.pixels = (position.height * height, position.width * width)
+        self._style = style
+
+
+class LineFigure(object):
+    """A figure with a single line."""
+
+    def __init__(self, figsize=FIGSIZE):
+        self.figure = Figure(figsize=figsize)
+        FigureCanvasAgg(self.figure)
+        self.line = None
+
+    def draw(self, x, y, xlabel="", ylabel="", title="", suptitle=""):
+        """Draws y against x like ax.plot."""
+        if self.line is None:
+            self.ax = self.figure.add_subplot(111)
+            self.line, = self.ax.plot(x, y)
+        else:
+            self.line.set_data(x, y)
+            self.ax.relim()
+            self.ax.autoscale_view()
+        self.ax.set_xlabel(xlabel)
+        self.ax.set_ylabel(ylabel)
+        self.ax.set_title(title)
+        self.figure.suptitle(suptitle)
+
+
+KINDS = {"image": ImageFigure, "lines": LineFigure}
+
+
+def downsample(data, extent, pixels):
+    """Returns data block averaged by the largest integer factor that keeps
+    at least pixels, (rows, columns), and the extent of the averaged data.
+    Rows and columns which do not fill a block are dropped.
+    """
+    factor = int(min(data.shape[0] / max(pixels[0], 1), data.shape[1] / max(pixels[1], 1)))
+    if data.ndim != 2 or factor < 2:
+        return data, extent
+    rows, columns = data.shape[0] // factor, data.shape[1] // factor
+    blocks = data[:rows * factor, :columns * factor].reshape(rows, factor, columns, factor)
+    left, right, bottom, top = extent
+    right = left + (right - left) * columns * factor / data.shape[1]
+    bottom = top + (bottom - top) * rows * factor / data.shape[0]
+    return blocks.mean(axis=(1, 3)), [left, right, bottom, top]
+
+
+def figure(kind):
+    """Returns the figure of kind of this thread."""
+    figures = getattr(_local, "figures", None)
+    if figures is None:
+        figures = _local.figures = {}
+    if kind not in figures:
+        figures[kind] = KINDS[kind]()
+    return figures[kind]
+
+
+def blank(figsize=FIGSIZE):
+    """Returns an empty Agg figure of this thread, for layouts which are
+    drawn from scratch. It is cleared by the next call.
+    """
+    figures = getattr(_local, "blank", None)
+    if figures is None:
+        figures = _local.blank = {}
+    if tuple(figsize) not in figures:
+        figures[tuple(figsize)] = Figure(figsize=figsize)
+        FigureCanvasAgg(figures[tuple(figsize)])
+    fig = figures[tuple(figsize)]
+    fig.clear()
+    return fig
+
+
+def reserve(path, savename, extension, source=None):
+    """Returns a free filename like support_functions.find_free_filename and
+    creates the file, so it is not returned again before it is written. See
+    OutputManager.reserve.
+    """
+    return OutputManager.reserve(path, savename, extension, source)
+
+
+def render(tasks):
+    """Draws and saves the tasks in this thread. Returns the filenames."""
+    return [_render(*i) for i in tasks]
+
+
+def _render(kind, options, filename):
+    if kind not in KINDS:
+        raise RendererError("kind must be one of " + ", ".join(sorted(KINDS)))
+    fig = figure(kind)
+    fig.draw(**options)
+    if filename.lower().endswith(".png"):
+        fig.figure.savefig(filename, pil_kwargs={"compress_level": compress_level})
+    else:
+        fig.figure.savefig(filename)
+    return filename
+
+
+class RenderPool(object):
+    """Renders tasks on processes worker processes, or in this thread if
+    processes is None. At most twice as many tasks as there are processes
+    wait to be rendered, errors of the workers are raised by the next
+    render() or by close().
+    """
+
+    def __init__(self, processes=None):
+        try:
+            assert processes is None or (isinstance(processes, int) and processes > 0), \
+                "processes must be None or a positive integer"
+        except AssertionError as excep:
+            raise RendererError(excep) from excep
+        self.processes = processes
+        self.rendered = []
+        self._pending = deque()
+        self._pool = None if processes is None else ProcessPoolExecutor(processes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def render(self, tasks):
+        """Renders the tasks, returns their filenames."""
+        if self._pool is None:
+            filenames = render(tasks)
+            self.rendered.extend(filenames)
+            return filenames
+        for task in tasks:
+            while len(self._pending) >= 2 * self.processes:
+                self.rendered.append(self._pending.popleft().result())
+            self._pending.append(self._pool.submit(_render, *task))
+        return [i[2] for i in tasks]
+
+    def close(self):
+        """Waits until all tasks are rendered."""
+        try:
+            while len(self._pending) > 0:
+                self.rendered.append(self._pending.popleft().result())
+        finally:
+            for i in self._pending:
+                i.cancel()
+            self._pending.clear()
+            if self._pool is not None:
+                self._pool.shutdown()
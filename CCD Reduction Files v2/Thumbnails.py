@@ -0,0 +1,173 @@
+"""Small png previews of frames, without matplotlib.
+
+A thumbnail is a frame block averaged down to at most size pixels along
+its longest side, scaled linearly or logarithmically between its minimum
+and maximum and coloured with the jet colormap used by the save functions,
+through a lookup table of 256 colours. The png file is written directly
+with zlib, so making a thumbnail takes about as long as reading the frame.
+
+CCDThumbnails writes the thumbnails of all files of a folder, on worker
+processes if processes is given. Nothing here imports matplotlib, the
+loaders of the Fits, Raw and Npy subclasses do not either.
+"""
+from CCDFolderIndex import CCDFolderIndex
+from Data import Data
+from errors import ThumbnailsError
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import struct
+import zlib
+import os
+
+compress_level = 1  # zlib level of the png files
+# the segment data of jet in matplotlib._cm._jet_data, copied so matplotlib is not imported
+_JET = {"red": ((0., 0.), (0.35, 0.), (0.66, 1.), (0.89, 1.), (1., 0.5)),
+        "green": ((0., 0.), (0.125, 0.), (0.375, 1.), (0.64, 1.), (0.91, 0.), (1., 0.)),
+        "blue": ((0., 0.5), (0.11, 1.), (0.34, 1.), (0.65, 0.), (1., 0.))}
+
+
+def lookup_table(segments=_JET, colours=256):
+    """Returns the (colours, 3) uint8 lookup table of a colormap given by
+    the positions and values of the red, green and blue channels. For
+    continuous segment data like _JET this is the table matplotlib makes,
+    so JET is identical to colormaps["jet"](np.arange(256), bytes=True).
+    """
+    x = np.linspace(0, 1, colours)
+    table = [np.interp(x, *zip(*segments[i])) for i in ("red", "green", "blue")]
+    return (np.stack(table, axis=1) * 255).astype(np.uint8)
+
+
+JET = lookup_table()
+
+
+def binned(frame, size):
+    """Returns frame block averaged by the smallest integer factor which
+    makes it at most size pixels along both axes. Rows and columns which do
+    not fill a block are dropped. The rows of a block are summed before the
+    columns, which is several times faster than a mean over both at once.
+    """
+    frame = np.asarray(frame)
+    try:
+        assert frame.ndim == 2, "frame must be 2-dimensional"
+        assert isinstance(size, int) and size > 0, "size must be a positive integer"
+    except AssertionError as excep:
+        raise ThumbnailsError(excep) from excep
+    factor = -(-max(frame.shape) // size)
+    if factor < 2:
+        return frame.astype(np.float32)
+    rows, columns = frame.shape[0] // factor, frame.shape[1] // factor
+    summed = frame[:rows * factor, :columns * factor].reshape(rows, factor, -1).sum(axis=1, dtype=np.float32)
+    return summed.reshape(rows, columns, factor).sum(axis=2) / np.float32(factor**2)
+
+
+def colour(frame, log=False, table=JET):
+    """Returns the (rows, columns, 3) uint8 image of frame, scaled between
+    its minimum and maximum. With log the logarithm of the positive values
+    is scaled, other values get the lowest colour, like NaN.
+    """
+    values = np.asarray(frame, np.float32)
+    if log:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.where(values > 0, np.log10(values), np.nan)
+    finite = np.isfinite(values)
+    if not finite.any():
+        return table[np.zeros(values.shape, np.intp)]
+    low, high = values[finite].min(), values[finite].max()
+    scale = (len(table) - 1) / (high - low) if high > low else 0
+    with np.errstate(invalid="ignore"):
+        index = np.nan_to_num((values - low) * scale, nan=0)
+    return table[np.clip(index, 0, len(table) - 1).astype(np.intp)]
+
+
+def png(image):
+    """Returns the bytes of the png file of a (rows, columns, 3) uint8
+    image.
+    """
+    image = np.ascontiguousarray(image, np.uint8)
+    rows, columns = image.shape[:2]
+    scanlines = np.zeros((rows, columns * 3 + 1), np.uint8)  # every row starts with filter type 0
+    scanlines[:, 1:] = image.reshape(rows, -1)
+
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body) & 0xffffffff)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", columns, rows, 8, 2, 0, 0, 0)) + \
+        chunk(b"IDAT", zlib.compress(scanlines.tobytes(), compress_level)) + chunk(b"IEND", b"")
+
+
+def thumbnail(frame, filename, size=128, log=False):
+    """Writes the thumbnail of a single frame to filename."""
+    image = png(colour(binned(frame, size), log))
+    with open(filename, "wb") as f:
+        f.write(image)
+
+
+def thumbnails(data, savepath, savename, size=128, log=False):
+    """Writes the thumbnails of all frames of the Data object data to
+    savepath as savename.png, or savename_0.png, savename_1.png, ... if
+    there are more frames. Existing thumbnails are replaced. Returns the
+    filenames.
+    """
+    try:
+        assert isinstance(data, Data), "data must be a Data object"
+        assert isinstance(size, int) and size > 0, "size must be a positive integer"
+    except AssertionError as excep:
+        raise ThumbnailsError(excep) from excep
+    filenames = []
+    for i, frame in enumerate(data.data()):
+        name = savename if len(data) == 1 else savename + "_" + str(i)
+        filenames.append(os.path.join(savepath, name + ".png"))
+        thumbnail(frame, filenames[-1], size, log)
+    return filenames
+
+
+class CCDThumbnails(object):
+    """Writes the thumbnails of the files of a folder."""
+
+    def __init__(self, folderpath, savepath=None, size=128, log=False):
+        """The thumbnails are written to savepath, by default folderpath,
+        named like the files.
+        """
+        try:
+            assert isinstance(folderpath, str), "folderpath must be a string"
+            assert isinstance(savepath, str) or savepath is None, "savepath must be a string"
+            assert isinstance(size, int) and size > 0, "size must be a positive integer"
+        except AssertionError as excep:
+            raise ThumbnailsError(excep) from excep
+        self.folderpath = folderpath
+        self.savepath = folderpath if savepath is None else savepath
+        self.size = size
+        self.log = log
+
+    @staticmethod
+    def _loadfile(filename):
+        """Returns a Data object.
+        Overwrite this!
+        """
+        return Data([np.random.randint(5e3, 5e4, (1000, 1000))], [1], [None])
+
+    @staticmethod
+    def _index(folderpath):
+        """Returns the index of the files in the folder.
+        Overwrite this!"""
+        return CCDFolderIndex(folderpath)
+
+    def save(self, processes=None):
+        """Writes the thumbnails of all files, on processes worker processes
+        or in this process if it is None. Returns the filenames.
+        """
+        paths = self._index(self.folderpath).paths()
+        if processes is None:
+            return [i for path in paths for i in self._save(path)]
+        try:
+            assert isinstance(processes, int) and processes > 0, "processes must be None or a positive integer"
+        except AssertionError as excep:
+            raise ThumbnailsError(excep) from excep
+        with ProcessPoolExecutor(processes) as pool:
+            chunksize = max(1, len(paths) // (4 * processes))
+            return [i for filenames in pool.map(self._save, paths, chunksize=chunksize) for i in filenames]
+
+    def _save(self, path):
+        """Writes the thumbnails of the file path."""
+        name = os.path.splitext(os.path.basename(path))[0]
+        return thumbnails(self._loadfile(path), self.savepath, name, self.size, self.log)
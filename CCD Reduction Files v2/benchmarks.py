@@ -0,0 +1,175 @@
+"""Benchmarks of the pipeline. Run this file to run all of them."""
+from Data import Data
+from FitsLoader import FitsLoader
+import FitsWriter
+import Renderer
+import Thumbnails
+from RawThumbnails import NpyThumbnails
+from RawReductionObject import NpyBias, NpyDark, NpyFlat
+from RawReducer import NpyReducer
+import precision
+
+from matplotlib import pyplot as plt
+import numpy as np
+import tempfile
+import json
+import time
+import os
+
+
+def _timed(function, repeat):
+    """Returns the fastest time of repeat calls of function in seconds."""
+    best = np.inf
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def fits_compression(shape=(1000, 1000), window=(slice(350, 651), slice(350, 651)), repeat=5):
+    """Compares reading uncompressed and tile compressed fits files of a
+    simulated uint16 frame (5000 +- 10 counts with a gaussian spot). Prints
+    the file size, the throughput in MB/s of raw pixels of a full read and
+    the time of reading window.
+    """
+    rng = np.random.default_rng(0)
+    y, x = np.indices(shape)
+    spot = 20000 * np.exp(-((y - shape[0] / 2)**2 + (x - shape[1] / 2)**2) / (2 * 50**2))
+    frame = (5000 + rng.normal(0, 10, shape) + rng.poisson(spot)).astype(np.uint16)
+    data = Data([frame], [1], [None])
+    megabytes = frame.nbytes / 1e6
+
+    print("compression  size (MB)  full read (MB/s)  window read (ms)")
+    with tempfile.TemporaryDirectory() as folder:
+        for compression in (None, ) + FitsWriter.COMPRESSIONS:
+            filename = os.path.join(folder, str(compression) + ".fits")
+            FitsWriter.write(data, filename, compression)
+            assert np.all(FitsLoader(filename).data.data()[0] == frame)
+            full = _timed(lambda: FitsLoader(filename).data.data(), repeat)
+            part = _timed(lambda: FitsLoader(filename, window=window).data.data(), repeat)
+            print("{:<11}  {:>9.2f}  {:>16.0f}  {:>16.2f}".format(str(compression), os.path.getsize(filename) / 1e6,
+                                                                  megabytes / full, part * 1e3))
+
+
+def figures(shape=(1000, 1000), count=10, processes=2):
+    """Compares the figures per second of saving count images of a
+    simulated frame the way imsave used to, with a new pyplot figure and
+    colorbar for every frame, with the Renderer on this thread and on
+    processes worker processes.
+    """
+    rng = np.random.default_rng(0)
+    y, x = np.indices(shape)
+    frame = 20000 * np.exp(-((y - shape[0] / 2)**2 + (x - shape[1] / 2)**2) / (2 * 50**2)) + rng.normal(0, 10, shape)
+    extent = [-0.5, shape[1] - 0.5, shape[0] - 0.5, -0.5]
+    options = {"data": frame, "extent": extent, "cmap": "jet", "xlabel": "x position", "ylabel": "y position",
+               "clabel": "Counts", "title": "Exposure Time =1", "suptitle": "Image of Data"}
+
+    with tempfile.TemporaryDirectory() as folder:
+        def pyplot():
+            for i in range(count):
+                fig = plt.figure(figsize=[15, 10.5])
+                ax = fig.add_subplot(111)
+                ax.set_title(options["title"])
+                im = ax.imshow(frame, extent=extent, cmap="jet", aspect="equal")
+                ax.set_xlabel(options["xlabel"])
+                ax.set_ylabel(options["ylabel"])
+                fig.colorbar(im, ax=ax).set_label(options["clabel"])
+                fig.suptitle(options["suptitle"])
+                fig.savefig(os.path.join(folder, "pyplot" + str(i) + ".png"))
+                plt.close(fig)
+
+        def tasks(name):
+            return [("image", options, os.path.join(folder, name + str(i) + ".png")) for i in range(count)]
+
+        def pool():
+            with Renderer.RenderPool(processes) as renderer:
+                renderer.render(tasks("pool"))
+
+        print("renderer               figures/s")
+        print("pyplot                 {:>9.2f}".format(count / _timed(pyplot, 1)))
+        print("Renderer               {:>9.2f}".format(count / _timed(lambda: Renderer.render(tasks("agg")), 1)))
+        print("RenderPool, {} workers  {:>9.2f}".format(processes, count / _timed(pool, 1)))
+
+
+def thumbnails(shape=(1000, 1000), count=100, size=128, processes=2):
+    """Measures the thumbnails per second of count uint16 frames of shape,
+    made from the arrays and from a folder of .npy files with and without
+    processes worker processes.
+    """
+    rng = np.random.default_rng(0)
+    frame = rng.integers(5000, 50000, shape, dtype=np.uint16)
+    with tempfile.TemporaryDirectory() as folder:
+        for i in range(count):
+            np.save(os.path.join(folder, "frame" + str(i) + ".npy"), frame)
+            with open(os.path.join(folder, "frame" + str(i) + ".json"), "w") as f:
+                json.dump({"exptime": 1}, f)
+        savepath = os.path.join(folder, "thumbnails")
+        os.mkdir(savepath)
+
+        def arrays():
+            for i in range(count):
+                Thumbnails.thumbnail(frame, os.path.join(savepath, "array" + str(i) + ".png"), size)
+
+        print("thumbnails             thumbnails/s")
+        print("arrays                 {:>12.1f}".format(count / _timed(arrays, 3)))
+        print("folder                 {:>12.1f}".format(
+            count / _timed(lambda: NpyThumbnails(folder, savepath, size).save(), 3)))
+        print("folder, {} workers      {:>12.1f}".format(
+            processes, count / _timed(lambda: NpyThumbnails(folder, savepath, size).save(processes), 3)))
+
+
+def _simulate(folder, shape, rng):
+    """Writes simulated uint16 .npy files to folder, 20 bias, 10 dark and
+    10 flat frames in bias, dark and flat and a science frame, and returns
+    the filename of the science frame.
+    """
+    def write(path, name, frame, exptime):
+        np.save(os.path.join(path, name + ".npy"), frame.astype(np.uint16))
+        with open(os.path.join(path, name + ".json"), "w") as f:
+            json.dump({"exptime": exptime}, f)
+
+    bias = 5000 + rng.normal(0, 3, shape)
+    flat = 1 + rng.normal(0, 0.05, shape)
+    for kind, count, exptime, signal in (("bias", 20, 0, 0), ("dark", 10, 10, 0.5 * 10), ("flat", 10, 1, 20000 * flat)):
+        os.mkdir(os.path.join(folder, kind))
+        for i in range(count):
+            frame = bias + rng.normal(0, 10, shape) + rng.poisson(signal, shape)
+            write(os.path.join(folder, kind), kind + str(i), frame, exptime)
+    write(folder, "science", bias + rng.normal(0, 10, shape) + rng.poisson(20000 * flat + 0.5 * 10), 10)
+    return os.path.join(folder, "science.npy")
+
+
+def precision_policy(shape=(1000, 1000)):
+    """Compares the calibrated science frame of the SINGLE and DOUBLE
+    precision policies, for simulated uint16 frames like the docstring of
+    precision describes. Prints the differences and returns them.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        science = _simulate(folder, shape, np.random.default_rng(0))
+        try:
+            for name in ("double", "single"):
+                precision.set_policy(name)
+                masterpath = os.path.join(folder, name) + "/"
+                os.mkdir(masterpath)
+                for cls, kind in ((NpyBias, "bias"), (NpyDark, "dark"), (NpyFlat, "flat")):
+                    cls(masterpath, os.path.join(folder, kind) + "/").create()
+                results[name] = np.array(NpyReducer(science, masterpath).data.data()[0], np.float64)
+        finally:
+            precision.set_policy(precision.DOUBLE)
+    difference = np.abs(results["single"] - results["double"])
+    relative = difference / np.abs(results["double"])
+    numbers = {"maximum absolute": difference.max(), "rms": np.sqrt(np.mean(difference**2)),
+               "maximum relative": relative.max(), "median relative": np.median(relative)}
+    print("single - double        difference")
+    for name, value in numbers.items():
+        print("{:<22} {:>10.1e}".format(name, value))
+    return numbers
+
+
+if __name__ == "__main__":
+    fits_compression()
+    figures()
+    thumbnails()
+    precision_policy()
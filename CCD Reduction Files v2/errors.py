@@ -5,6 +5,11 @@ class CCDBackFocalPlaneAnalyserError(Error):
     pass
 
 
+class CCDBatchReducerError(Error):
+    """Error object for CCDBatchReducer."""
+    pass
+
+
 class CCDFocusError(Error):
     """Error object for CCDFocus."""
     pass
@@ -14,6 +19,11 @@ class CCDFocusFitterError(Error):
     pass
 
 
+class CCDFolderIndexError(Error):
+    """Error object for CCDFolderIndex."""
+    pass
+
+
 class CCDFolderLaserReducerError(Error):
     """Error object for CCDFolderReducer."""
     pass
@@ -34,10 +44,30 @@ class CCDReductionObjectError(Error):
     pass
 
 
+class CalibrationPlanError(Error):
+    """Error object for CalibrationPlan."""
+    pass
+
+
+class CombinerError(Error):
+    """Error object for the combiners."""
+    pass
+
+
+class DataFileError(Error):
+    """Error object for DataFile."""
+    pass
+
+
 class FitsBackFocalPlaneAnalyserError(Error):
     pass
 
 
+class FitsBatchReducerError(Error):
+    """Error object for FitsBatchReducer."""
+    pass
+
+
 class FitsFocusError(Error):
     """Error object for FitsFocus."""
     pass
@@ -47,6 +77,11 @@ class FitsFocusFitterError(Error):
     pass
 
 
+class FitsFolderIndexError(Error):
+    """Error object for FitsFolderIndex."""
+    pass
+
+
 class FitsFolderLaserReducerError(Error):
     """Error object for CCDFolderReducer."""
     pass
@@ -72,6 +107,76 @@ class FitsReductionObjectError(Error):
     pass
 
 
+class FitsWriterError(Error):
+    """Error object for FitsWriter."""
+    pass
+
+
 class FocusGeneratorError(Error):
     """Error object for FocusGenerator."""
     pass
+
+
+class MasterCacheError(Error):
+    """Error object for MasterCache."""
+    pass
+
+
+class OutputManagerError(Error):
+    """Error object for OutputManager."""
+    pass
+
+
+class PrecisionPolicyError(Error):
+    """Error object for PrecisionPolicy."""
+    pass
+
+
+class PrefetcherError(Error):
+    """Error object for Prefetcher."""
+    pass
+
+
+class RawBatchReducerError(Error):
+    """Error object for RawBatchReducer and NpyBatchReducer."""
+    pass
+
+
+class RawFolderIndexError(Error):
+    """Error object for RawFolderIndex."""
+    pass
+
+
+class RawFolderLaserReducerError(Error):
+    """Error object for RawFolderLaserReducer."""
+    pass
+
+
+class RawLaserReducerError(Error):
+    """Error object for RawLaserReducer."""
+    pass
+
+
+class RawLoaderError(Error):
+    """Error object for RawLoader and NpyLoader."""
+    pass
+
+
+class RawReducerError(Error):
+    """Error object for RawReducer."""
+    pass
+
+
+class RawReductionObjectError(Error):
+    """Error object for RawReductionObject."""
+    pass
+
+
+class RendererError(Error):
+    """Error object for Renderer."""
+    pass
+
+
+class ThumbnailsError(Error):
+    """Error object for Thumbnails."""
+    pass
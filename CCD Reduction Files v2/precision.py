@@ -0,0 +1,94 @@
+"""The precision policy decides which dtypes are used in the pipeline.
+
+raw:
+        The dtype the FitsLoader converts the frames to. None keeps the
+        dtype of the file, so 16 bit camera data stays 16 bit integers until
+        it is calibrated.
+calibrated:
+        The dtype of the master bias, dark and flat and of the data returned
+        by CCDReducer.
+accumulate:
+        The dtype used for sums and means over whole frames, like the mean
+        of a flat.
+
+DOUBLE is the default and does everything in float64, like the pipeline
+always did. SINGLE keeps the raw integers and uses float32 for the masters
+and the calibrated data, which halves the memory and bandwidth of the
+masters and calibrated frames and quarters it for the raw frames.
+
+Accuracy of SINGLE compared to DOUBLE, for simulated 1000x1000 uint16
+frames (bias 5000 +- 10 counts, 20 bias, 10 dark and 10 flat frames, a 5%
+flat field and a science frame of about 20000 counts), as measured by
+benchmarks.precision_policy():
+        maximum absolute difference:    3.5e-3 counts
+        rms difference:                 1.1e-3 counts
+        maximum relative difference:    1.8e-7 (about 1.5 float32 ulp)
+        median relative difference:     3.8e-8
+The photon noise of the same frame is about 140 counts, so the difference
+is 5 orders of magnitude below the noise.
+
+Use set_policy(SINGLE) or set_policy("single") before creating the masters
+and reducing the files. Masters created with a different policy are
+converted when they are used.
+"""
+from errors import PrecisionPolicyError
+
+import contextlib
+import numpy as np
+
+
+class PrecisionPolicy(object):
+    """Holds the dtypes used for raw, calibrated and accumulated data."""
+
+    def __init__(self, raw, calibrated, accumulate):
+        try:
+            assert raw is None or np.dtype(raw).kind in "iuf", "raw must be None or a numeric dtype"
+            assert np.dtype(calibrated).kind == "f", "calibrated must be a float dtype"
+            assert np.dtype(accumulate).kind == "f", "accumulate must be a float dtype"
+        except (AssertionError, TypeError) as excep:
+            raise PrecisionPolicyError(excep) from excep
+        self.raw = None if raw is None else np.dtype(raw)
+        self.calibrated = np.dtype(calibrated)
+        self.accumulate = np.dtype(accumulate)
+
+    def __repr__(self):
+        return "PrecisionPolicy(" + repr(self.raw) + ", " + repr(self.calibrated) + ", " +\
+            repr(self.accumulate) + ")"
+
+
+DOUBLE = PrecisionPolicy(np.float64, np.float64, np.float64)
+SINGLE = PrecisionPolicy(None, np.float32, np.float64)
+
+_policies = {"double": DOUBLE, "single": SINGLE}
+_policy = DOUBLE
+
+
+def set_policy(policy):
+    """Sets the precision policy of the whole pipeline. policy is a
+    PrecisionPolicy or one of the names "double" and "single".
+    """
+    global _policy
+    if isinstance(policy, str) and policy.lower() in _policies:
+        policy = _policies[policy.lower()]
+    if not isinstance(policy, PrecisionPolicy):
+        raise PrecisionPolicyError("policy must be a PrecisionPolicy, 'double' or 'single'")
+    _policy = policy
+
+
+def get_policy():
+    """Returns the current precision policy."""
+    return _policy
+
+
+@contextlib.contextmanager
+def using_policy(policy):
+    """Sets policy inside the with block and restores the previous policy
+    after it. The workers of process pools run with the policy of their
+    parent like this, which processes started with spawn do not inherit.
+    """
+    previous = _policy
+    set_policy(policy)
+    try:
+        yield
+    finally:
+        set_policy(previous)
@@ -0,0 +1,77 @@
+from RawBatchReducer import NpyBatchReducer
+from RawReductionObject import NpyBias, NpyFlat
+from RawReducer import NpyReducer
+from RawFolderIndex import NpyFolderIndex
+from FitsLoader import FitsLoader
+from precision import DOUBLE
+from errors import RawBatchReducerError
+from astropy.io import fits
+import numpy as np
+import pytest
+import json
+
+
+def write(folder, name, frames, exptime):
+    np.save(str(folder / name), frames)
+    with open(str(folder / (name[:-4] + ".json")), "w") as f:
+        json.dump({"exptime": exptime}, f)
+    return str(folder / name)
+
+
+@pytest.fixture
+def folder(tmp_path):
+    rng = np.random.default_rng(0)
+    for kind in ("bias", "flat", "frames"):
+        (tmp_path / kind).mkdir()
+    for i in range(3):
+        write(tmp_path / "bias", "bias" + str(i) + ".npy", rng.integers(90, 110, (2, 12, 10)), 0)
+        write(tmp_path / "flat", "flat" + str(i) + ".npy", rng.integers(900, 1100, (2, 12, 10)), [1, 1])
+    NpyBias(str(tmp_path) + "/", str(tmp_path / "bias") + "/").create()
+    NpyFlat(str(tmp_path) + "/", str(tmp_path / "flat") + "/").create()
+    for i in range(7):
+        write(tmp_path / "frames", "frame" + str(i) + ".npy", rng.integers(1000, 2000, (2, 12, 10)),
+              [1, 2] if i != 4 else [3, 2])
+    return tmp_path
+
+
+@pytest.mark.parametrize("workers", (None, 2))
+@pytest.mark.parametrize("memory", (2**27, 3000))
+def test_batch(folder, workers, memory):
+    masterpath = str(folder) + "/"
+    paths = NpyFolderIndex(str(folder / "frames") + "/").paths()
+    expected = [NpyReducer(i, masterpath).data for i in paths]
+
+    class Batch(NpyBatchReducer):
+        block_memory = memory
+    reduced = list(Batch(str(folder / "frames") + "/", masterpath, workers=workers))
+    assert len(reduced) == len(expected)
+    for i, j in zip(reduced, expected):
+        assert i.time() == j.time()
+        assert np.array_equal(i.stack(), j.stack())
+
+    window = (slice(2, 9), slice(3, 7))
+    reduced = list(Batch(paths[:3], masterpath, window, workers))
+    for i, path in zip(reduced, paths):
+        assert np.array_equal(i.stack(), NpyReducer(path, masterpath, window=window).data.stack())
+
+
+def test_errors(folder):
+    with pytest.raises(RawBatchReducerError):
+        NpyBatchReducer([str(folder / "frames" / "frame0.npy")], str(folder) + "/", workers=0)
+    single = write(folder, "single.npy", np.ones((12, 10)), 1)
+    with pytest.raises(RawBatchReducerError):
+        list(NpyBatchReducer([single], str(folder) + "/"))
+
+
+def test_save(folder):
+    masterpath = str(folder) + "/"
+    (folder / "reduced").mkdir()
+    batch = NpyBatchReducer(str(folder / "frames") + "/", masterpath)
+    written = batch.save(str(folder / "reduced") + "/", compression="GZIP_2", dtype=np.float32)
+    assert len(written) == 7 and written[0].endswith("frame0_reduced.fits")
+    for filename, path in zip(written, batch.paths):
+        loaded = FitsLoader(filename, DOUBLE).data
+        expected = NpyReducer(path, masterpath).data
+        assert loaded.time() == expected.time()
+        assert np.array_equal(loaded.stack(), expected.stack().astype(np.float32))
+    assert fits.getheader(written[0])["CALBIAS"] == NpyBias(masterpath).load().fingerprint()
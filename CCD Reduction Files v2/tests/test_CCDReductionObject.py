@@ -2,6 +2,8 @@ from CCDReductionObject import CCDReductionObject, CCDBias, CCDDark, CCDFlat, CC
 from Data import Data
 import numpy as np
 import pytest
+import copyreg
+import pickle
 
 
 def test_init_RO():
@@ -50,3 +52,33 @@ def test_createdark():
 
 def test_createflat():
     pass
+
+
+class BaselineData(object):
+    """Pickles like a Data object of the first version, which only had the
+    tuple of data-arrays, the times, ids, rest and shape.
+    """
+
+    def __init__(self, frames, time, id):
+        self.state = {"_Data__data": tuple(frames), "_Data__time": tuple(time), "_Data__id": tuple(id),
+                      "shape": tuple(i.shape for i in frames), "_Data__rest": None}
+
+    def __reduce__(self):
+        return copyreg._reconstructor, (Data, object, None), self.state
+
+
+def test_save_load_RO(tmp_path):
+    path = str(tmp_path) + "/"
+    f = CCDReductionObject(path)
+    frames = [np.random.random((10, 10)), np.random.random((10, 10))]
+    x = Data(frames, [1, 2], [None, None])
+    with open(path + "old.pcl", "wb") as p:
+        pickle.dump(BaselineData(frames, [1, 2], [None, None]), p)
+    old = f.load("old")
+    assert old.stack().shape == (2, 10, 10)
+    assert old.fingerprint() == x.fingerprint()
+    assert old == x
+    assert old.maximums() == x.maximums()
+    f._save_object(x, "new")
+    assert f.load("new") == x
+    assert not f.load("new").writeable()
@@ -0,0 +1,67 @@
+from CalibrationPlan import CalibrationPlan, get_plan, clear_plans
+from errors import CalibrationPlanError
+from Data import Data
+import numpy as np
+import pytest
+
+
+def masters(shape=(2, 30, 20)):
+    rng = np.random.default_rng(0)
+    bias = Data(rng.normal(500, 5, shape), [0] * shape[0], [None] * shape[0])
+    dark = Data(rng.normal(1, 2, shape), [1] * shape[0], [None] * shape[0])
+    flat = Data(rng.normal(1, 0.05, shape), [1] * shape[0], [None] * shape[0])
+    return bias, dark, flat
+
+
+def test_plan():
+    bias, dark, flat = masters()
+    raw = Data(np.random.default_rng(1).integers(1000, 5000, (2, 30, 20)).astype(np.uint16), [2.5, 4], [None, None])
+    clipped = Data([np.maximum(i, 0) for i in dark.data()], dark.time(), dark.id())
+    expected = (raw - bias - clipped) / flat
+    reduced = CalibrationPlan(bias, dark, flat, raw.time(), raw.shape, np.float64).apply(raw)
+    assert reduced.time() == expected.time()
+    assert np.allclose(reduced.stack(), expected.stack(), rtol=1e-15, atol=0)
+
+    only = CalibrationPlan(None, None, None, raw.time(), raw.shape, np.float32).apply(raw)
+    assert only.stack().dtype == np.float32
+    assert np.all(only.stack() == raw.stack())
+    with pytest.raises(CalibrationPlanError):
+        CalibrationPlan(bias[0], None, None, raw.time(), raw.shape, np.float64)
+
+
+def test_cache():
+    clear_plans()
+    bias, dark, flat = masters((1, 30, 20))
+    plan = get_plan(bias, dark, flat, [1], ((30, 20), ))
+    assert get_plan(bias, dark, flat, [1], ((30, 20), )) is plan
+    assert get_plan(bias, dark, flat, [2], ((30, 20), )) is not plan
+    window = (slice(5, 10), slice(0, 20))
+    part = get_plan(bias, dark, flat, [1], ((5, 20), ), window=window)
+    assert np.array_equal(part.offset[0], plan.offset[0][window])
+
+
+def baseline(data, bias, dark, flat):  # CCDReducer._science before the plans
+    if bias is None:
+        bias = Data([np.zeros(i) for i in data.shape], [0] * len(data), [None] * len(data))
+    if dark is None:
+        dark = Data([np.zeros(i) for i in data.shape], [1] * len(data), [None] * len(data))
+    else:
+        dark = Data([np.where(i < 0, 0, i) for i in dark.data()], dark.time(), dark.id())
+    if flat is None:
+        flat = Data([np.ones(i) for i in data.shape], [1] * len(data), [None] * len(data))
+    return (data - bias - dark) / flat
+
+
+def test_baseline():
+    bias, dark, flat = masters()
+    assert np.any(dark.stack() < 0)
+    rng = np.random.default_rng(2)
+    for time in ([0.5, 3], [2.5, 4], [10, 0.1]):
+        raws = [Data(rng.integers(1000, 5000, (2, 30, 20)).astype(np.uint16), time, [None, None]) for i in range(3)]
+        for used in ((bias, dark, flat), (None, dark, None), (bias, None, flat), (None, None, None)):
+            plan = CalibrationPlan(*used, time, raws[0].shape, np.float64)
+            for raw, reduced in zip(raws, plan.apply_many(raws)):
+                expected = baseline(raw, *used)
+                for result in (plan.apply(raw), reduced):
+                    assert result.time() == expected.time()
+                    assert np.allclose(result.stack(), expected.stack(), rtol=1e-15, atol=0)
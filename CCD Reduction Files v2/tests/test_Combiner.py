@@ -0,0 +1,260 @@
+from Combiner import MedianCombiner, ClippedMeanCombiner, MinMaxCombiner, MeanCombiner
+from RawReductionObject import NpyBias, NpyDark, NpyFlat
+from CCDReductionObject import CCDReductionObject
+import DataFile
+from errors import RawReductionObjectError, CombinerError
+from precision import PrecisionPolicy, using_policy
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+import numpy as np
+import pytest
+import weakref
+import json
+import os
+
+
+@pytest.mark.parametrize("files", (6, 7))
+@pytest.mark.parametrize("dtype", (np.uint16, np.float32, np.float64))
+def test_median(files, dtype):
+    rng = np.random.default_rng(files)
+    frames = [(rng.normal(1000, 30, (2, 37, 23))).astype(dtype) for i in range(files)]
+    expected = [np.median([j[i] for j in frames], axis=0) for i in range(2)]
+    for memory in (None, 2**30, 5000, 1):
+        with MedianCombiner(memory) as combiner:
+            for i in frames:
+                combiner.append(tuple(i))
+            masters = combiner.combine()
+        assert all(i.dtype == j.dtype and np.array_equal(i, j) for i, j in zip(masters, expected))
+
+
+def test_build():
+    combiner = MedianCombiner()
+    combiner.append((np.zeros((3, 4)), ))
+    with pytest.raises(CombinerError):
+        combiner.append((np.zeros((3, 5)), ))
+    with pytest.raises(CombinerError):
+        combiner.append((np.zeros((3, 4)), np.zeros((3, 4))))
+    with pytest.raises(CombinerError):
+        MedianCombiner().combine()
+
+
+def test_create(tmp_path):
+    (tmp_path / "dark").mkdir()
+    rng = np.random.default_rng(0)
+    for i in range(5):
+        np.save(str(tmp_path / "dark" / ("dark" + str(i) + ".npy")), rng.integers(0, 1000, (40, 30)))
+        with open(str(tmp_path / "dark" / ("dark" + str(i) + ".json")), "w") as f:
+            json.dump({"exptime": 2}, f)
+    masterpath = str(tmp_path) + "/"
+    NpyDark(masterpath, str(tmp_path / "dark") + "/").create()
+    expected = NpyDark(masterpath).load().data()[0].copy()
+
+    class SmallDark(NpyDark):
+        combine_memory = 3000
+    SmallDark(masterpath, str(tmp_path / "dark") + "/").create()
+    assert np.array_equal(NpyDark(masterpath).load().data()[0], expected)
+
+
+@pytest.mark.parametrize("combiner", (MedianCombiner, ClippedMeanCombiner))
+def test_pool(combiner):
+    rng = np.random.default_rng(2)
+    frames = rng.normal(100, 1, (9, 2, 37, 23))
+    frames[2, 0, 5, 6] = 1000
+    with combiner() as serial:
+        for i in frames:
+            serial.append(tuple(i))
+        expected = serial.combine()
+    for pool in (ThreadPoolExecutor(3), ProcessPoolExecutor(2)):
+        with pool, combiner(5000) as parallel:
+            for i in frames:
+                parallel.append(tuple(i))
+            assert all(np.array_equal(i, j) for i, j in zip(parallel.combine(pool), expected))
+            assert parallel.rejected is None or \
+                all(np.array_equal(i, j) for i, j in zip(parallel.rejected, serial.rejected))
+
+
+class PoolBias(NpyBias):
+    processes = 2
+
+
+class ClippedFlat(NpyFlat):
+    combine_mode = "sigmaclip"
+
+
+class PoolFlat(ClippedFlat):
+    processes = 2
+
+
+def test_processes(tmp_path):
+    rng = np.random.default_rng(3)
+    for kind in ("bias", "flat"):
+        (tmp_path / kind).mkdir()
+        for i in range(5):
+            np.save(str(tmp_path / kind / (kind + str(i) + ".npy")), rng.integers(1000, 2000, (40, 30)))
+            with open(str(tmp_path / kind / (kind + str(i) + ".json")), "w") as f:
+                json.dump({"exptime": 1}, f)
+    masterpath = str(tmp_path) + "/"
+    NpyBias(masterpath, str(tmp_path / "bias") + "/").create()
+    bias = NpyBias(masterpath).load().data()[0].copy()
+    ClippedFlat(masterpath, str(tmp_path / "flat") + "/").create()
+    flat = NpyFlat(masterpath).load().data()[0].copy()
+
+    PoolBias(masterpath, str(tmp_path / "bias") + "/").create()
+    assert np.array_equal(NpyBias(masterpath).load().data()[0], bias)
+    PoolFlat(masterpath, str(tmp_path / "flat") + "/").create()
+    assert np.array_equal(NpyFlat(masterpath).load().data()[0], flat)
+
+
+class SpawnFlat(ClippedFlat):
+    processes = 2
+
+    def _pool(self):
+        return ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+
+
+def test_spawn(tmp_path):
+    rng = np.random.default_rng(4)
+    (tmp_path / "flat").mkdir()
+    for i in range(5):
+        np.save(str(tmp_path / "flat" / ("flat" + str(i) + ".npy")), rng.integers(1000, 2000, (40, 30)))
+        with open(str(tmp_path / "flat" / ("flat" + str(i) + ".json")), "w") as f:
+            json.dump({"exptime": 1}, f)
+    masterpath = str(tmp_path) + "/"
+    with using_policy(PrecisionPolicy(None, np.float32, np.float32)):
+        ClippedFlat(masterpath, str(tmp_path / "flat") + "/").create()
+        flat = NpyFlat(masterpath).load().data()[0].copy()
+        SpawnFlat(masterpath, str(tmp_path / "flat") + "/").create()
+        master = NpyFlat(masterpath).load().data()[0]
+        assert master.dtype == flat.dtype == np.float32
+        assert np.array_equal(master, flat)
+
+
+def test_clipped_mean():
+    rng = np.random.default_rng(1)
+    frames = rng.normal(100, 1, (20, 30, 40))
+    frames[3, 5, 6] = 1000
+    frames[7, 5, 6] = -500
+    for memory in (None, 1):
+        with ClippedMeanCombiner(memory, sigma=3, iterations=10) as combiner:
+            for i in frames:
+                combiner.append((i, ))
+            master = combiner.combine()[0]
+            rejected = combiner.rejected[0]
+        assert rejected[5, 6] >= 2
+        keep = np.ones(20, bool)
+        keep[[3, 7]] = False
+        assert abs(master[5, 6] - frames[keep, 5, 6].mean()) < 1
+        assert np.median(rejected) == 0
+        used = rejected == 0
+        assert np.allclose(master[used], frames.mean(axis=0)[used])
+
+
+def test_minmax():
+    rng = np.random.default_rng(2)
+    frames = rng.integers(0, 1000, (9, 6, 7)).astype(np.uint16)
+    combiner = MinMaxCombiner(nlow=2, nhigh=1)
+    for i in frames:
+        combiner.append((i, ))
+    ordered = np.sort(frames, axis=0)
+    assert np.allclose(combiner.combine()[0], ordered[2:-1].mean(axis=0))
+    assert np.all(combiner.rejected[0] == 3)
+    with pytest.raises(CombinerError):
+        MinMaxCombiner(nlow=2, nhigh=1).combine()
+    with pytest.raises(CombinerError):
+        MinMaxCombiner(nlow=-1)
+    with pytest.raises(CombinerError):
+        ClippedMeanCombiner(sigma=0)
+
+
+def test_create_modes(tmp_path):
+    (tmp_path / "bias").mkdir()
+    rng = np.random.default_rng(3)
+    frames = rng.integers(90, 110, (6, 8, 9))
+    for i in range(6):
+        np.save(str(tmp_path / "bias" / ("bias" + str(i) + ".npy")), frames[i])
+        with open(str(tmp_path / "bias" / ("bias" + str(i) + ".json")), "w") as f:
+            json.dump({"exptime": 0}, f)
+    masterpath = str(tmp_path) + "/"
+
+    class MinMaxBias(NpyBias):
+        combine_mode = "minmax"
+    MinMaxBias(masterpath, str(tmp_path / "bias") + "/").create()
+    assert np.allclose(NpyBias(masterpath).load().data()[0], np.sort(frames, axis=0)[1:-1].mean(axis=0))
+    assert np.all(NpyBias(masterpath).load_rejected().data()[0] == 2)
+    NpyBias(masterpath, str(tmp_path / "bias") + "/").create()
+    assert NpyBias(masterpath).load_rejected() is None
+
+    class WrongBias(NpyBias):
+        combine_mode = "average"
+    with pytest.raises(RawReductionObjectError):
+        WrongBias(masterpath, str(tmp_path / "bias") + "/").create()
+
+    for mode, options in (("minmax", {"nlow": -1}), ("minmax", {"nlow": 3, "nhigh": 3}), ("sigmaclip", {"sigma": 0})):
+        class OptionsBias(NpyBias):
+            combine_mode = mode
+            combine_options = options
+        with pytest.raises(RawReductionObjectError):
+            OptionsBias(masterpath, str(tmp_path / "bias") + "/").create()
+
+
+def test_mean_state():
+    rng = np.random.default_rng(4)
+    frames = rng.normal(5000, 10, (5, 6, 7))
+    combiner = MeanCombiner()
+    for i in frames[:3]:
+        combiner.append((i, ))
+    restored = MeanCombiner.from_state(combiner.state(), len(combiner))
+    for i in frames[3:]:
+        restored.append((i, ))
+    restored.remove((frames[1], ))
+    keep = frames[[0, 2, 3, 4]]
+    assert np.allclose(restored.combine()[0], keep.mean(axis=0))
+    assert np.allclose(restored.std()[0], keep.std(axis=0))
+
+
+def test_update(tmp_path, monkeypatch):
+    (tmp_path / "bias").mkdir()
+    folder = str(tmp_path / "bias") + "/"
+    masterpath = str(tmp_path) + "/"
+    rng = np.random.default_rng(5)
+    frames = rng.integers(90, 110, (6, 8, 9))
+
+    def write(i):
+        np.save(folder + "bias" + str(i) + ".npy", frames[i])
+        with open(folder + "bias" + str(i) + ".json", "w") as f:
+            json.dump({"exptime": 0}, f)
+
+    class MeanBias(NpyBias):
+        combine_mode = "mean"
+    for i in range(3):
+        write(i)
+    MeanBias(masterpath, folder).create()
+    master = MeanBias(masterpath).load()
+    assert sorted(master.rest()["sources"]) == ["bias0.npy", "bias1.npy", "bias2.npy"]
+
+    loaded = []
+    original = NpyBias._loadfile
+    monkeypatch.setattr(NpyBias, "_loadfile", staticmethod(lambda file: loaded.append(file) or original(file)))
+    for i in range(3, 6):
+        write(i)
+    MeanBias(masterpath, folder).update(bad=["bias1.npy"])
+    assert sorted(os.path.basename(i) for i in loaded) == ["bias1.npy", "bias3.npy", "bias4.npy", "bias5.npy"]
+    master = MeanBias(masterpath).load()
+    assert np.allclose(master.data()[0], frames[[0, 2, 3, 4, 5]].mean(axis=0))
+    assert master.rest()["bad"] == ["bias1.npy"]
+    assert "bias1.npy" not in master.rest()["sources"]
+
+    del loaded[:]
+    maps = [weakref.ref(CCDReductionObject.load(MeanBias(masterpath), i).stack())
+            for i in ("master_bias", "master_bias_state")]
+    del master
+    save, released = DataFile.save, []
+    monkeypatch.setattr(DataFile, "save", lambda data, filename: released.append([i() is None for i in maps]) or
+                        save(data, filename))
+    MeanBias(masterpath, folder).update()
+    assert loaded == []
+    assert released == [[True, True]] * 2
+    os.remove(folder + "bias0.npy")
+    NpyBias(masterpath, folder).update()
+    assert len(loaded) == 4
+    assert np.array_equal(NpyBias(masterpath).load().data()[0], np.median(frames[[2, 3, 4, 5]], axis=0))
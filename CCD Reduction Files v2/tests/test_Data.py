@@ -294,3 +294,257 @@ def test_pow():
 
     with pytest.raises(DataError):
         x ** 3.4
+
+
+def test_stack():
+    x = Data(data1, time1, iden1)
+    assert x.stack().shape == (1, 2, 2)
+    assert x.stack().flags["C_CONTIGUOUS"]
+    assert np.shares_memory(x.data()[0], x.stack())
+
+    x = Data(data2, time2, iden2)
+    assert x.stack() is None
+
+    cube = np.random.random((3, 4, 5))
+    x = Data(cube, [1, 2, 3], [None] * 3)
+    assert x.stack() is cube
+    assert np.shares_memory(x[1].data()[0], cube)
+    assert x[-1] == Data([cube[2]], [3], [None])
+    assert x[1:] == Data([cube[1], cube[2]], [2, 3], [None, None])
+
+
+def test_stacked_arithmetic():
+    frames = [np.random.random((4, 5)) for i in range(3)]
+    times = [1, 2.5, 4]
+    x = Data(frames, times, [None] * 3)
+    y = Data([i * 3 for i in frames], [0, 5, 2], [None] * 3)
+    expected = [frames[0] + frames[0] * 3,
+                frames[1] + frames[1] * 3 * 2.5 / 5,
+                frames[2] + frames[2] * 3 * 4 / 2]
+    assert x + y == Data(expected, times, [None] * 3)
+    assert (x / x.time()).time() == (1, 1, 1)
+    assert np.all((x / x.time()).stack() == np.array([frames[i] / times[i] for i in range(3)]))
+    assert x * (1, 2, 3) == Data([frames[0], frames[1] * 2, frames[2] * 3], [1, 5.0, 12], [None] * 3)
+
+
+def test_frame_dimensions():
+    for shape in ((2, ), (3, 4, 2)):
+        frames = [np.random.random(shape) + 1 for i in range(2)]
+        x = Data(frames, [1, 2], [None, None])
+        assert x / x.time() == Data([frames[0], frames[1] / 2], [1, 1.0], [None, None])
+        assert x / x.time() == (x.lazy() / x.time()).evaluate()
+        assert x * [3, 4] == Data([frames[0] * 3, frames[1] * 4], [3, 8], [None, None])
+        assert x * [3, 4] == (x.lazy() * [3, 4]).evaluate()
+        x /= [2, 4]
+        assert x == Data([frames[0] / 2, frames[1] / 4], [0.5, 0.5], [None, None])
+    x = Data([np.array([2., 3.]), np.array([4., 5.])], [1, 2], [None, None]) / (1, 2)
+    assert np.all(x.data()[0] == [2, 3]) and np.all(x.data()[1] == [2, 2.5])
+
+
+def test_inplace():
+    frames = [np.random.random((4, 5)) for i in range(2)]
+    x = Data(frames, [2, 4], [None] * 2)
+    y = Data([np.ones((4, 5))] * 2, [1, 1], [None] * 2)
+    expected = (x - y) / 2
+    stack = x.stack()
+    z = x
+    z -= y
+    z /= 2
+    assert z is x
+    assert x.stack() is stack
+    assert x == expected
+    assert x.time() == (1, 2)
+
+    x = Data([np.array([[1, 2], [3, 4]])], [1], [None])
+    stack = x.stack()
+    x /= 2
+    assert x.stack() is not stack
+    assert x == Data([np.array([[0.5, 1], [1.5, 2]])], [0.5], [None])
+
+    x = Data(data2, time2, iden2)
+    x *= 2
+    assert x == Data([data2[0] * 2, data2[1] * 2], [time2[0] * 2, time2[1] * 2], iden2)
+    with pytest.raises(DataError):
+        x += 1
+
+    frame = np.ones((4, 5))
+    x = Data([frame], [1], [None])
+    x *= 2
+    assert np.all(frame == 1)
+    stack = x.stack()
+    x *= 2
+    assert x.stack() is stack
+    assert np.all(x.stack() == 4)
+
+
+def test_out():
+    frames = [np.random.random((4, 5)) for i in range(2)]
+    x = Data(frames, [2, 4], [None] * 2)
+    y = Data([np.ones((4, 5))] * 2, [1, 1], [None] * 2)
+    out = np.empty((2, 4, 5))
+    z = x.subtract(y, out=out)
+    assert z.stack() is out
+    assert z == x - y
+    z = z.divide(z.time(), out=out)
+    assert z.stack() is out
+    assert z == (x - y) / (x - y).time()
+
+    with pytest.raises(DataError):
+        x.add(y, out=np.empty((2, 4, 4)))
+    with pytest.raises(DataError):
+        x.multiply(2.5, out=np.empty((2, 4, 5), dtype=np.int64))
+    with pytest.raises(DataError):
+        Data(data2, time2, iden2).multiply(2, out=np.empty((2, 2, 2)))
+
+
+def test_no_copy(tmp_path):
+    cube = np.random.random((3, 4, 5))
+    x = Data(tuple(cube[1:]), [1, 2], [None, None])
+    assert np.shares_memory(x.stack(), cube)
+    assert x.writeable()
+
+    frame = np.arange(20.).reshape(4, 5)
+    frame.setflags(write=False)
+    x = Data([frame], [1], [None])
+    assert np.shares_memory(x.stack(), frame)
+    assert not x.writeable()
+    x -= Data([np.ones((4, 5))], [0], [None])
+    assert not np.shares_memory(x.stack(), frame)
+    assert np.all(frame == np.arange(20.).reshape(4, 5))
+
+    filename = str(tmp_path / "frames.dat")
+    maps = []
+    for i in range(2):
+        m = np.memmap(filename, np.float64, "w+", offset=i * 8 * 25, shape=(5, 5))
+        m[:] = i
+        maps.append(m)
+    x = Data(maps, [1, 1], [None, None])
+    assert x.stack() is None
+    assert np.shares_memory(x.data()[1], maps[1])
+    x *= 2
+    assert np.all(maps[1] == 1)
+    assert np.all(x.data()[1] == 2)
+
+
+def test_astype():
+    x = Data(data1, time1, iden1, rest)
+    assert x.astype(x.data()[0].dtype) is x
+    y = x.astype(np.float32)
+    assert y.data()[0].dtype == np.float32
+    assert y.rest() == rest
+    assert y.astype(np.float32) is y
+    y = Data(data2, time2, iden2).astype(np.float32)
+    assert y.data()[1].dtype == np.float32
+
+
+def test_describe():
+    x = Data(data1, time1, iden1)
+    stats = x.describe()[0]
+    assert stats["min"] == 1 and stats["max"] == 4
+    assert stats["mean"] == 7 / 4
+    assert "median" not in stats
+    assert x.describe(median=True)[0]["median"] == 1
+
+    frames = np.random.random((3, 300, 200)) * 100 + 1e4
+    x = Data(frames, [1, 1, 1], [None] * 3)
+    x.statsblock = 5000
+    stats = x.describe(median=True)
+    for i in range(3):
+        f = frames[i]
+        assert stats[i]["min"] == f.min() and stats[i]["max"] == f.max()
+        assert stats[i]["median"] == np.median(f)
+        assert np.isclose(stats[i]["mean"], f.mean(), rtol=1e-14)
+        assert np.isclose(stats[i]["variance"], f.var(), rtol=1e-12)
+        assert np.isclose(stats[i]["skewness"], np.mean(((f - f.mean()) / f.std())**3), rtol=1e-9)
+        assert np.isclose(stats[i]["kurtosis"], np.mean(((f - f.mean()) / f.std())**4), rtol=1e-9)
+
+
+def test_describe_cache():
+    frames = np.random.random((2, 10, 10))
+    x = Data(frames, [1, 1], [None] * 2)
+    assert x.describe() is not x.describe()
+    x.maximums()
+    frames[0, 0, 0] = 5
+    assert x.maximums()[0] == 5
+    x.data()[1][0, 0] = 7
+    assert x.maximums()[1] == 7
+    x *= 2
+    assert x.maximums()[0] == 10
+
+    frames = np.random.random((2, 10, 10))
+    view = frames.view()
+    view.flags.writeable = False
+    x = Data(view, [1, 1], [None] * 2)
+    x.maximums()
+    frames[0, 0, 0] = 5
+    assert x.maximums()[0] == 5
+    frames.flags.writeable = False
+    x = Data(frames, [1, 1], [None] * 2)
+    assert x.describe()[0] is x.describe()[0]
+
+    x = Data(np.random.random((2, 10, 10)), [1, 1], [None] * 2)
+    maximums = x.maximums()
+    y = x[0:1]
+    y.multiply(4, out=y.stack())
+    assert x.maximums() == (maximums[0] * 4, maximums[1])
+    window = x.window((slice(0, 5), slice(0, 5)))
+    window.maximums()
+    x.window((slice(0, 2), slice(0, 2))).data()[1][0, 0] = 9
+    x.window((slice(0, 2), slice(0, 2))).invalidate()
+    assert x.maximums()[1] == 9 and window.maximums()[1] == 9
+
+
+def test_fingerprint():
+    x = Data(data2, time2, iden2)
+    y = Data([data2[0].astype(np.float32), data2[1] * 1.0], [1.0, 5.3], iden2)
+    assert x.fingerprint() == y.fingerprint()
+    with pytest.raises(TypeError):
+        hash(x)
+    assert x.fingerprint() != Data(data2, time2, ["bla", "bla"]).fingerprint()
+    assert x.fingerprint() != Data(data2, [2, 5.3], iden2).fingerprint()
+    assert (x ** 2)[2:].fingerprint() == x.fingerprint()
+    assert x[1] == Data([data2[1]], [5.3], ["bloblo"])
+
+    z = Data([np.array([0.0, -0.0])], [1], [None])
+    assert z == Data([np.array([-0.0, 0])], [1], [None])
+    z = Data([np.array([np.nan, 1])], [1], [None])
+    assert z != z
+
+    frames = np.random.random((2, 10, 10))
+    x = Data(frames, [1, 1], [None] * 2)
+    y = Data(frames.copy(), [1, 1], [None] * 2)
+    assert x == y
+    x /= 2
+    assert x != y
+
+    x = Data(np.random.random((2, 10, 10)), [1, 1], [None] * 2)
+    y = Data(x.stack().copy(), [1, 1], [None] * 2)
+    fingerprint = x.fingerprint()
+    assert x == y
+    part = x[0:1]
+    part.multiply(2, out=part.stack())
+    assert x.fingerprint() != fingerprint
+    assert x != y
+    assert x == Data(np.stack([y.data()[0] * 2, y.data()[1]]), [1, 1], [None] * 2)
+
+
+def test_window():
+    stack = np.arange(2 * 4 * 5.).reshape(2, 4, 5)
+    data = Data(stack, [1, 2], [None, None])
+    part = data.window((slice(1, 3), slice(0, 4)))
+    assert part.shape == ((2, 4), (2, 4))
+    assert part.time() == (1, 2)
+    assert np.shares_memory(part.stack(), stack)
+    assert np.all(part.data()[1] == stack[1, 1:3, 0:4])
+    assert data.window(None) is data
+    with pytest.raises(DataError):
+        data.window((slice(1, 3), slice(0, 4), slice(0, 1), 1))
+
+    fingerprint, maximums = data.fingerprint(), data.maximums()
+    part *= 2
+    assert data.fingerprint() == fingerprint and np.all(stack[1, 1:3, 0:4] != part.data()[1])
+    part = data.window((slice(2, 4), slice(3, 5)))
+    part.multiply(10, out=part.stack())
+    assert data.fingerprint() != fingerprint
+    assert data.maximums() == (maximums[0] * 10, maximums[1] * 10)
+
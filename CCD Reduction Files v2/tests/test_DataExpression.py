@@ -0,0 +1,60 @@
+from Data import Data, DataError
+from DataExpression import DataExpression
+import numpy as np
+import pytest
+
+shape = (3, 40, 30)
+raw = Data(np.random.randint(0, 2**16, shape).astype(np.uint16), [2, 3.5, 1], [None] * 3)
+bias = Data(np.random.random(shape), [0, 0, 0], [None] * 3)
+dark = Data(np.random.random(shape), [1, 0, 1], [None] * 3)
+flat = Data(np.random.random(shape) + 0.5, [1, 1, 1], [None] * 3)
+
+
+def test_creation():
+    x = raw.lazy()
+    assert isinstance(x, DataExpression)
+    assert x.shape == raw.shape
+    assert len(x) == 3
+    with pytest.raises(DataError):
+        DataExpression(1)
+
+
+def test_deferred():
+    frames = np.ones(shape)
+    x = Data(frames, [1, 1, 1], [None] * 3)
+    y = x.lazy() * 2
+    frames[0, 0, 0] = 5
+    assert y.data()[0][0, 0] == 10
+    assert y.evaluate() is y.evaluate()
+
+
+def test_equal_to_eager():
+    eager = (raw - bias - dark * 2) / flat * (1, 2, 3) / 2.5
+    lazy = (raw.lazy() - bias - dark.lazy() * 2) / flat * (1, 2, 3) / 2.5
+    assert lazy.time() == eager.time()
+    assert lazy.stack().dtype == eager.stack().dtype
+    assert lazy.evaluate() == eager
+
+    for dtype in [np.float32, np.int64]:
+        x = Data(raw.stack().astype(dtype), raw.time(), raw.id())
+        y = Data((flat.stack() * 10).astype(dtype), flat.time(), flat.id())
+        assert ((x.lazy() - y) / y).evaluate() == (x - y) / y
+
+
+def test_blocks():
+    x = raw.lazy() - bias
+    x.blocksize = 100
+    assert x.evaluate() == raw - bias
+
+    out = np.empty(shape)
+    x = raw.lazy() - bias
+    assert x.evaluate(out=out).stack() is out
+    with pytest.raises(DataError):
+        (raw.lazy() - bias).evaluate(out=np.empty(shape, dtype=np.int16))
+
+
+def test_ragged():
+    x = Data([np.ones((2, 2)), np.ones(3)], [1, 2], [None, None])
+    assert (x.lazy() * 2).evaluate() == x * 2
+    with pytest.raises(DataError):
+        x.lazy() - raw
@@ -0,0 +1,61 @@
+from Data import Data
+import DataFile
+from errors import DataFileError
+from astropy.io import fits
+import numpy as np
+import pytest
+
+
+def test_roundtrip(tmp_path):
+    filename = str(tmp_path / "data.ccd")
+    x = Data(np.random.random((3, 20, 10)).astype(np.float32), [1, 2.5, 0], ["a", None, 3])
+    DataFile.save(x, filename)
+    y = DataFile.load(filename, verify=True)
+    assert y == x
+    assert y.stack().dtype == np.float32
+    assert isinstance(y.stack(), np.memmap)
+    assert not y.writeable()
+
+    x = Data([np.arange(4).reshape(2, 2), np.arange(3.)], [1, 2], [None, None], "rest")
+    DataFile.save(x, filename)
+    y = DataFile.load(filename)
+    assert y == x
+    assert y.stack() is None
+
+
+def test_rest(tmp_path):
+    filename = str(tmp_path / "data.ccd")
+    header = fits.Header({"exptime": 2.0})
+    DataFile.save(Data([np.ones((2, 2))], [2.0], [None], [header]), filename)
+    rest = DataFile.load(filename).rest()
+    assert "EXPTIME" in rest[0]
+
+
+def test_errors(tmp_path):
+    filename = str(tmp_path / "data.ccd")
+    with pytest.raises(DataFileError):
+        DataFile.save(1, filename)
+    with pytest.raises(DataFileError):
+        DataFile.load(filename)
+
+    for ids in ([("a", 1)], [object()], [{1: "a"}], [np.int64(3)]):
+        with pytest.raises(DataFileError):
+            DataFile.save(Data([np.ones((2, 2))], [2.0], ids), filename)
+    x = Data([np.ones((2, 2)), np.ones((2, 2))], [np.float64(2.0), 1], [["a", 1], True])
+    DataFile.save(x, filename)
+    assert DataFile.load(filename, verify=True) == x
+    assert DataFile.load(filename).id() == (["a", 1], True)
+
+    DataFile.save(Data([np.ones((2, 2))], [2.0], [None]), filename)
+    assert DataFile.is_datafile(filename)
+    with open(filename, "r+b") as f:
+        f.seek(-64, 2)
+        f.write(b"\x01")
+    with pytest.raises(DataFileError):
+        DataFile.load(filename, verify=True)
+
+    with open(filename, "r+b") as f:
+        f.seek(8)
+        f.write(b"\x09")
+    with pytest.raises(DataFileError):
+        DataFile.load(filename)
@@ -0,0 +1,11 @@
+from FitsFocus import FitsFocus
+from errors import FitsFocusError
+import numpy as np
+import pytest
+
+
+def test_zposition():
+    z = FitsFocus._zposition(["Focus 13.140", "Focus 13.100", "Focus 13.000"], [13.14e-3, 13.1e-3, 13e-3])
+    assert np.allclose(z, [0, -0.1e-3, -0.14e-3])
+    with pytest.raises(FitsFocusError):
+        FitsFocus._zposition(["Focus 13.140", "Focus_far"], [13.14e-3, None])
@@ -0,0 +1,62 @@
+from FitsFolderIndex import FitsFolderIndex
+from FitsReductionObject import FitsBias
+from FitsBatchReducer import FitsBatchReducer
+from FitsReducer import FitsReducer
+from errors import FitsFolderIndexError
+from astropy.io import fits
+import numpy as np
+import pytest
+import os
+
+
+def write(folder, name, shape, exptime):
+    hdu = fits.PrimaryHDU(np.zeros(shape, dtype=np.uint16))
+    hdu.header["exptime"] = exptime
+    hdu.writeto(str(folder / name), overwrite=True)
+
+
+def test_index(tmp_path):
+    write(tmp_path, "Focus 13.140.fit", (3, 4), 0.5)
+    write(tmp_path, "Focus 13.100.fit", (2, 3, 4), 1.5)
+    (tmp_path / "notes.txt").write_text("not a fits file")
+    index = FitsFolderIndex(str(tmp_path) + os.sep)
+    assert index.names() == ["Focus 13.100.fit", "Focus 13.140.fit"]
+    entries = index.entries()
+    assert entries[0]["shapes"] == [(2, 3, 4)]
+    assert entries[1]["shapes"] == [(3, 4)]
+    assert entries[0]["exptime"] == 1.5
+    assert entries[0]["hdus"] == 1
+    assert entries[1]["z"] == pytest.approx(0.01314)
+    assert os.path.isfile(str(tmp_path / FitsFolderIndex.indexname))
+    with pytest.raises(FitsFolderIndexError):
+        FitsFolderIndex(str(tmp_path / "notafolder"))
+
+
+def test_incremental(tmp_path, monkeypatch):
+    write(tmp_path, "Focus 13.140.fit", (3, 4), 0.5)
+    FitsFolderIndex(str(tmp_path))
+    scanned = []
+    original = FitsFolderIndex._scan
+    monkeypatch.setattr(FitsFolderIndex, "_scan", lambda self, path: scanned.append(path) or original(self, path))
+    write(tmp_path, "Focus 13.200.fit", (3, 4), 2)
+    index = FitsFolderIndex(str(tmp_path))
+    assert [os.path.basename(i) for i in scanned] == ["Focus 13.200.fit"]
+    assert len(index) == 2
+    os.remove(str(tmp_path / "Focus 13.140.fit"))
+    index.refresh()
+    assert index.names() == ["Focus 13.200.fit"]
+
+
+def test_outputs(tmp_path):
+    (tmp_path / "frames").mkdir()
+    (tmp_path / "masters").mkdir()
+    folder, masterpath = str(tmp_path / "frames") + "/", str(tmp_path / "masters") + "/"
+    for i in range(2):
+        write(tmp_path / "frames", "frame" + str(i) + ".fits", (3, 4), 0)
+    FitsBias(masterpath, folder).create()
+    for i in range(2):
+        written = FitsBatchReducer(folder, masterpath).save(folder)
+        assert len(written) == 2
+        FitsReducer(folder + "frame0.fits", masterpath).save()
+        assert FitsFolderIndex(folder).names() == ["frame0.fits", "frame1.fits"]
+    assert len([i for i in os.listdir(folder) if "_reduced" in i]) == 6
@@ -0,0 +1,82 @@
+from FitsLoader import FitsLoader, FitsFrame
+from precision import SINGLE, DOUBLE
+from errors import FitsLoaderError
+from astropy.io import fits
+import numpy as np
+import pytest
+
+
+def write(tmp_path, data, **header):
+    filename = str(tmp_path / "frame.fits")
+    hdu = fits.PrimaryHDU(data)
+    for key in header:
+        hdu.header[key] = header[key]
+    hdu.writeto(filename, overwrite=True)
+    return filename
+
+
+def test_load(tmp_path):
+    filename = write(tmp_path, np.arange(12.).reshape(3, 4), exptime=2.5)
+    f = FitsLoader(filename)
+    assert f.data.time() == (2.5, )
+    assert np.all(f.data.data()[0] == np.arange(12.).reshape(3, 4))
+    with pytest.raises(FitsLoaderError):
+        FitsLoader(str(tmp_path / "notarealfile.fits"))
+
+
+def test_mmap_unsigned(tmp_path):
+    data = (np.arange(12, dtype=np.uint16) * 5000).reshape(3, 4)
+    filename = write(tmp_path, data, exptime=1)
+    f = FitsLoader(filename, SINGLE, mmap=True)
+    assert isinstance(f.frames[0], FitsFrame)
+    assert f.frames[0].dtype == np.uint16
+    assert np.all(f.frames[0][1:, 2:] == data[1:, 2:])
+    assert f.data.data()[0].dtype == np.uint16
+    assert np.all(f.data.data()[0] == data)
+    assert f.data.time() == (1, )
+    assert np.all(FitsLoader(filename, DOUBLE, mmap=True).data.data()[0] == FitsLoader(filename).data.data()[0])
+
+
+def test_mmap_scaled(tmp_path):
+    filename = write(tmp_path, np.arange(12, dtype=np.int16).reshape(3, 4), BSCALE=0.5, BZERO=10, exptime=1)
+    f = FitsLoader(filename, SINGLE, mmap=True)
+    with fits.open(filename) as hdul:
+        expected = hdul[0].data
+    assert f.frames[0].dtype == expected.dtype
+    assert np.all(f.frames[0][1] == expected[1])
+    assert np.all(f.data.data()[0] == expected)
+
+
+def test_mmap_unscaled(tmp_path):
+    data = np.random.random((5, 6)).astype(np.float32)
+    f = FitsLoader(write(tmp_path, data, exptime=1), SINGLE, mmap=True)
+    assert np.all(f.data.data()[0] == data)
+    assert not f.data.writeable()
+
+
+def test_window(tmp_path):
+    data = np.arange(20 * 30, dtype=np.uint16).reshape(20, 30)
+    filename = write(tmp_path, data, exptime=1)
+    window = (slice(5, 12), slice(10, 25))
+    f = FitsLoader(filename, window=window)
+    assert f.data.shape == ((7, 15), )
+    assert np.all(f.data.data()[0] == data[window])
+    with pytest.raises(FitsLoaderError):
+        FitsLoader(filename, window=(1, 2))
+
+
+def test_window_reducer(tmp_path):
+    from FitsReducer import FitsReducer
+    from FitsReductionObject import FitsBias
+    import os
+    rng = np.random.default_rng(1)
+    os.mkdir(str(tmp_path / "bias"))
+    for i in range(3):
+        write(tmp_path / "bias", rng.integers(90, 110, (20, 30)).astype(np.uint16), exptime=0)
+        os.rename(str(tmp_path / "bias" / "frame.fits"), str(tmp_path / "bias" / ("bias" + str(i) + ".fits")))
+    FitsBias(str(tmp_path) + "/", str(tmp_path / "bias") + "/").create()
+    filename = write(tmp_path, rng.integers(1000, 2000, (20, 30)).astype(np.uint16), exptime=1)
+    window = (slice(5, 12), slice(10, 25))
+    full = FitsReducer(filename).data.data()[0]
+    part = FitsReducer(filename, window=window).data.data()[0]
+    assert np.all(part == full[window])
@@ -0,0 +1,80 @@
+from Data import Data
+from FitsLoader import FitsLoader
+from precision import SINGLE
+from errors import FitsWriterError
+import FitsWriter
+from astropy.io import fits
+import numpy as np
+import pytest
+
+
+def frames(dtype):
+    rng = np.random.default_rng(0)
+    return Data([rng.integers(0, 2**16, (150, 100)).astype(dtype) for i in range(2)], [1.5, 2], [None, None])
+
+
+@pytest.mark.parametrize("compression", (None, ) + FitsWriter.COMPRESSIONS)
+def test_lossless(tmp_path, compression):
+    filename = str(tmp_path / "frame.fits")
+    data = frames(np.uint16)
+    FitsWriter.write(data, filename, compression)
+    for mmap in (False, True):
+        loaded = FitsLoader(filename, SINGLE, mmap=mmap).data
+        assert loaded.time() == (1.5, 2)
+        assert loaded.data()[0].dtype == np.uint16
+        assert all(np.all(i == j) for i, j in zip(loaded.data(), data.data()))
+    window = (slice(10, 90), slice(70, 100))
+    loaded = FitsLoader(filename, SINGLE, window=window).data
+    assert all(np.all(i == j[window]) for i, j in zip(loaded.data(), data.data()))
+
+
+def test_compressed_hdus(tmp_path):
+    filename = str(tmp_path / "frame.fits")
+    FitsWriter.write(frames(np.uint16), filename, "RICE_1")
+    with fits.open(filename) as f:
+        assert isinstance(f[1], fits.CompImageHDU)
+
+
+def test_float(tmp_path):
+    filename = str(tmp_path / "frame.fits")
+    data = Data([np.random.default_rng(0).normal(size=(40, 30))], [1], [None])
+    FitsWriter.write(data, filename, "GZIP_2")
+    assert np.all(FitsLoader(filename).data.data()[0] == data.data()[0])
+    with pytest.raises(FitsWriterError):
+        FitsWriter.write(data, filename, "RICE_1")
+    with pytest.raises(FitsWriterError):
+        FitsWriter.write(data, filename, "LZW")
+
+
+def test_headers(tmp_path):
+    raw = str(tmp_path / "raw.fits")
+    hdu = fits.PrimaryHDU(np.arange(12, dtype=np.uint16).reshape(3, 4))
+    hdu.header["EXPTIME"] = 2.0
+    hdu.header["OBJECT"] = "laser"
+    hdu.header["HISTORY"] = "taken"
+    hdu.writeto(raw)
+    data = FitsLoader(raw).data
+    filename = str(tmp_path / "reduced.fits")
+    cards = FitsWriter.provenance(data, None, None, raw)
+    FitsWriter.write(data, filename, "GZIP_2", dtype=np.float32, cards=cards)
+    with fits.open(filename) as f:
+        assert f[0].header["CALBIAS"] == data.fingerprint()
+        assert f[0].header["CALDARK"] == "NONE"
+        assert f[0].header["RAWFILE"] == "raw.fits"
+        assert f[1].header["OBJECT"] == "laser"
+        assert "taken" in str(f[1].header["HISTORY"])
+        assert f[1].header["EXPTIME"] == 2.0
+        assert f[1].data.dtype == np.float32
+        assert np.array_equal(f[1].data, data.data()[0])
+
+
+def test_stream(tmp_path):
+    data = frames(np.uint16)
+    with FitsWriter.FitsStreamWriter("RICE_1", None, depth=1) as writer:
+        for i in range(3):
+            writer.put(data, str(tmp_path / (str(i) + ".fits")))
+    assert writer.written == [str(tmp_path / (str(i) + ".fits")) for i in range(3)]
+    assert all(np.all(i == j) for i, j in zip(FitsLoader(writer.written[2], SINGLE).data.data(), data.data()))
+    with pytest.raises(FitsWriterError):
+        with FitsWriter.FitsStreamWriter("RICE_1", np.float32) as writer:
+            writer.put(data, str(tmp_path / "float.fits"))
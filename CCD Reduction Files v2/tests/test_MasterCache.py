@@ -0,0 +1,72 @@
+from MasterCache import MasterCache, get_cache
+from CCDReductionObject import CCDBias
+from errors import MasterCacheError
+from Data import Data
+import DataFile
+import numpy as np
+import pytest
+import weakref
+
+
+def save(filename, value, size=(10, 10)):
+    DataFile.save(Data([np.full(size, value, np.float64)], [0], [None]), filename)
+
+
+def test_cache(tmp_path):
+    filename = str(tmp_path / "a.ccd")
+    save(filename, 1)
+    loads = []
+
+    def load(name):
+        loads.append(name)
+        return DataFile.load(name)
+
+    cache = MasterCache()
+    first = cache.get(filename, load)
+    assert cache.get(filename, load) is first
+    assert len(loads) == 1 and cache.hits == 1 and filename in cache
+
+    save(filename, 2, (10, 11))
+    assert cache.get(filename, load).data()[0][0, 0] == 2
+    assert len(loads) == 2 and len(cache) == 1
+
+    cache.invalidate(filename)
+    cache.get(filename, load)
+    assert len(loads) == 3
+    cache.invalidate()
+    assert len(cache) == 0
+    with pytest.raises(FileNotFoundError):
+        cache.get(str(tmp_path / "notarealfile.ccd"), load)
+    with pytest.raises(MasterCacheError):
+        cache.memory = -1
+
+
+def test_lru(tmp_path):
+    names = [str(tmp_path / (i + ".ccd")) for i in "abc"]
+    for i in names:
+        save(i, 0)
+    cache = MasterCache(memory=2 * 800)
+    for i in names[:2]:
+        cache.get(i, DataFile.load)
+    cache.get(names[0], DataFile.load)
+    cache.get(names[2], DataFile.load)
+    assert names[0] in cache and names[2] in cache and names[1] not in cache
+    assert cache.nbytes() == 1600
+    cache.memory = 800
+    assert len(cache) == 1 and names[2] in cache
+
+
+def test_load(tmp_path, monkeypatch):
+    masterpath = str(tmp_path) + "/"
+    save(masterpath + "master_bias.ccd", 3)
+    bias = CCDBias(masterpath).load()
+    assert CCDBias(masterpath).load() is bias
+    assert masterpath + "master_bias.ccd" in get_cache()
+    mapped = weakref.ref(bias.stack())
+    del bias
+    original, released = DataFile.save, []
+    monkeypatch.setattr(DataFile, "save", lambda data, filename: released.append(mapped() is None) or
+                        original(data, filename))
+    CCDBias(masterpath)._save_object(Data([np.zeros((10, 10))], [0], [None]), "master_bias")
+    assert released == [True]
+    assert CCDBias(masterpath).load().data()[0][0, 0] == 0
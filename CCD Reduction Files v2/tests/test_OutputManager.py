@@ -0,0 +1,34 @@
+import OutputManager
+from OutputManager import get_manager
+from errors import OutputManagerError
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+import os
+
+
+def reserve(path):
+    return [get_manager(path).reserve("pic", ".png") for i in range(20)]
+
+
+def test_reserve(tmp_path):
+    path = str(tmp_path) + "/"
+    open(path + "pic(1).png", "w").close()
+    manager = get_manager(path)
+    assert manager is get_manager(path)
+    assert manager.reserve("pic", ".png", "frame.fits") == path + "pic.png"
+    open(path + "pic(2).png", "w").close()  # created after the listing
+    assert manager.reserve("pic", ".png") == path + "pic(3).png"
+    assert manager.reserve("pic", ".txt") == path + "pic.txt"
+    assert os.path.exists(path + "pic(3).png")
+    assert [(i["output"], i["input"]) for i in manager.entries()] == \
+        [("pic.png", "frame.fits"), ("pic(3).png", None), ("pic.txt", None)]
+    with pytest.raises(OutputManagerError):
+        OutputManager.reserve(path + "notafolder/", "pic", ".png")
+
+
+def test_processes(tmp_path):
+    path = str(tmp_path) + "/"
+    with ProcessPoolExecutor(3) as pool:
+        names = [j for i in pool.map(reserve, [path] * 3) for j in i]
+    assert len(set(names)) == 60
+    assert len(get_manager(path).entries()) == 60
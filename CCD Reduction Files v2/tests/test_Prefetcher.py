@@ -0,0 +1,62 @@
+from Prefetcher import Prefetcher, decoded_size
+from errors import PrefetcherError
+import numpy as np
+import threading
+import pytest
+import random
+import time
+
+
+def test_order():
+    def load(i):
+        time.sleep(random.random() * 0.01)
+        return i * 2
+    for depth in (0, 1, 4):
+        assert list(Prefetcher(range(20), load, depth)) == [i * 2 for i in range(20)]
+    assert list(Prefetcher([], load)) == []
+    with pytest.raises(PrefetcherError):
+        Prefetcher(range(3), load, -1)
+    with pytest.raises(PrefetcherError):
+        Prefetcher(range(3), load, sizes=[1])
+
+
+def test_limits():
+    lock = threading.Lock()
+    state = {"now": 0, "most": 0}
+
+    def load(i):
+        with lock:
+            state["now"] += 1
+            state["most"] = max(state["most"], state["now"])
+        time.sleep(0.005)
+        return i
+
+    for item in Prefetcher(range(10), load, depth=3):
+        with lock:
+            state["now"] -= 1
+        time.sleep(0.005)
+    assert 1 < state["most"] <= 4
+
+    state["most"] = 0
+    for item in Prefetcher(range(10), load, depth=3, memory=15, sizes=[10] * 10):
+        with lock:
+            state["now"] -= 1
+    assert state["most"] == 1
+
+
+def test_error():
+    def load(i):
+        if i == 3:
+            raise ValueError("broken file")
+        return i
+    loaded = []
+    with pytest.raises(ValueError):
+        for i in Prefetcher(range(6), load, 2):
+            loaded.append(i)
+    assert loaded == [0, 1, 2]
+
+
+def test_decoded_size():
+    entry = {"size": 100, "shapes": [(3, 4), (2, 3, 4)]}
+    assert decoded_size(entry) == 100
+    assert decoded_size(entry, np.float32) == 36 * 4
@@ -0,0 +1,76 @@
+from RawLoader import RawLoader, NpyLoader
+from RawReductionObject import RawBias, NpyBias
+from RawReducer import RawReducer, NpyReducer
+from RawFolderIndex import RawFolderIndex
+from errors import RawLoaderError
+import numpy as np
+import pytest
+import json
+from astropy.io import fits
+
+
+def write(folder, name, frames, **header):
+    if name.endswith(".npy"):
+        np.save(str(folder / name), frames)
+    else:
+        frames.astype("<u2").tofile(str(folder / name))
+    with open(str(folder / (name[:-4] + ".json")), "w") as f:
+        json.dump(header, f)
+    return str(folder / name)
+
+
+def test_raw(tmp_path):
+    frames = np.arange(2 * 6 * 5, dtype=np.uint16).reshape(2, 6, 5)
+    filename = write(tmp_path, "frame.raw", frames, exptime=[1, 2], shape=[6, 5])
+    data = RawLoader(filename).data
+    assert isinstance(data.stack(), np.memmap)
+    assert data.time() == (1, 2)
+    assert np.all(data.stack() == frames)
+    window = (slice(1, 4), slice(2, 5))
+    assert np.all(RawLoader(filename, window).data.data()[1] == frames[1][window])
+    with pytest.raises(RawLoaderError):
+        RawLoader(write(tmp_path, "times.raw", frames, exptime=[1, 2, 3], shape=[6, 5]))
+    with pytest.raises(RawLoaderError):
+        RawLoader(str(tmp_path / "notarealfile.raw"))
+
+
+def test_npy(tmp_path):
+    frame = np.arange(30, dtype=np.uint16).reshape(6, 5)
+    data = NpyLoader(write(tmp_path, "frame.npy", frame, exptime=0.5)).data
+    assert data.time() == (0.5, )
+    assert data.stack().base is not None
+    assert np.all(data.data()[0] == frame)
+
+
+def test_reduction(tmp_path):
+    (tmp_path / "bias").mkdir()
+    (tmp_path / "npy").mkdir()
+    rng = np.random.default_rng(0)
+    bias = [rng.integers(90, 110, (6, 5)).astype(np.uint16) for i in range(3)]
+    for i in range(3):
+        write(tmp_path / "bias", "bias" + str(i) + ".raw", bias[i], exptime=0, shape=[6, 5])
+        write(tmp_path / "npy", "bias" + str(i) + ".npy", bias[i], exptime=0)
+    assert len(RawFolderIndex(str(tmp_path / "bias"))) == 3
+    RawBias(str(tmp_path) + "/", str(tmp_path / "bias") + "/").create()
+    master = RawBias(str(tmp_path) + "/").load().data()[0]
+    assert np.all(master == np.median(bias, axis=0))
+    NpyBias(str(tmp_path) + "/", str(tmp_path / "npy") + "/").create()
+    assert np.all(NpyBias(str(tmp_path) + "/").load().data()[0] == master)
+
+    frame = rng.integers(1000, 2000, (6, 5)).astype(np.uint16)
+    reduced = RawReducer(write(tmp_path, "frame.raw", frame, exptime=1, shape=[6, 5])).data.data()[0]
+    assert np.allclose(reduced, frame - master)
+    reduced = NpyReducer(write(tmp_path, "frame.npy", frame, exptime=1)).data.data()[0]
+    assert np.allclose(reduced, frame - master)
+
+
+def test_save(tmp_path):
+    frame = np.arange(30, dtype=np.uint16).reshape(6, 5)
+    reducer = NpyReducer(write(tmp_path, "frame.npy", frame, exptime=1))
+    filename = reducer.save()
+    assert filename == str(tmp_path) + "/frame_reduced.fits"
+    assert reducer.save().endswith("frame_reduced(1).fits")
+    with fits.open(filename) as f:
+        assert f[0].header["RAWFILE"] == "frame.npy"
+        assert f[1].data.dtype == np.dtype(">f8")
+        assert np.array_equal(f[1].data, frame)
@@ -0,0 +1,73 @@
+import Renderer
+from RawLaserReducer import NpyLaserReducer
+from errors import RendererError
+from matplotlib import pyplot as plt, colors
+from matplotlib.image import imread
+import numpy as np
+import pytest
+import os
+
+
+def pyplot(data, log, filename):
+    fig = plt.figure(figsize=[15, 10.5])
+    ax = fig.add_subplot(111)
+    ax.set_title("Exposure Time =1")
+    extent = [-0.5, (data.shape[1] - 0.5), (data.shape[0] - 0.5), -0.5]
+    im = ax.imshow(data, extent=extent, cmap="jet", aspect="equal", norm=colors.LogNorm() if log else None)
+    ax.set_xlabel("x position")
+    ax.set_ylabel("y position")
+    fig.colorbar(im, ax=ax).set_label("Counts")
+    fig.suptitle("Image of Data")
+    fig.savefig(filename)
+    plt.close(fig)
+
+
+def task(data, log, filename):
+    extent = [-0.5, (data.shape[1] - 0.5), (data.shape[0] - 0.5), -0.5]
+    return ("image", {"data": data, "extent": extent, "cmap": "jet", "log": log, "xlabel": "x position",
+                      "ylabel": "y position", "clabel": "Counts", "title": "Exposure Time =1",
+                      "suptitle": "Image of Data"}, filename)
+
+
+def test_same_as_pyplot(tmp_path):
+    rng = np.random.default_rng(0)
+    frames = [rng.gamma(2, 100, (300, 400)) + 1, rng.gamma(2, 10, (200, 200)) + 1]
+    for i, (frame, log) in enumerate(zip(frames + frames, (False, False, True, True))):
+        expected, rendered = str(tmp_path / ("a" + str(i) + ".png")), str(tmp_path / ("b" + str(i) + ".png"))
+        pyplot(frame, log, expected)
+        assert Renderer.render([task(frame, log, rendered)]) == [rendered]
+        assert np.array_equal(imread(expected), imread(rendered))
+
+
+def test_downsample():
+    data = np.arange(35.0).reshape(5, 7)
+    small, extent = Renderer.downsample(data, [-0.5, 6.5, 4.5, -0.5], (2, 3))
+    assert np.array_equal(small, [[4, 6, 8], [18, 20, 22]])
+    assert extent == [-0.5, 5.5, 3.5, -0.5]
+    assert Renderer.downsample(data, [0, 1, 1, 0], (3, 3))[0] is data
+
+
+def test_pool(tmp_path):
+    names = [Renderer.reserve(str(tmp_path) + "/", "pic", ".png") for i in range(3)]
+    assert [os.path.basename(i) for i in names] == ["pic.png", "pic(1).png", "pic(2).png"]
+    frame = np.random.default_rng(1).normal(size=(50, 60))
+    with Renderer.RenderPool(2) as renderer:
+        renderer.render([task(frame, False, i) for i in names])
+    assert renderer.rendered == names
+    assert all(imread(i).shape == imread(names[0]).shape for i in names)
+    with pytest.raises(RendererError):
+        Renderer.RenderPool(0)
+
+
+def test_save_functions(tmp_path):
+    y, x = np.indices((40, 50))
+    np.save(str(tmp_path / "laser.npy"), np.stack([np.exp(-((y - 20)**2 + (x - 24)**2) / 50.)] * 2))
+    with open(str(tmp_path / "laser.json"), "w") as f:
+        f.write('{"exptime": 1}')
+    reducer = NpyLaserReducer(str(tmp_path / "laser.npy"))
+    with Renderer.RenderPool() as renderer:
+        images = reducer.imsave(savename="image", renderer=renderer)
+        powers = reducer.powersave(savename="power", renderer=renderer)
+    assert [os.path.basename(i) for i in images + powers] == ["image.png", "image(1).png", "power.png", "power(1).png"]
+    assert renderer.rendered == images + powers
+    assert all(os.path.getsize(i) > 0 for i in images + powers)
@@ -0,0 +1,50 @@
+import Thumbnails
+from RawThumbnails import NpyThumbnails
+from Data import Data
+from errors import ThumbnailsError
+from matplotlib import colormaps
+from matplotlib.image import imread
+import numpy as np
+import json
+import pytest
+import os
+
+
+def test_lookup_table():
+    assert np.array_equal(Thumbnails.JET, colormaps["jet"](np.arange(256), bytes=True)[:, :3])
+
+
+def test_binned(tmp_path):
+    data = np.arange(35.0).reshape(5, 7)
+    assert np.array_equal(Thumbnails.binned(data, 3), [[8, 11]])
+    assert Thumbnails.binned(data, 7).shape == (5, 7)
+    with pytest.raises(ThumbnailsError):
+        Thumbnails.binned(np.arange(35.0), 3)
+    with pytest.raises(ThumbnailsError):
+        Thumbnails.thumbnails(Data([np.arange(35.0)], [1], [None]), str(tmp_path), "pic")
+    assert not os.listdir(str(tmp_path))
+
+
+def test_thumbnails(tmp_path):
+    frame = np.arange(12.0).reshape(3, 4)
+    data = Data([frame, frame * 0], [1, 1], [None, None])
+    names = Thumbnails.thumbnails(data, str(tmp_path), "pic", 8, log=True)
+    assert [os.path.basename(i) for i in names] == ["pic_0.png", "pic_1.png"]
+    image = (imread(names[0]) * 255).round().astype(np.uint8)
+    assert np.array_equal(image, Thumbnails.colour(frame, True))
+    assert np.array_equal(image[0, 0], Thumbnails.JET[0]) and np.array_equal(image[-1, -1], Thumbnails.JET[-1])
+    assert np.all((imread(names[1]) * 255).round() == Thumbnails.JET[0])
+    with pytest.raises(ThumbnailsError):
+        Thumbnails.thumbnails(frame, str(tmp_path), "pic")
+
+
+def test_folder(tmp_path):
+    for i in range(3):
+        np.save(str(tmp_path / ("frame" + str(i) + ".npy")), np.random.default_rng(i).normal(size=(2, 300, 200)))
+        with open(str(tmp_path / ("frame" + str(i) + ".json")), "w") as f:
+            json.dump({"exptime": [1, 2]}, f)
+    saved = NpyThumbnails(str(tmp_path), str(tmp_path), size=100).save(processes=2)
+    assert [os.path.basename(i) for i in saved] == ["frame" + str(i) + "_" + str(j) + ".png"
+                                                     for i in range(3) for j in range(2)]
+    assert all(imread(i).shape == (100, 66, 3) for i in saved)
+    assert NpyThumbnails(str(tmp_path), str(tmp_path), size=100).save() == saved
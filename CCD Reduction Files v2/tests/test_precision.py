@@ -0,0 +1,47 @@
+from precision import PrecisionPolicy, DOUBLE, SINGLE, set_policy, get_policy
+from errors import PrecisionPolicyError
+from FitsLoader import FitsLoader
+from CCDReducer import CCDReducer
+from benchmarks import precision_policy
+from astropy.io import fits
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def single():
+    set_policy("single")
+    yield
+    set_policy(DOUBLE)
+
+
+def test_policy():
+    assert get_policy() is DOUBLE
+    assert SINGLE.raw is None
+    assert SINGLE.calibrated == np.float32
+    with pytest.raises(PrecisionPolicyError):
+        set_policy("half")
+    with pytest.raises(PrecisionPolicyError):
+        PrecisionPolicy(None, np.int16, np.float64)
+
+
+def test_loader(tmp_path, single):
+    filename = str(tmp_path / "frame.fits")
+    hdu = fits.PrimaryHDU(np.arange(12, dtype=np.uint16).reshape(3, 4))
+    hdu.header["exptime"] = 2.0
+    hdu.writeto(filename)
+    assert FitsLoader(filename).data.data()[0].dtype == np.uint16
+    assert FitsLoader(filename, DOUBLE).data.data()[0].dtype == np.float64
+
+
+def test_reducer(tmp_path, single):
+    f = CCDReducer(str(tmp_path / "frame.fits"))
+    assert f.data.data()[0].dtype == np.float32
+
+
+def test_accuracy():
+    numbers = precision_policy((200, 200))
+    assert get_policy() is DOUBLE
+    assert numbers["maximum absolute"] < 1e-2
+    assert numbers["maximum relative"] < 4e-7
+    assert numbers["median relative"] < 1e-7